@@ -29,6 +29,13 @@ setup(
         "beautifulsoup4>=4.11.1",
         "lxml>=4.9.1",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "numpy": ["numpy"],
+        "pandas": ["pandas"],
+        "pyarrow": ["pyarrow"],
+        "orjson": ["orjson"],
+    },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
@@ -5,8 +5,40 @@
 # Copyright (c) 2023 Connor Sanders <jecsand@pm.me>
 # MIT License
 
-from unittest import main as t_main, TestCase
-from yahoofinancials import YahooFinancials as yf
+import asyncio
+import datetime
+import importlib.util
+import pickle
+import subprocess
+import sys
+import threading
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import loads
+from requests import HTTPError
+from requests.cookies import RequestsCookieJar, create_cookie
+from unittest.mock import Mock, patch
+from unittest import main as t_main, TestCase, skipIf
+from yahoofinancials import YahooFinancials as yf, AsyncYahooFinancials as async_yf
+from yahoofinancials import aio
+from yahoofinancials import yf as yf_module
+from yahoofinancials import cache, columns, dates, frames
+from yahoofinancials.breaker import CircuitBreaker, CircuitBreakers
+from yahoofinancials.columns import PriceColumns
+from yahoofinancials import decoder as decoder_module
+from yahoofinancials.data import ManagedException, UrlOpener
+from yahoofinancials.decoder import JsonDecoder
+from yahoofinancials.memcache import MemoryCache
+from yahoofinancials.proxies import ProxyPool
+from yahoofinancials.ratelimit import RateLimiter, TokenBucket
+from yahoofinancials.retry import Deadline, RetryPolicy, deadline_scope, get_current_deadline, parse_retry_after
+from yahoofinancials import sessions
+from yahoofinancials.sessions import SessionManager, get_payload_key
+from yahoofinancials.singleflight import AsyncSingleFlight, SingleFlight
+from yahoofinancials.maps import REQUEST_MAP
+from yahoofinancials.utils import LazyModule, get_period2, lazy_import
 
 # Test Configuration Variables
 stocks = ['AAPL', 'MSFT', 'C', 'IL&FSTRANS.NS']
@@ -222,5 +254,1170 @@ class TestModule(TestCase):
             self.assertEqual(False, True)
 
 
+# Rate Limiter Test Class
+class TestRateLimiter(TestCase):
+
+    def test_token_bucket_burst(self):
+        bucket = TokenBucket(rate=1000, capacity=5)
+        waits = [bucket.reserve() for _ in range(6)]
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertGreater(waits[5], 0.0)
+
+    def test_rate_limiter_endpoints(self):
+        limiter = RateLimiter({'chart': (1, 1)})
+        self.assertEqual(limiter.acquire_url("https://query2.finance.yahoo.com/v8/finance/chart/C?symbol=C"), 0.0)
+        self.assertEqual(limiter.acquire('quoteSummary'), 0.0)
+        start = time.monotonic()
+        limiter.acquire('chart')
+        self.assertGreater(time.monotonic() - start, 0.5)
+
+    def test_shared_rate_limit_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache._RateLimitDBManager.set_location(tmp_dir)
+            store = cache._RateLimitStore()
+            waits = [store.reserve('test', 1.0, 2) for _ in range(3)]
+            cache._RateLimitDBManager.close_db()
+            cache._RateLimitDBManager.set_location(cache._TzDBManager.get_location())
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertGreater(waits[2], 0.5)
+
+
+# quoteSummary Module Batching Test Class
+class TestModuleBatching(TestCase):
+
+    def test_get_modules(self):
+        yahoo_financials = yf(['C', 'WFC'])
+        urls = []
+
+        def fetch_url(url, res_field=""):
+            urls.append(url)
+            return {'result': [{'price': {'regularMarketPrice': {'raw': 50.5}},
+                                'summaryDetail': {'beta': {'raw': 1.5}}}], 'error': None}
+
+        yahoo_financials._fetch_url = fetch_url
+        out = yahoo_financials.get_modules(['price', 'summaryDetail'])
+        self.assertEqual(out['WFC'], {'price': {'regularMarketPrice': 50.5}, 'summaryDetail': {'beta': 1.5}})
+        self.assertEqual(len(urls), 2)
+        self.assertIn('modules=price,summaryDetail&', urls[0])
+        # Single module getters are served from the batched responses
+        self.assertEqual(yahoo_financials.get_current_price(), {'C': 50.5, 'WFC': 50.5})
+        self.assertEqual(yahoo_financials.get_beta(), {'C': 1.5, 'WFC': 1.5})
+        self.assertEqual(len(urls), 2)
+        self.assertRaises(ValueError, yahoo_financials.get_modules, ['price', 'notAModule'])
+
+
+# Line Item Test Class
+class TestLineItems(TestCase):
+
+    def test_get_line_items(self):
+        yahoo_financials = yf(['C', 'WFC'])
+        urls = []
+
+        def fetch_url(url, res_field=""):
+            urls.append(url)
+            results = {
+                'annualEBIT': [{'asOfDate': '2021-12-31', 'reportedValue': {'raw': 2.0}},
+                               {'asOfDate': '2022-12-31', 'reportedValue': {'raw': 3.0}}],
+                'annualTotalRevenue': [{'asOfDate': '2022-12-31', 'reportedValue': {'raw': 12.0}}]}
+            types = url.split('?type=')[1].split('&')[0].split('%2C')
+            return {'result': [{'meta': {'type': [t]}, t: results[t]} for t in types if t in results], 'error': None}
+
+        yahoo_financials._fetch_url = fetch_url
+        out = yahoo_financials.get_line_items(['ebit', 'totalRevenue', 'netIncome'])
+        self.assertEqual(out['C'], {'2021-12-31': {'ebit': 2.0}, '2022-12-31': {'ebit': 3.0, 'totalRevenue': 12.0}})
+        self.assertEqual(len(urls), 2)
+        self.assertIn('?type=annualEBIT%2CannualTotalRevenue%2CannualNetIncome&', urls[0])
+        # Each line item is cached on its own, including the ones missing from the response
+        yahoo_financials.get_line_items(['netIncome', 'ebit'])
+        self.assertEqual(len(urls), 2)
+        latest = yahoo_financials.get_line_items(['ebit', 'netIncome'], latest=True)
+        self.assertEqual(latest, {'C': {'ebit': 3.0}, 'WFC': {'ebit': 3.0}})
+        self.assertEqual(len(urls), 4)
+        self.assertIn('&period1=', urls[-1])
+        # The single field getters read the baseline period of the full statements
+        self.assertEqual(yahoo_financials.get_ebit(), {'C': 2.0, 'WFC': 2.0})
+        self.assertEqual(yahoo_financials.get_net_income(), {'C': None, 'WFC': None})
+        self.assertEqual(len(urls), 4)
+        statements = yahoo_financials.get_financial_stmts('annual', 'income')['incomeStatementHistory']
+        self.assertEqual(yahoo_financials.get_ebit(), yahoo_financials._get_stmt_field(statements, 'ebit'))
+        self.assertRaises(ValueError, yahoo_financials.get_line_items, ['notALineItem'])
+        self.assertRaises(ValueError, yahoo_financials.get_line_items, ['ebit'], 'weekly')
+
+
+# Merged Statement Test Class
+class TestMergedStatements(TestCase):
+
+    @staticmethod
+    def fetch_url(urls):
+        def fetch_url(url, res_field=""):
+            urls.append(url)
+            types = url.split('?type=')[1].split('&')[0].split('%2C')
+            values = {'annualEBIT': 3.0, 'annualTotalAssets': 50.0, 'annualFreeCashFlow': 7.0, 'annualNetIncome': 2.0}
+            return {'result': [{'meta': {'type': [t]}, t: [{'asOfDate': '2022-12-31', 'reportedValue': {'raw': v}}]}
+                               for t, v in values.items() if t in types], 'error': None}
+        return fetch_url
+
+    def test_merged_statements(self):
+        yahoo_financials = yf(['C', 'WFC'])
+        urls = []
+        yahoo_financials._fetch_url = self.fetch_url(urls)
+        out = yahoo_financials.get_financial_stmts('annual', ['income', 'balance', 'cash'])
+        # The union of the three statements needs two urls under the default max_url_length, instead of three
+        self.assertEqual(len(urls), 4)
+        self.assertEqual(sorted(out), ['balanceSheetHistory', 'cashflowStatementHistory', 'incomeStatementHistory'])
+        self.assertEqual(out['incomeStatementHistory']['C'], [{'2022-12-31': {'ebit': 3.0, 'netIncome': 2.0}}])
+        self.assertEqual(out['balanceSheetHistory']['WFC'], [{'2022-12-31': {'totalAssets': 50.0}}])
+        self.assertEqual(out['cashflowStatementHistory']['C'],
+                         [{'2022-12-31': {'freeCashFlow': 7.0, 'netIncome': 2.0}}])
+        # The demultiplexed statements match the ones requested one by one
+        single = yf(['C', 'WFC'])
+        single_urls = []
+        single._fetch_url = self.fetch_url(single_urls)
+        self.assertEqual(single.get_financial_stmts('annual', 'cash'), {'cashflowStatementHistory':
+                                                                         out['cashflowStatementHistory']})
+        self.assertEqual(len(single_urls), 2)
+        yahoo_financials.get_financial_stmts('annual', ['income', 'cash'])
+        self.assertEqual(len(urls), 4)
+
+    def test_url_length_split(self):
+        yahoo_financials = yf('C', max_url_length=32000)
+        urls = []
+        yahoo_financials._fetch_url = self.fetch_url(urls)
+        yahoo_financials.get_financial_stmts('annual', ['income', 'balance', 'cash'])
+        self.assertEqual(len(urls), 1)
+        yahoo_financials = yf('C', max_url_length=8000)
+        urls = []
+        yahoo_financials._fetch_url = self.fetch_url(urls)
+        out = yahoo_financials.get_financial_stmts('annual', ['income', 'balance'])
+        self.assertTrue(1 < len(urls) < 4)
+        self.assertTrue(all(len(url) <= 8000 for url in urls))
+        self.assertEqual(out['balanceSheetHistory']['C'], [{'2022-12-31': {'totalAssets': 50.0}}])
+
+
+# Url Template Test Class
+class TestUrlTemplates(TestCase):
+
+    def test_url_templates(self):
+        self.assertEqual(get_period2(1702746000), 1702771200)
+        self.assertEqual(get_period2(1702771200), 1702857600)
+        yahoo_financials = yf('C')
+        url = yahoo_financials._get_request_url('C', 'income', '', {'interval': 'annual'})[0]
+        self.assertIn('/timeseries/c?type=annualAmortization%2C', url)
+        self.assertIn('&period1=493590046&period2=' + str(get_period2()) + '&merge=False', url)
+        self.assertEqual(url, yahoo_financials._get_request_url('C', 'income', '', {'interval': 'annual'})[0])
+        self.assertIn('/timeseries/wfc?', yahoo_financials._get_request_url('WFC', 'income', '',
+                                                                            {'interval': 'annual'})[0])
+        uk_url = yf('C', country='UK')._get_request_url('C', 'income', '', {'interval': 'annual'})[0]
+        self.assertIn('&lang=en-GB&region=GB', uk_url)
+        modules_url = yahoo_financials._get_modules_url('C', ['price', 'summaryDetail'])
+        self.assertTrue(modules_url.endswith('/quoteSummary/c?modules=price,summaryDetail&formatted=False&lang=en-US'
+                                             '&region=US&corsDomain=finance.yahoo.com'))
+        insights_url = yahoo_financials._get_request_url('C', 'analytic', 'insights', {})[0]
+        self.assertTrue(insights_url.endswith('/insights?symbol=c'))
+
+    def test_url_template_cache(self):
+        yahoo_financials = yf('C')
+        args = (REQUEST_MAP['fundamentals'], {}, 'annual', 'balance_sheet')
+        template = yahoo_financials._build_url_template(*args)
+        expected = template.replace("{symbol}", "c").replace("{period1}", "493590046").replace(
+            "{period2}", str(get_period2()))
+        with patch.object(yf, '_URL_TEMPLATES', {}) as templates:
+            with patch.object(yahoo_financials, '_build_url_template',
+                              wraps=yahoo_financials._build_url_template) as build:
+                self.assertEqual(yahoo_financials._construct_url('c', *args), expected)
+                self.assertEqual(yahoo_financials._construct_url('c', *args), expected)
+                self.assertEqual(yahoo_financials._construct_url('wfc', *args), expected.replace('/c?', '/wfc?'))
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(len(templates), 1)
+
+
+# Multi Symbol Quote Test Class
+class TestQuoteBatching(TestCase):
+
+    def test_quote_getters(self):
+        yahoo_financials = yf(stocks, quote_chunk_size=3)
+        urls = []
+
+        def fetch_url(url, res_field=""):
+            urls.append(url)
+            return {'result': [
+                {'symbol': 'C', 'regularMarketPrice': 50.5, 'regularMarketChangePercent': -1.25,
+                 'fullExchangeName': 'NYSE', 'dividendYield': 4.0},
+                {'symbol': 'IL&FSTRANS.NS', 'regularMarketPrice': 2.5}
+            ], 'error': None}
+
+        yahoo_financials._fetch_url = fetch_url
+        self.assertEqual(yahoo_financials.get_current_price(),
+                         {'AAPL': None, 'MSFT': None, 'C': 50.5, 'IL&FSTRANS.NS': 2.5})
+        self.assertEqual(len(urls), 2)
+        self.assertIn('symbols=AAPL,MSFT,C&', urls[0])
+        self.assertIn('symbols=IL%26FSTRANS.NS&', urls[1])
+        # Percentages are scaled to the fractions returned by the quoteSummary modules
+        self.assertAlmostEqual(yahoo_financials.get_current_percent_change()['C'], -0.0125)
+        self.assertAlmostEqual(yahoo_financials.get_dividend_yield()['C'], 0.04)
+        self.assertEqual(yahoo_financials.get_stock_exchange()['C'], 'NYSE')
+        self.assertEqual(len(urls), 2)
+
+
+# Persistent Response Cache Test Class
+class TestResponseCache(TestCase):
+
+    def test_response_ttls(self):
+        self.assertEqual(cache.get_response_ttl(
+            "https://query1.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price,summaryDetail&formatted=False"
+        ), 15)
+        self.assertEqual(cache.get_response_ttl(
+            "https://query1.finance.yahoo.com/ws/fundamentals-timeseries/v1/finance/timeseries/c?type=annualEBIT"
+        ), 24 * 60 * 60)
+        self.assertEqual(cache.get_response_ttl(
+            "https://query2.finance.yahoo.com/v8/finance/chart/C?symbol=C&interval=1m", {'chart:intraday': 30}
+        ), 30)
+        chart_ttl = cache.get_response_ttl("https://query2.finance.yahoo.com/v8/finance/chart/C?symbol=C&interval=1d")
+        self.assertTrue(0 < chart_ttl <= 3 * 24 * 60 * 60)
+        # Saturday 2023-12-16 12:00 US/Eastern closes next on Monday 2023-12-18 16:00 US/Eastern
+        self.assertEqual(cache.next_market_close(1702746000), 1702933200)
+
+    def test_response_store(self):
+        url = "https://query1.finance.yahoo.com/ws/fundamentals-timeseries/v1/finance/timeseries/c?type=annualEBIT"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache._ResponseDBManager.set_location(tmp_dir)
+            response_cache = cache._ResponseCache()
+            response_cache.store(url + "&period2=1", {'result': [1, 2]}, 60)
+            stored = response_cache.lookup(url.replace("query1.", "query2.") + "&period2=2")
+            response_cache.store(url, {'result': []}, -1)
+            response_cache.purge(expired_only=False)
+            purged = response_cache.lookup(url + "&period2=1")
+            cache._ResponseDBManager.close_db()
+            cache._ResponseDBManager.set_location(cache._TzDBManager.get_location())
+        self.assertEqual(stored, {'result': [1, 2]})
+        self.assertIsNone(purged)
+
+
+# Price History Cache Test Class
+class TestPriceHistoryCache(TestCase):
+
+    @staticmethod
+    def fake_chart_data(url):
+        params = dict(p.split('=') for p in url.split('?')[1].split('&'))
+        timestamps = list(range(int(params['period1']) + 52200, int(params['period2']), 86400))
+        prices = [float(i) for i in range(len(timestamps))]
+        return {'chart': {'result': [{
+            'meta': {'currency': 'USD', 'gmtoffset': -18000, 'firstTradeDate': 0, 'instrumentType': 'EQUITY'},
+            'timestamp': timestamps,
+            'indicators': {
+                'quote': [{'open': prices, 'high': prices, 'low': prices, 'close': prices, 'volume': [1] * len(prices)}],
+                'adjclose': [{'adjclose': prices}]
+            }
+        }], 'error': None}}
+
+    def test_missing_ranges(self):
+        self.assertEqual(cache._subtract_ranges(0, 100, [(10, 20), (15, 30), (50, 60)]), [(0, 10), (30, 50), (60, 100)])
+        self.assertEqual(cache._subtract_ranges(10, 20, [(0, 100)]), [])
+
+    def test_incremental_history(self):
+        requested = []
+
+        def get_api_data(api_url, tries=0):
+            requested.append(api_url)
+            return self.fake_chart_data(api_url)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache._PriceHistoryDBManager.set_location(tmp_dir)
+            yahoo_financials = yf('C', history_cache=True)
+            yahoo_financials._history_cache = cache._PriceHistoryCache()
+            yahoo_financials._get_api_data = get_api_data
+            first = yahoo_financials.get_historical_price_data('2020-01-01', '2020-01-11', 'daily')
+            second = yahoo_financials.get_historical_price_data('2020-01-01', '2020-01-21', 'daily')
+            third = yahoo_financials.get_historical_price_data('2020-01-05', '2020-01-15', 'daily')
+            cache._PriceHistoryDBManager.close_db()
+            cache._PriceHistoryDBManager.set_location(cache._TzDBManager.get_location())
+        self.assertEqual(len(requested), 2)
+        self.assertIn('period1=1578700800&period2=1579564800', requested[1])
+        self.assertEqual(len(first['C']['prices']), 10)
+        self.assertEqual(len(second['C']['prices']), 20)
+        self.assertEqual(second['C']['prices'][:10], first['C']['prices'])
+        self.assertEqual(third['C']['prices'], second['C']['prices'][4:14])
+        self.assertEqual(third['C']['prices'][0]['formatted_date'], '2020-01-05')
+
+
+# Columnar Prices Test Class
+class TestColumnarPrices(TestCase):
+
+    def get_prices(self, **kwargs):
+        yahoo_financials = yf('C', **kwargs)
+        yahoo_financials._get_api_data = lambda api_url, tries=0: TestPriceHistoryCache.fake_chart_data(api_url)
+        return yahoo_financials.get_historical_price_data('2020-01-01', '2020-01-11', 'daily')['C']['prices']
+
+    def test_columnar_prices(self):
+        rows = self.get_prices()
+        prices = self.get_prices(columnar_prices=True)
+        self.assertIsInstance(prices, PriceColumns)
+        self.assertEqual(len(prices), 10)
+        self.assertEqual(prices.to_rows(), rows)
+        self.assertEqual(list(prices['close']), [row['close'] for row in rows])
+        self.assertEqual(prices[2:4].formatted_dates, ['2020-01-03', '2020-01-04'])
+
+    def test_stdlib_arrays(self):
+        numpy = columns.np
+        columns.np = None
+        try:
+            prices = self.get_prices(columnar_prices=True)
+        finally:
+            columns.np = numpy
+        self.assertEqual(prices['volume'].typecode, 'd')
+        self.assertEqual(prices[0]['formatted_date'], '2020-01-01')
+        self.assertEqual(prices.to_rows(), self.get_prices())
+
+
+# Intraday History Test Class
+class TestIntradayHistory(TestCase):
+
+    @staticmethod
+    def get_api_data(urls):
+        def get_api_data(api_url):
+            urls.append(api_url)
+            params = dict(p.split('=') for p in api_url.split('?')[1].split('&'))
+            step = {'1m': 60, '5m': 300}[params['interval']]
+            # Both ends are included, so consecutive windows share their boundary bar
+            timestamps = list(range(int(params['period1']) // step * step, int(params['period2']) + 1, step))
+            prices = [float(t % 1000) for t in timestamps]
+            return {'chart': {'result': [{
+                'meta': {'currency': 'USD', 'gmtoffset': -18000, 'firstTradeDate': 0, 'instrumentType': 'EQUITY'},
+                'timestamp': timestamps,
+                'events': {'dividends': {str(timestamps[0]): {'date': timestamps[0], 'amount': 0.1}}},
+                'indicators': {'quote': [{'open': prices, 'high': prices, 'low': prices, 'close': prices,
+                                          'volume': [1] * len(prices)}]}
+            }], 'error': None}}
+        return get_api_data
+
+    @staticmethod
+    def get_dates(days_back):
+        today = datetime.datetime.utcnow().date()
+        return str(today - datetime.timedelta(days=days_back)), str(today - datetime.timedelta(days=1))
+
+    def test_chunked_intraday(self):
+        yahoo_financials = yf('C')
+        urls = []
+        yahoo_financials._get_api_data = self.get_api_data(urls)
+        start_date, end_date = self.get_dates(20)
+        data = yahoo_financials.get_historical_price_data(start_date, end_date, '1m')['C']
+        self.assertEqual(len(urls), 3)
+        self.assertTrue(all('&interval=1m&' in url for url in urls))
+        prices = data['prices']
+        self.assertIsInstance(prices, PriceColumns)
+        dates = list(prices['date'])
+        self.assertEqual(dates, sorted(set(dates)))
+        self.assertEqual(len(dates), 19 * 1440 + 1)
+        self.assertEqual(list(prices['adjclose']), list(prices['close']))
+        self.assertEqual(len(data['eventsData']['dividends']), 3)
+        yahoo_financials.get_historical_price_data(start_date, end_date, '1m')
+        self.assertEqual(len(urls), 3)
+        yahoo_financials.close()
+
+    def test_intraday_lookback(self):
+        yahoo_financials = yf('C', columnar_prices=False)
+        urls = []
+        yahoo_financials._get_api_data = self.get_api_data(urls)
+        start_date, end_date = self.get_dates(90)
+        prices = yahoo_financials.get_historical_price_data(start_date, end_date, '5m')['C']['prices']
+        self.assertIsInstance(prices, list)
+        self.assertEqual(len(urls), 1)
+        period1 = int(urls[0].split('&period1=')[1].split('&')[0])
+        self.assertGreater(period1, time.time() - 60 * 86400)
+        self.assertEqual(prices[0]['adjclose'], prices[0]['close'])
+        yahoo_financials.close()
+
+    def test_failed_chunk(self):
+        yahoo_financials = yf('C')
+        urls = []
+        get_api_data = self.get_api_data(urls)
+        start_date, end_date = self.get_dates(20)
+        hist_obj = yahoo_financials.get_history_obj(start_date, end_date, '1m')
+        chunks = yahoo_financials._get_chart_chunks(hist_obj)
+        failed = [yahoo_financials._build_api_url(chunks[1], 'C', '2')]
+        yahoo_financials._get_api_data = lambda api_url: None if api_url in failed else get_api_data(api_url)
+        with self.assertLogs(level='WARNING'):
+            data = yahoo_financials.get_historical_price_data(start_date, end_date, '1m')['C']
+        self.assertFalse(data.get('prices'))
+        self.assertEqual(len(urls), 2)
+        self.assertNotIn(yahoo_financials._build_api_url(hist_obj, 'C', '2'), yahoo_financials._cache)
+        failed.pop()
+        data = yahoo_financials.get_historical_price_data(start_date, end_date, '1m')['C']
+        self.assertEqual(len(data['prices']['date']), 19 * 1440 + 1)
+        yahoo_financials.close()
+
+
+# Date Formatting Test Class
+class TestDateFormatting(TestCase):
+
+    def test_epoch_dates(self):
+        timestamps = [-86401, -1, 0, 1577880000, 1577966399, 1577966400, 1702746000.5]
+        expected = [str((datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=t)).date()) for t in timestamps]
+        self.assertEqual([dates.format_epoch_date(t) for t in timestamps], expected)
+        self.assertEqual(dates.format_epoch_dates(timestamps), expected)
+        self.assertEqual(yf.format_date(1577880000), '2020-01-01')
+        if dates.np is not None:
+            self.assertEqual(dates.format_epoch_dates(dates.np.asarray(timestamps[:6], dtype='int64')), expected[:6])
+
+    def test_report_time(self):
+        yahoo_financials = yf('C')
+        local_time = datetime.datetime.fromtimestamp(1702746000).strftime('%Y-%m-%d %H:%M:%S')
+        self.assertEqual(dates.format_report_time(1702746000), yahoo_financials._convert_to_utc(local_time))
+        self.assertIs(dates.get_timezone('US/Eastern'), dates.get_timezone('US/Eastern'))
+        report = {'regularMarketTime': 1702746000, 'exDividendDate': {'fmt': '2023-12-01'}}
+        self.assertEqual(yahoo_financials._clean_reports(report)['regularMarketTime'],
+                         dates.format_report_time(1702746000))
+        self.assertEqual(yf('C', format_dates=False)._clean_reports(report)['regularMarketTime'], 1702746000)
+
+    def test_unformatted_history(self):
+        yahoo_financials = yf('C', format_dates=False)
+        yahoo_financials._get_api_data = lambda api_url, tries=0: TestPriceHistoryCache.fake_chart_data(api_url)
+        data = yahoo_financials.get_historical_price_data('2020-01-01', '2020-01-11', 'daily')['C']
+        self.assertEqual(data['firstTradeDate'], 0)
+        self.assertEqual(sorted(data['prices'][0]), ['adjclose', 'close', 'date', 'high', 'low', 'open', 'volume'])
+        self.assertIsInstance(data['prices'][0]['date'], int)
+        formatted = TestColumnarPrices().get_prices()
+        self.assertEqual(formatted[0]['formatted_date'], '2020-01-01')
+        self.assertEqual(formatted[9]['formatted_date'], '2020-01-10')
+
+
+# DataFrame and Arrow Export Test Class
+@skipIf(frames.pd is None or frames.pa is None, "pandas or pyarrow is not installed")
+class TestFrameExports(TestCase):
+
+    @staticmethod
+    def fetch_url(url, res_field=""):
+        return {'result': [
+            {'meta': {}, 'annualTotalRevenue': [
+                {'asOfDate': '2021-12-31', 'reportedValue': {'raw': 10.0}},
+                {'asOfDate': '2022-12-31', 'reportedValue': {'raw': 12.0}}]},
+            {'meta': {}, 'annualEBIT': [{'asOfDate': '2022-12-31', 'reportedValue': {'raw': 3.0}}]}
+        ], 'error': None}
+
+    def test_price_frames(self):
+        yahoo_financials = yf(['C', 'WFC'])
+        yahoo_financials._get_api_data = lambda api_url, tries=0: TestPriceHistoryCache.fake_chart_data(api_url)
+        df = yahoo_financials.to_pandas('history', '2020-01-01', '2020-01-11', 'daily')
+        self.assertEqual(df.index.names, ['symbol', 'date'])
+        self.assertEqual(df.shape, (20, 6))
+        self.assertEqual(df.loc[('WFC', '2020-01-03 14:30:00'), 'close'], 2.0)
+        table = yahoo_financials.to_arrow('history', '2020-01-01', '2020-01-11', 'daily')
+        self.assertEqual(table.column_names[:2], ['symbol', 'date'])
+        self.assertEqual(table.num_rows, 20)
+        single = yf('C')
+        single._get_api_data = yahoo_financials._get_api_data
+        self.assertEqual(single.to_pandas('history', '2020-01-01', '2020-01-11', 'daily').index.name, 'date')
+
+    def test_fundamental_frames(self):
+        yahoo_financials = yf(['C', 'WFC'])
+        yahoo_financials._fetch_url = self.fetch_url
+        df = yahoo_financials.to_pandas('financial_stmts', 'annual', 'income')
+        self.assertEqual(list(df.columns), ['ebit', 'totalRevenue'])
+        self.assertEqual(df.loc[('C', '2022-12-31'), 'totalRevenue'], 12.0)
+        self.assertTrue(df['ebit'].isna().sum() == 2)
+        table = yahoo_financials.to_arrow('financial_stmts', 'annual', 'income')
+        self.assertEqual(table.column('totalRevenue').to_pylist(), [10.0, 12.0, 10.0, 12.0])
+        self.assertRaises(ValueError, yahoo_financials.to_pandas, 'quotes')
+
+
+# Single Flight Test Class
+class TestSingleFlight(TestCase):
+
+    def test_coalesced_requests(self):
+        yahoo_financials = yf('C')
+        fetched = []
+
+        def fetch_url(url, res_field=""):
+            fetched.append(url)
+            time.sleep(0.2)
+            return {'result': [{'price': {'regularMarketPrice': {'raw': 50.5}}}]}
+
+        yahoo_financials._fetch_url = fetch_url
+        url = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price"
+        urls = [url, url.replace("query2.", "query1."), url, url]
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(lambda u: yahoo_financials._request_handler(u, 'quoteSummary'), urls))
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(yahoo_financials._single_flight.coalesced, 3)
+        self.assertIs(yahoo_financials._cache[urls[0]], yahoo_financials._cache[urls[1]])
+
+    def test_shared_errors(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.2)
+            raise ManagedException("HTTP 500")
+
+        with ThreadPoolExecutor(3) as executor:
+            futures = [executor.submit(flight.do, 'key', fail) for i in range(3)]
+        for future in futures:
+            self.assertIsInstance(future.exception(), ManagedException)
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+
+    def test_async_coalesced_requests(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {'result': []}
+
+        async def main():
+            return await asyncio.gather(*[flight.do('key', fetch) for i in range(5)])
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+
+# Memory Cache Test Class
+class TestMemoryCache(TestCase):
+
+    def test_lru_eviction(self):
+        memory_cache = MemoryCache(max_entries=2)
+        memory_cache['a'] = 1
+        memory_cache['b'] = 2
+        memory_cache.get('a')
+        memory_cache['c'] = 3
+        self.assertEqual(sorted(memory_cache.keys()), ['a', 'c'])
+        self.assertEqual(memory_cache.cache_info().evictions, 1)
+
+    def test_lfu_eviction(self):
+        memory_cache = MemoryCache(max_entries=2, policy='lfu')
+        memory_cache['a'] = 1
+        memory_cache['b'] = 2
+        memory_cache.get('a')
+        memory_cache.get('b')
+        memory_cache.get('b')
+        memory_cache['c'] = 3
+        self.assertEqual(sorted(memory_cache.keys()), ['b', 'c'])
+        self.assertRaises(ValueError, MemoryCache, policy='fifo')
+
+    def test_byte_limit(self):
+        memory_cache = MemoryCache(max_entries=None, max_bytes=100, sizeof=lambda v: len(v))
+        memory_cache['a'] = 'x' * 60
+        memory_cache['b'] = 'x' * 60
+        self.assertNotIn('a', memory_cache)
+        self.assertEqual(memory_cache.cache_info().bytes, 60)
+
+    def test_expiry(self):
+        memory_cache = MemoryCache()
+        memory_cache.set('a', 1, ttl=0.05)
+        memory_cache['https://query1.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price'] = 2
+        self.assertEqual(memory_cache['a'], 1)
+        time.sleep(0.1)
+        self.assertIsNone(memory_cache.get('a'))
+        self.assertEqual(len(memory_cache), 1)
+        info = memory_cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.expirations), (1, 1, 1))
+
+    def test_shared_cache(self):
+        memory_cache = MemoryCache()
+        first = yf('C', memory_cache=memory_cache)
+        second = yf('C', memory_cache=memory_cache)
+        first._fetch_url = lambda url, res_field="": {'result': [{'price': {'regularMarketPrice': {'raw': 50.5}}}]}
+        self.assertEqual(first.get_current_price(), 50.5)
+        self.assertEqual(second.get_current_price(), 50.5)
+        self.assertIsInstance(yf('C')._cache, MemoryCache)
+
+
+# Session Payload Cache Test Class
+class TestSessionPayloadCache(TestCase):
+
+    class FakeResponse(object):
+
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+        def raise_for_status(self):
+            if self.status_code != 200:
+                raise HTTPError(str(self.status_code))
+
+        content = b'{"quoteResponse": {"result": []}}'
+
+    def test_payload_cache(self):
+        manager = SessionManager()
+        state = manager._get_proxy_state(None)
+        session, strategy, statuses = state.session, state.cookie_strategy, [429, 429, 200]
+        manager._get_cookie_and_crumb = lambda proxy=None, timeout=30: (None, None, 'csrf')
+        state.session = fake_session = Mock()
+        fake_session.get.side_effect = lambda **kwargs: self.FakeResponse(statuses.pop(0))
+        manager.set_cache_size(8)
+        url = "https://query2.finance.yahoo.com/v7/finance/quote"
+        try:
+            # The failed attempt is not replayed, the retry goes to the network
+            self.assertRaises(HTTPError, manager.cache_get, url, params={'symbols': 'C'})
+            self.assertEqual(manager.cache_get(url, params={'symbols': 'C'}), {'quoteResponse': {'result': []}})
+            manager.cache_get(url.replace("query2.", "query1."), params={'symbols': 'C'}, timeout=5)
+            info = manager.cache_info()
+        finally:
+            state.session, state.cookie_strategy = session, strategy
+            del manager._get_cookie_and_crumb
+            manager.set_cache_size()
+        self.assertEqual(fake_session.get.call_count, 3)
+        self.assertEqual((info.hits, info.entries), (1, 1))
+        self.assertEqual(get_payload_key(url, {'symbols': 'C', 'crumb': 'x', 'lang': 'en'}),
+                         "https://query1.finance.yahoo.com/v7/finance/quote?lang=en&symbols=C")
+
+
+# Retry Policy Test Class
+class TestRetryPolicy(TestCase):
+
+    @staticmethod
+    def response(status_code, text='', headers=None):
+        return Mock(status_code=status_code, text=text, content=text.encode(), headers=headers or {})
+
+    def test_classify_and_backoff(self):
+        policy = RetryPolicy(max_attempts=4, backoff_base=1.0, backoff_max=3.0, jitter=False)
+        self.assertEqual([policy.classify(s) for s in (404, 429, 503, None, 401)],
+                         ['fail', 'retry', 'retry', 'retry', 'refresh_crumb'])
+        retry = policy.start()
+        self.assertEqual([retry.next_delay(503) for i in range(4)], [1.0, 2.0, 3.0, None])
+        self.assertEqual(policy.start().next_delay(429, parse_retry_after('2')), 2.0)
+        self.assertIsNone(policy.start().next_delay(404))
+        self.assertIsNone(policy.start(deadline=0.5).next_delay(503))
+        self.assertTrue(0 < parse_retry_after('Wed, 21 Oct 2099 07:28:00 GMT'))
+
+    def test_request_paths(self):
+        yahoo_financials = yf('C', retry_policy=RetryPolicy(backoff_base=0.01), circuit_breakers=CircuitBreakers())
+        url = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price"
+        with patch.object(UrlOpener, 'open', side_effect=[self.response(404)]) as url_open:
+            self.assertRaises(ManagedException, yahoo_financials._fetch_url, url, 'quoteSummary')
+        self.assertEqual(url_open.call_count, 1)
+        responses = [self.response(429, headers={'Retry-After': '0'}), self.response(200, '{"quoteSummary": 1}')]
+        with patch.object(UrlOpener, 'open', side_effect=responses) as url_open:
+            self.assertEqual(yahoo_financials._fetch_url(url, 'quoteSummary'), 1)
+        self.assertIn('query1.', url_open.call_args_list[1][0][0])
+        with patch.object(UrlOpener, 'open', side_effect=[self.response(503)] * 5):
+            self.assertIsNone(yahoo_financials._fetch_api_data(url))
+
+
+# Deadline Test Class
+class TestDeadline(TestCase):
+
+    @staticmethod
+    def slow_response(*args, **kwargs):
+        time.sleep(0.2)
+        return TestRetryPolicy.response(503)
+
+    def test_retry_state_is_clamped(self):
+        policy = RetryPolicy(deadline=60.0)
+        with deadline_scope(Deadline(0.5)):
+            self.assertLessEqual(policy.start().remaining(), 0.5)
+        self.assertGreater(policy.start().remaining(), 1.0)
+        with deadline_scope(Deadline(0)):
+            self.assertIsNone(policy.start().next_delay(503))
+
+    @staticmethod
+    def expired_response(*args, **kwargs):
+        # Blocks until the budget of the call is used up, whatever the speed of the machine
+        budget = get_current_deadline()
+        while not budget.expired():
+            time.sleep(0.01)
+        return TestRetryPolicy.response(503)
+
+    def test_partial_results(self):
+        yahoo_financials = yf(['C', 'WFC', 'JPM'], retry_policy=RetryPolicy(backoff_base=0.01),
+                              circuit_breakers=CircuitBreakers())
+        start = time.monotonic()
+        with patch.object(UrlOpener, 'open', side_effect=self.expired_response):
+            with yahoo_financials.deadline(0.2) as budget:
+                data = yahoo_financials.get_stock_data('keystats', tech_type='financialData')
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(data, {'C': None, 'WFC': None, 'JPM': None})
+        self.assertEqual(sorted(budget.errors), ['C', 'JPM', 'WFC'])
+        for ticker in ('C', 'WFC', 'JPM'):
+            self.assertIn('deadline exceeded', budget.errors[ticker])
+
+    def test_failed_statements(self):
+        def fetch_url(url, res_field=""):
+            raise ManagedException("HTTP 500")
+
+        # Every ticker fails, one by one, concurrently and alone
+        for tickers, concurrent in ((['C', 'WFC'], False), (['C', 'WFC'], True), ('C', False)):
+            yahoo_financials = yf(tickers, concurrent=concurrent)
+            yahoo_financials._fetch_url = fetch_url
+            with yahoo_financials.deadline(60) as budget:
+                data = yahoo_financials.get_financial_stmts('annual', 'income')
+            yahoo_financials.close()
+            failed = [tickers] if isinstance(tickers, str) else tickers
+            self.assertEqual(data, {'incomeStatementHistory': {tick: None for tick in failed}})
+            self.assertEqual(sorted(budget.errors), failed)
+
+    def test_concurrent_partial_results(self):
+        yahoo_financials = yf(['C', 'WFC'], concurrent=True, retry_policy=RetryPolicy(backoff_base=0.01),
+                              circuit_breakers=CircuitBreakers())
+        responses = {'c': '{"quoteSummary": {"result": [{"financialData": {"currentPrice": 1.0}}]}}'}
+
+        def fake_open(url, *args, **kwargs):
+            if '/c?' in url:
+                return TestRetryPolicy.response(200, responses['c'])
+            return self.slow_response()
+
+        with patch.object(UrlOpener, 'open', side_effect=fake_open):
+            data = yahoo_financials.get_stock_data('keystats', tech_type='financialData', deadline=0.5)
+        yahoo_financials.close()
+        self.assertEqual(data['C']['currentPrice'], 1.0)
+        self.assertIsNone(data['WFC'])
+
+
+# Circuit Breaker Test Class
+class TestCircuitBreaker(TestCase):
+
+    def test_breaker_states(self):
+        breaker = CircuitBreaker(failure_rate=0.5, window=4, min_requests=4, open_seconds=0.1)
+        for success in (True, False, True, False):
+            self.assertTrue(breaker.allow())
+            breaker.record(success)
+        self.assertEqual(breaker.get_state().state, 'open')
+        self.assertFalse(breaker.allow())
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.get_state().state, 'half_open')
+        breaker.record(True)
+        self.assertEqual(breaker.get_state(), ('closed', 0.0, 0, 0.0))
+
+    def test_request_paths(self):
+        breakers = CircuitBreakers(min_requests=2, open_seconds=60)
+        yahoo_financials = yf('C', retry_policy=RetryPolicy(max_attempts=2, backoff_base=0.01),
+                              circuit_breakers=breakers)
+        url = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price"
+        with patch.object(UrlOpener, 'open', return_value=TestRetryPolicy.response(503)) as url_open:
+            self.assertIsNone(yahoo_financials._fetch_api_data(url))
+            self.assertIsNone(yahoo_financials._fetch_api_data(url))
+            self.assertEqual(url_open.call_count, 4)
+            self.assertRaises(ManagedException, yahoo_financials._fetch_url, url, 'quoteSummary')
+            self.assertEqual(url_open.call_count, 4)
+        state = yahoo_financials.get_circuit_state('quoteSummary')
+        self.assertEqual(state[('query2.finance.yahoo.com', 'quoteSummary')].state, 'open')
+        self.assertGreater(yahoo_financials.get_circuit_retry_in('quoteSummary'), 50)
+        self.assertEqual(yahoo_financials.get_circuit_retry_in('chart'), 0.0)
+
+    def test_healthy_host(self):
+        breakers = CircuitBreakers(min_requests=1, open_seconds=60)
+        yahoo_financials = yf('C', circuit_breakers=breakers)
+        url = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price"
+        breakers.record(url, False)
+        with patch.object(UrlOpener, 'open', return_value=TestRetryPolicy.response(200, '{"quoteSummary": 1}')) as \
+                url_open:
+            self.assertEqual(yahoo_financials._fetch_url(url, 'quoteSummary'), 1)
+        self.assertIn('query1.', url_open.call_args[0][0])
+        self.assertEqual(breakers.get_retry_in('quoteSummary'), 0.0)
+
+    def test_open_circuits(self):
+        breakers = CircuitBreakers(min_requests=1, open_seconds=60)
+        yahoo_financials = yf('C', circuit_breakers=breakers)
+        for host in ('query1', 'query2'):
+            breakers.record("https://" + host + ".finance.yahoo.com/v8/finance/chart/C?interval=1d", False)
+            breakers.record("https://" + host + ".finance.yahoo.com/ws/fundamentals-timeseries/v1/finance/"
+                                                "timeseries/C?type=annualEBIT", False)
+        with patch.object(UrlOpener, 'open') as url_open:
+            with self.assertLogs(level='WARNING'):
+                data = yahoo_financials.get_historical_price_data('2020-01-01', '2020-01-11', 'daily')
+                raw_data = yahoo_financials._get_raw_data('history', yahoo_financials.get_history_obj(
+                    '2020-01-01', '2020-01-11', 'daily'))
+                raw_stmts = yahoo_financials._get_raw_data('income', {'interval': 'annual'})
+        self.assertEqual(url_open.call_count, 0)
+        self.assertFalse(data['C'].get('prices'))
+        self.assertEqual((raw_data, raw_stmts), ({'C': None}, {'C': None}))
+
+
+# Proxy Pool Test Class
+class TestProxyPool(TestCase):
+
+    def test_health_scores(self):
+        pool = ProxyPool(['http://a:1', 'http://b:1', 'http://c:1'], rate=1, capacity=1, quarantine_seconds=60,
+                         failure_threshold=2)
+        pool.record('http://a:1', 200, 0.1)
+        pool.record({'https': 'http://b:1'}, 429, 0.1)
+        pool.record('http://c:1', 503, 2.0)
+        stats = pool.get_stats()
+        self.assertGreater(stats['http://a:1'].score, stats['http://c:1'].score)
+        self.assertEqual(stats['http://b:1'].throttled, 1)
+        self.assertGreater(stats['http://b:1'].quarantined_for, 59)
+        self.assertNotIn('http://b:1', {pool.select() for i in range(50)})
+        pool.record('http://c:1', None)
+        self.assertEqual({pool.select() for i in range(20)}, {'http://a:1'})
+        self.assertEqual(pool.reserve('http://a:1'), 0.0)
+        self.assertGreater(pool.reserve('http://a:1'), 0.0)
+
+    def test_request_paths(self):
+        yahoo_financials = yf('C', proxies=['http://a:1', 'http://b:1'], circuit_breakers=CircuitBreakers(),
+                              retry_policy=RetryPolicy(backoff_base=0.01))
+        url = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/c?modules=price"
+
+        def fake_open(url, proxy=None, **kwargs):
+            if proxy['https'] == 'http://a:1':
+                return TestRetryPolicy.response(503)
+            return TestRetryPolicy.response(200, '{"quoteSummary": 1}')
+
+        with patch('random.choices', side_effect=lambda population, weights: [population[0]]):
+            with patch.object(UrlOpener, 'open', side_effect=fake_open):
+                for i in range(4):
+                    self.assertEqual(yahoo_financials._fetch_url(url, 'quoteSummary'), 1)
+        stats = yahoo_financials.get_proxy_stats()
+        self.assertEqual((stats['http://a:1'].failures, stats['http://b:1'].successes), (3, 4))
+        self.assertGreater(stats['http://a:1'].quarantined_for, 0)
+
+    def test_cookie_per_proxy(self):
+        # A manager outside of the singleton, so the shared states are left untouched
+        manager = type.__call__(SessionManager)
+        state = manager._get_proxy_state({'https': 'http://a:1'})
+        self.assertIs(manager._get_proxy_state('http://a:1'), state)
+        self.assertIsNot(manager._get_proxy_state(None), state)
+        self.assertIsNot(manager._get_proxy_session('http://a:1'), manager._get_proxy_session())
+        self.assertEqual(state.get_cache_key('basic'), 'basic@http://a:1')
+        self.assertEqual(manager._get_proxy_state(None).get_cache_key('basic'), 'basic')
+        state.crumb = 'proxy-crumb'
+        manager._set_cookie_strategy(state, 'csrf')
+        self.assertEqual((state.crumb, state.cookie_strategy), (None, 'csrf'))
+        self.assertEqual(manager._get_proxy_state(None).cookie_strategy, 'basic')
+
+
+# Shared Cookie Store Test Class
+class TestSharedCookieStore(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.location = cache._CookieDBManager.get_location()
+        cache._CookieDBManager.close_db()
+        cache._CookieDBManager.set_location(self.tmp_dir.name)
+        self.cookie_cache = cache._CookieCache()
+        self.patcher = patch.object(cache, 'get_cookie_cache', return_value=self.cookie_cache)
+        self.patcher.start()
+        self.crumbs = iter(['crumb-1', 'crumb-2'])
+        self.requested = []
+
+    def tearDown(self):
+        self.patcher.stop()
+        cache._CookieDBManager.close_db()
+        cache._CookieDBManager.set_location(self.location)
+        real_cache = cache._CookieCacheManager._Cookie_cache
+        if real_cache is not None and real_cache.db is not None:
+            cache.Cookie_db_proxy.initialize(real_cache.db)
+        self.tmp_dir.cleanup()
+
+    def fake_session(self):
+        def get(url, **kwargs):
+            self.requested.append(url)
+            if 'getcrumb' in url:
+                return Mock(text=next(self.crumbs))
+            return Mock(cookies=[create_cookie('A3', 'cookie')])
+        return Mock(get=Mock(side_effect=get), adapters={}, spec=['get', 'adapters', 'mount'])
+
+    # A manager outside of the singleton, like the one of another process
+    def new_manager(self):
+        return type.__call__(SessionManager, session=self.fake_session())
+
+    def test_crumb_store(self):
+        self.assertIsNone(self.cookie_cache.lookup_crumb('basic'))
+        self.cookie_cache.store_crumb('basic', 'abc')
+        self.assertEqual(self.cookie_cache.lookup_crumb('basic')['crumb'], 'abc')
+        self.cookie_cache.store_crumb('basic', None)
+        self.assertIsNone(self.cookie_cache.lookup_crumb('basic'))
+        with cache.cookie_refresh_lock('basic') as locked:
+            with cache.cookie_refresh_lock('basic') as other:
+                self.assertEqual((locked, other), (True, False))
+        with cache.cookie_refresh_lock('basic') as locked:
+            self.assertTrue(locked)
+
+    def test_shared_crumb(self):
+        cookie, crumb, strategy = self.new_manager()._get_cookie_and_crumb()
+        self.assertEqual((cookie.value, crumb, strategy), ('cookie', 'crumb-1', 'basic'))
+        # Another process reuses the stored cookie & crumb without any request
+        cookie, crumb, strategy = self.new_manager()._get_cookie_and_crumb()
+        self.assertEqual((cookie.value, crumb), ('cookie', 'crumb-1'))
+        self.assertEqual(len(self.requested), 2)
+
+    def test_shared_csrf_crumb(self):
+        consent = (b'<form><input name="csrfToken" value="token"/>'
+                   b'<input name="sessionId" value="session"/></form>')
+
+        def fake_session():
+            session = Mock(cookies=RequestsCookieJar(), adapters={}, spec=['get', 'post', 'cookies', 'adapters'])
+
+            def get(url, **kwargs):
+                self.requested.append(url)
+                if 'getcrumb' in url:
+                    return Mock(text=next(self.crumbs))
+                return Mock(content=consent)
+
+            def post(url, **kwargs):
+                self.requested.append(url)
+                session.cookies.set('GUC', 'consent')
+            session.get.side_effect, session.post.side_effect = get, post
+            return session
+
+        managers = [type.__call__(SessionManager, session=fake_session()) for i in range(2)]
+        for manager in managers:
+            manager._get_proxy_state(None).cookie_strategy = 'csrf'
+        self.assertEqual(managers[0]._get_cookie_and_crumb(), (None, 'crumb-1', 'csrf'))
+        self.assertEqual(len(self.requested), 4)
+        # Another process reuses the stored cookies & crumb without any request
+        self.assertEqual(managers[1]._get_cookie_and_crumb(), (None, 'crumb-1', 'csrf'))
+        self.assertEqual(managers[1]._get_proxy_session().cookies.get('GUC'), 'consent')
+        self.assertEqual(len(self.requested), 4)
+
+    def test_proactive_refresh(self):
+        manager = self.new_manager()
+        manager._get_cookie_and_crumb()
+        state = manager._get_proxy_state(None)
+        state.crumb_fetched -= sessions.crumb_refresh_age + 1
+        cache._CrumbSchema.update(fetch_time=state.crumb_fetched).execute()
+        with patch.object(sessions.requests, 'Session', side_effect=self.fake_session):
+            self.assertEqual(manager._get_cookie_and_crumb()[1], 'crumb-1')
+            for thread in threading.enumerate():
+                if thread.name == 'yahoofinancials-crumb-refresh':
+                    thread.join()
+        self.assertEqual(manager._get_cookie_and_crumb()[1], 'crumb-2')
+        self.assertEqual(len(self.requested), 4)
+        manager._reset_cookie_and_crumb(since=state.crumb_fetched - 1)
+        self.assertEqual(state.crumb, 'crumb-2')
+        manager._reset_cookie_and_crumb()
+        self.assertIsNone(self.cookie_cache.lookup_crumb('basic'))
+
+
+# Transport Test Class
+class TestTransport(TestCase):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    def test_connection_reuse(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = "http://127.0.0.1:%d/v7/finance/quote" % server.server_address[1]
+        manager = type.__call__(SessionManager)
+        try:
+            for i in range(3):
+                self.assertEqual(manager._get_proxy_session().get(url).json(), {'ok': True})
+            manager.set_pool_size(4, 32)
+            manager._get_proxy_session().get(url)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(manager.transport_stats(), (4, 2, 2, 1))
+        self.assertEqual(manager._get_proxy_session().get_adapter(url)._pool_maxsize, 32)
+
+    def test_pool_follows_concurrency(self):
+        yahoo_financials = yf(stocks, concurrent=True, max_workers=24)
+        yahoo_financials._get_urlopener()
+        self.assertGreaterEqual(SessionManager(session=None)._pool_maxsize, 24)
+        self.assertIs(yahoo_financials._get_urlopener(), yahoo_financials._get_urlopener())
+        self.assertIsNone(pickle.loads(pickle.dumps(yahoo_financials))._urlopener)
+        yahoo_financials.close()
+
+
+# JSON Decoder Test Class
+class TestJsonDecoder(TestCase):
+
+    content = b'{"chart": {"result": [{"timestamp": [1, 2]}], "error": null}, "other": [1, 2, 3]}'
+
+    def test_backends(self):
+        for backend in ['json', 'auto', loads]:
+            decoder = JsonDecoder(backend)
+            self.assertEqual(decoder.loads(self.content)['other'], [1, 2, 3])
+            self.assertEqual(decoder.loads_field(self.content, 'chart'),
+                             {'result': [{'timestamp': [1, 2]}], 'error': None})
+            self.assertIsNone(decoder.loads_field(self.content, 'quoteSummary'))
+            self.assertEqual(decoder.loads_field(self.content.decode(), 'other'), [1, 2, 3])
+            self.assertEqual(pickle.loads(pickle.dumps(decoder)).backend, decoder.backend)
+        self.assertEqual(JsonDecoder('auto').backend, 'orjson' if decoder_module.orjson else
+                         'ujson' if decoder_module.ujson else 'json')
+        self.assertRaises(ValueError, JsonDecoder, 'simplejson')
+
+    def test_field_only_parse(self):
+        # The stdlib backend stops after the leading response field, the rest is never parsed
+        self.assertEqual(JsonDecoder('json').loads_field(b'{"chart": {"a": 1}, "rest": [invalid', 'chart'), {'a': 1})
+
+    def test_request_paths(self):
+        yahoo_financials = yf('C', json_decoder='json', circuit_breakers=CircuitBreakers())
+        url = "https://query2.finance.yahoo.com/v8/finance/chart/C?interval=1d"
+        with patch.object(UrlOpener, 'open', return_value=TestRetryPolicy.response(200, self.content.decode())):
+            self.assertEqual(yahoo_financials._fetch_url(url, 'chart')['result'][0]['timestamp'], [1, 2])
+            self.assertEqual(yahoo_financials._fetch_api_data(url)['other'], [1, 2, 3])
+
+
+# Import Time Test Class
+class TestImportTime(TestCase):
+
+    deferred = ('pandas', 'pyarrow', 'numpy', 'aiohttp', 'bs4', 'peewee')
+
+    @staticmethod
+    def run_python(code):
+        return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+
+    def import_seconds(self, modules):
+        code = "import time; t = time.perf_counter(); import " + ", ".join(modules) + \
+               "; print(time.perf_counter() - t)"
+        return min(float(self.run_python(code)) for _ in range(3))
+
+    def test_lazy_import(self):
+        self.assertIsNone(lazy_import('yahoofinancials_missing_module', optional=True))
+        json_module = lazy_import('json')
+        self.assertIsInstance(json_module, LazyModule)
+        self.assertEqual(json_module.loads('[1]'), [1])
+
+    def test_import_defers_heavy_dependencies(self):
+        loaded = self.run_python("import sys, yahoofinancials; print(','.join(m for m in " + repr(self.deferred) +
+                                 " if m in sys.modules))").strip()
+        self.assertEqual(loaded, '')
+
+    def test_import_time(self):
+        installed = [m for m in self.deferred if importlib.util.find_spec(m) is not None]
+        if not installed:
+            self.skipTest("none of the deferred dependencies is installed")
+        lazy = self.import_seconds(['yahoofinancials'])
+        eager = self.import_seconds(['yahoofinancials'] + installed)
+        self.assertLess(lazy, eager)
+
+
+# Executor Test Class
+class TestExecutor(TestCase):
+
+    def test_long_lived_executor(self):
+        yahoo_financials = yf(stocks, concurrent=True)
+        executor = yahoo_financials._get_executor()
+        self.assertIs(executor, yahoo_financials._get_executor())
+        self.assertFalse(yahoo_financials._is_process_executor())
+        copy = pickle.loads(pickle.dumps(yahoo_financials))
+        self.assertIsNone(copy._executor)
+        yahoo_financials.close()
+        self.assertIsNone(yahoo_financials._executor)
+
+    def test_injected_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            with yf(stocks, concurrent=True, executor=executor) as yahoo_financials:
+                self.assertIs(yahoo_financials._get_executor(), executor)
+            self.assertEqual(executor.submit(len, stocks).result(), len(stocks))
+
+    def test_invalid_executor(self):
+        self.assertRaises(ValueError, yf, stocks, executor='fork')
+
+
+# Async Client Test Class
+@skipIf(aio.aiohttp is None, "aiohttp is not installed")
+class TestAsyncClient(TestCase):
+
+    def test_request_json(self):
+        from aiohttp import web
+
+        async def handler(request):
+            return web.json_response({'chart': {'crumb': request.query.get('crumb'), 'n': request.query.get('n')}})
+
+        async def run():
+            app = web.Application()
+            app.router.add_get('/v8/finance/chart/C', handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            url = "http://127.0.0.1:%d/v8/finance/chart/C?n=1" % port
+            try:
+                async with async_yf(['C', 'WFC'], max_concurrency=2) as client:
+                    client._get_client()
+                    client._crumbs[None] = ({}, 'abc', 'basic')
+                    data = await client._request_json(url, 'chart')
+                    cached = await client._request_json(url, 'chart')
+            finally:
+                await runner.cleanup()
+            return data, cached
+
+        data, cached = asyncio.run(run())
+        self.assertEqual(data, {'crumb': 'abc', 'n': '1'})
+        self.assertIs(data, cached)
+
+    def test_blocking_calls(self):
+        from aiohttp import web
+        threads = []
+
+        def record(result):
+            def call(*args):
+                threads.append(threading.get_ident())
+                return result
+            return call
+
+        async def handler(request):
+            return web.json_response({'chart': 1})
+
+        async def run():
+            app = web.Application()
+            app.router.add_get('/v8/finance/chart/C', handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            url = "http://127.0.0.1:%d/v8/finance/chart/C?n=1" % site._server.sockets[0].getsockname()[1]
+            try:
+                async with async_yf('C') as client:
+                    client._get_client()
+                    client._crumbs[None] = ({}, 'abc', 'basic')
+                    # The persistent response cache and the shared limiter query sqlite
+                    client._response_cache = Mock(lookup=Mock(side_effect=record(None)),
+                                                  store=Mock(side_effect=record(None)))
+                    client._rate_limiter = Mock(shared=True, reserve_url=Mock(side_effect=record(0.0)))
+                    data = await client._request_json(url, 'chart')
+            finally:
+                await runner.cleanup()
+            return data, threading.get_ident()
+
+        data, loop_thread = asyncio.run(run())
+        self.assertEqual(data, 1)
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_shared_getters(self):
+        for name in list(yf_module.FIELD_GETTERS) + list(yf_module.REPORT_GETTERS):
+            self.assertFalse(asyncio.iscoroutinefunction(getattr(yf, name)))
+            self.assertTrue(asyncio.iscoroutinefunction(getattr(async_yf, name)), name)
+            self.assertEqual(getattr(async_yf, name).__qualname__, 'AsyncYahooFinancials.' + name)
+        tech_data = {'C': {'regularMarketPrice': 1.5, 'currency': 'USD'}}
+
+        async def get_stock_tech_data(tech_type):
+            return tech_data
+
+        client = async_yf('C')
+        client.get_stock_tech_data = get_stock_tech_data
+        sync_client = yf('C')
+        sync_client.get_stock_tech_data = lambda tech_type: tech_data
+        self.assertEqual(asyncio.run(client.get_current_price()), sync_client.get_current_price())
+        self.assertEqual(asyncio.run(client.get_stock_price_data(reformat=False)), tech_data)
+
+    def test_crumb_lock(self):
+        async def run():
+            async with async_yf('C') as client:
+                client._get_client()
+                client._crumbs[None] = ({'A3': 'x'}, 'abc', 'basic')
+                # A negotiated crumb is returned while another negotiation holds the lock
+                async with client._crumb_lock:
+                    crumb = await asyncio.wait_for(client._get_cookie_and_crumb(), 1)
+                with patch.object(SessionManager, '_get_cookie_and_crumb',
+                                  return_value=(create_cookie('A3', 'y'), 'def', 'basic')) as negotiate:
+                    with patch.object(SessionManager, '_set_cookie_strategy'):
+                        refreshed = await asyncio.gather(client._get_cookie_and_crumb(refresh=True),
+                                                         client._get_cookie_and_crumb(refresh=True))
+            return crumb, refreshed, negotiate.call_count
+
+        crumb, refreshed, n_negotiations = asyncio.run(run())
+        self.assertEqual(crumb, ({'A3': 'x'}, 'abc'))
+        self.assertEqual(refreshed, [({'A3': 'y'}, 'def')] * 2)
+        self.assertEqual(n_negotiations, 1)
+
+
 if __name__ == "__main__":
     t_main()
@@ -1 +1,2 @@
 from yahoofinancials.yf import YahooFinancials
+from yahoofinancials.aio import AsyncYahooFinancials
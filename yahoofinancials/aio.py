@@ -0,0 +1,490 @@
+"""
+Asyncio counterpart of YahooFinancials.
+
+Every get_* method is a coroutine. All requests of an instance share one aiohttp connection pool and at most
+max_concurrency of them are in flight at once, so large ticker universes are fetched from a single event loop
+instead of a process pool.
+
+Usage Examples:
+import asyncio
+from yahoofinancials import AsyncYahooFinancials
+
+async def main():
+    async with AsyncYahooFinancials(['AAPL', 'WFC', 'F'], max_concurrency=32) as yahoo_financials:
+        return await yahoo_financials.get_financial_stmts('quarterly', 'balance')
+
+balance_sheet_data = asyncio.run(main())
+"""
+
+import asyncio
+import logging
+import time
+from urllib.parse import quote
+
+from requests.utils import dict_from_cookiejar
+
+from yahoofinancials.calcs import num_shares_outstanding, eps
+from yahoofinancials.data import YahooFinanceData, ManagedException, UrlOpener
+from yahoofinancials.maps import REQUEST_MAP
+from yahoofinancials.proxies import get_proxy_key
+from yahoofinancials.retry import RETRY, DeadlineExceeded, get_current_deadline, parse_retry_after
+from yahoofinancials.sessions import SessionManager
+from yahoofinancials.singleflight import AsyncSingleFlight, get_flight_key
+from yahoofinancials.utils import lazy_import
+from yahoofinancials.yf import add_getters
+
+aiohttp = lazy_import("aiohttp", optional=True)
+
+
+class AsyncYahooFinancials(YahooFinanceData):
+    """
+    Arguments
+    ----------
+    tickers: str or list
+        Ticker or listed collection of tickers
+    Keyword Arguments
+    -----------------
+    max_concurrency: int, default 32, optional
+        Maximum number of requests in flight at once.
+    client: aiohttp.ClientSession, default None, optional
+        Client session to send the requests with, e.g. to share one connection pool between several instances.
+        If None, the instance creates its own and closes it in close().
+    All other keyword arguments of YahooFinancials are supported, except concurrent which has no effect.
+    """
+
+    def __init__(self, ticker, **kwargs):
+        super(AsyncYahooFinancials, self).__init__(ticker, **kwargs)
+        self.concurrent = False
+        self.max_concurrency = kwargs.get("max_concurrency", 32)
+        self._client = kwargs.get("client")
+        self._owns_client = self._client is None
+        self._semaphore = None
+        self._crumb_lock = None
+        # Cookies, crumb and cookie strategy negotiated through each proxy, None for direct connections
+        self._crumbs = {}
+        self._async_flight = AsyncSingleFlight()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self._owns_client and self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    # Private method to lazily create the client session and concurrency primitives on the running loop
+    def _get_client(self):
+        if aiohttp is None:
+            raise ImportError("yahoofinancials: AsyncYahooFinancials requires aiohttp, "
+                              "install it with 'pip install yahoofinancials[async]'")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._crumb_lock = asyncio.Lock()
+        if self._client is None:
+            self._client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=UrlOpener.request_headers
+            )
+        return self._client
+
+    # Private static method to return the proxy url aiohttp expects
+    @staticmethod
+    def _get_proxy_url(proxy):
+        if proxy is None:
+            return None
+        proxy_url = proxy["https"]
+        if "://" not in proxy_url:
+            proxy_url = "http://" + proxy_url
+        return proxy_url
+
+    # Private method to negotiate the cookie and crumb of a proxy through the shared SessionManager, off the event loop.
+    # A negotiated crumb is returned without waiting for the lock, which only serializes negotiations.
+    async def _get_cookie_and_crumb(self, proxy=None, refresh=False):
+        key = get_proxy_key(proxy)
+        cookies, crumb, strategy = self._crumbs.get(key, (None, None, None))
+        if crumb is not None and not refresh:
+            return cookies, crumb
+        rejected = crumb
+        async with self._crumb_lock:
+            session_manager = SessionManager(session=self.session)
+            cookies, crumb, strategy = self._crumbs.get(key, (None, None, None))
+            if refresh and crumb is not None and crumb == rejected:
+                # Unless another request already negotiated a new crumb
+                session_manager._set_cookie_strategy(session_manager._get_proxy_state(proxy),
+                                                     'csrf' if strategy == 'basic' else 'basic')
+                crumb = None
+            if crumb is None:
+                loop = asyncio.get_running_loop()
+                cookie, crumb, strategy = await loop.run_in_executor(
+                    None, session_manager._get_cookie_and_crumb, proxy, self.timeout)
+                if strategy == 'basic' and cookie is not None:
+                    cookies = {cookie.name: cookie.value}
+                else:
+                    cookies = dict_from_cookiejar(session_manager._get_proxy_session(proxy).cookies)
+                self._crumbs[key] = (cookies, crumb, strategy)
+            return cookies, crumb
+
+    # Private static method to run a blocking call, such as a sqlite query, in the default executor off the event loop
+    @staticmethod
+    async def _run_blocking(func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    # Private method to fetch and parse a url, the async equivalent of _request_handler and _get_api_data
+    async def _request_json(self, url, res_field=None):
+        data = self._cache.get(url)
+        if not data and self._response_cache is not None:
+            data = await self._run_blocking(self._load_stored_response, url)
+        if data:
+            return data
+        return await self._async_flight.do(get_flight_key(url, res_field), lambda: self._fetch_json(url, res_field))
+
+    # Private method to fetch a url under the retry policy, identical requests in flight are coalesced by _request_json
+    async def _fetch_json(self, url, res_field=None):
+        client = self._get_client()
+        retry = self._retry_policy.start()
+        cur_url = url
+        refresh_crumb = False
+        while True:
+            proxy = self._get_proxy()
+            cookies, crumb = await self._get_cookie_and_crumb(proxy, refresh_crumb)
+            refresh_crumb = False
+            if self._rate_limiter.shared:
+                # The shared buckets live in sqlite
+                wait = await self._run_blocking(self._rate_limiter.reserve_url, cur_url)
+            else:
+                wait = self._rate_limiter.reserve_url(cur_url)
+            wait = max(wait, self._reserve_proxy(proxy))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            cur_url = self._get_open_url(cur_url)
+            req_url = cur_url if crumb is None else cur_url + "&crumb=" + quote(crumb)
+            status, retry_after = None, None
+            async with self._semaphore:
+                started = time.monotonic()
+                try:
+                    async with client.get(req_url, cookies=cookies, proxy=self._get_proxy_url(proxy)) as response:
+                        status = response.status
+                        if status == 200:
+                            data = self._json_decoder.loads_field(await response.read(), res_field)
+                            self._cache[url] = data
+                            if self._response_cache is not None:
+                                await self._run_blocking(self._store_response, url, data)
+                            self._record_outcome(cur_url, status)
+                            self._record_proxy(proxy, status, time.monotonic() - started)
+                            return data
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.debug("yahoofinancials: request to %s failed: %s", cur_url, str(e))
+            self._record_outcome(cur_url, status)
+            self._record_proxy(proxy, status, time.monotonic() - started)
+            if status == 401:
+                refresh_crumb = True
+            elif self._retry_policy.classify(status) == RETRY:
+                cur_url = self._get_alternate_host_url(cur_url)
+            if not await retry.async_wait(status, retry_after):
+                raise ManagedException("Server replied with server error code, HTTP " + str(status) +
+                                       " code while opening the url: " + str(cur_url))
+
+    # Private method to fetch the chart API data of a window, the async equivalent of _get_chart_range
+    async def _request_chart_range(self, hist_obj, up_ticker, v="2"):
+        url = self._build_api_url(hist_obj, up_ticker, v)
+        chunks = self._get_chart_chunks(hist_obj)
+
+        async def request(chunk_url):
+            try:
+                return await self._request_json(chunk_url)
+            except ManagedException:
+                return None
+
+        if len(chunks) < 2 and hist_obj['interval'] not in self._INTRADAY_LIMITS:
+            return await request(url)
+        data = self._cache.get(url)
+        if data:
+            return data
+        chunk_urls = [self._build_api_url(chunk, up_ticker, v) for chunk in chunks]
+        raw_responses = await asyncio.gather(*[request(chunk_url) for chunk_url in chunk_urls])
+        return self._cache_chart_range(url, up_ticker, chunk_urls, raw_responses)
+
+    # Private method to fetch chart API data, incomplete chart data is fetched again under the retry policy
+    async def _chart_api_request(self, hist_obj, up_ticker, clean=True):
+        api_url = self._build_api_url(hist_obj, up_ticker, "2")
+        retry = self._retry_policy.start()
+        re_data = None
+        while True:
+            raw_data = await self._request_chart_range(hist_obj, up_ticker)
+            if clean:
+                re_data = self._clean_chart_data(raw_data, self._use_columnar_prices(hist_obj['interval']))
+                cleaned_re_data = self._clean_historical_data(re_data)
+                if cleaned_re_data is not None:
+                    return cleaned_re_data
+            elif raw_data is not None:
+                return raw_data
+            # Failed requests were already retried, only an incomplete response is requested again
+            if raw_data is None or not await retry.async_wait():
+                break
+            self._cache.pop(api_url, None)
+        if clean:
+            return self._clean_historical_data(re_data, True)
+        return None
+
+    # Private method to build a data dictionary entry, the async equivalent of _create_dict_ent
+    async def _create_dict_ent(self, up_ticker, statement_type, tech_type, report_name, hist_obj):
+        if statement_type == 'history':
+            try:
+                cleaned_re_data = await self._chart_api_request(hist_obj, up_ticker)
+            except KeyError:
+                cleaned_re_data = None
+            return {up_ticker: cleaned_re_data}
+        elif statement_type == 'modules':
+            module_urls = self._get_module_urls(up_ticker, tech_type)
+            missing = {m: url for m, url in module_urls.items() if not self._cache.get(url)}
+            module_responses = None
+            if missing:
+                modules_url = self._get_modules_url(up_ticker, list(missing))
+                raw_data = await self._request_json(modules_url, REQUEST_MAP['quoteSummary'].get("response_field"))
+                self._cache.pop(modules_url, None)
+                module_responses = self._cache_module_data(missing, raw_data)
+            return {up_ticker: self._get_cached_module_data(module_urls, module_responses)}
+        elif statement_type == 'line_items':
+            item_urls = self._get_line_item_urls(up_ticker, tech_type, hist_obj)
+            missing = {t: url for t, url in item_urls.items() if not self._cache.get(url)}
+            item_responses = None
+            if missing:
+                items_url = self._get_line_items_url(up_ticker, list(missing), hist_obj)
+                raw_data = await self._request_json(items_url, REQUEST_MAP['fundamentals'].get("response_field"))
+                self._cache.pop(items_url, None)
+                item_responses = self._cache_line_item_data(missing, raw_data)
+            return {up_ticker: self._get_cached_line_item_data(item_urls, item_responses)}
+        url, r_map = self._get_request_url(up_ticker, statement_type, tech_type, hist_obj)
+        try:
+            raw_data = await self._request_json(url, r_map.get("response_field"))
+            re_data = self._format_response_data(raw_data, tech_type, statement_type)
+        except KeyError:
+            re_data = None
+        return self._get_dict_ent(up_ticker, tech_type, report_name, re_data)
+
+    # Private method to fan out a coroutine over the tickers, skipping the ones that fail or run out of time
+    async def _gather_tickers(self, coro_func, *args):
+        budget = get_current_deadline()
+
+        async def run(tick):
+            try:
+                if budget is None:
+                    return await coro_func(tick, *args)
+                return await asyncio.wait_for(coro_func(tick, *args), budget.remaining())
+            except asyncio.TimeoutError:
+                self._add_ticker_error(tick, DeadlineExceeded("deadline exceeded"))
+                return None
+            except (ManagedException, DeadlineExceeded) as e:
+                logging.info("yahoofinancials ticker: %s error - %s\n\tContinuing extraction...", str(tick), str(e))
+                self._add_ticker_error(tick, e)
+                return None
+
+        return await asyncio.gather(*[run(tick) for tick in self.ticker])
+
+    # Public Method to get stock data
+    async def get_stock_data(self, statement_type='income', tech_type='', report_name='', hist_obj={}, deadline=None):
+        if deadline is not None:
+            with self.deadline(deadline):
+                return await self.get_stock_data(statement_type, tech_type, report_name, hist_obj)
+        data = {}
+        if statement_type == 'income' and tech_type == '' and report_name == '':  # temp, so this method doesn't return nulls
+            statement_type = 'profile'
+            tech_type = 'assetProfile'
+            report_name = 'assetProfile'
+        if isinstance(self.ticker, str):
+            dict_ent = await self._create_dict_ent(self.ticker, statement_type, tech_type, report_name, hist_obj)
+            data.update(dict_ent)
+        else:
+            dict_ents = await self._gather_tickers(self._create_dict_ent, statement_type, tech_type, report_name,
+                                                   hist_obj)
+            for tick, dict_ent in zip(self.ticker, dict_ents):
+                # Failed tickers are mapped to None
+                data.update(dict_ent or self._get_dict_ent(tick, tech_type, report_name, None))
+        return data
+
+    # Public Method to get technical stock data
+    async def get_stock_tech_data(self, tech_type):
+        if tech_type == 'defaultKeyStatistics':
+            return await self.get_stock_data(statement_type='keystats', tech_type=tech_type)
+        else:
+            return await self.get_stock_data(tech_type=tech_type)
+
+    # Private method to fetch the sorted dividends of a ticker
+    async def _handle_api_dividend_request(self, cur_ticker, start, end, interval):
+        hist_obj = {"start": start, "end": end, "interval": interval}
+        return self._get_dividends(await self._chart_api_request(hist_obj, cur_ticker, False))
+
+    # Public method to get daily dividend data
+    async def get_stock_dividend_data(self, start, end, interval):
+        interval_code = self.get_time_code(interval)
+
+        async def get_dividends(tick):
+            try:
+                return await self._handle_api_dividend_request(tick, start, end, interval_code)
+            except:
+                return None
+
+        if isinstance(self.ticker, str):
+            return {self.ticker: await get_dividends(self.ticker)}
+        div_data_list = await asyncio.gather(*[get_dividends(tick) for tick in self.ticker])
+        return dict(zip(self.ticker, div_data_list))
+
+    # Private method that handles financial statement extraction
+    async def _run_financial_stmt(self, statement_type, report_num, frequency, reformat):
+        hist_obj = {"interval": frequency}
+        report_name = self.YAHOO_FINANCIAL_TYPES[statement_type][report_num]
+        raw_data = await self.get_stock_data(statement_type, report_name=report_name, hist_obj=hist_obj)
+        if reformat:
+            return self.get_reformatted_stmt_data(raw_data)
+        return raw_data
+
+    # Private method to fetch several statements of a ticker with merged timeseries requests, the async equivalent of
+    # _prefetch_statements_data
+    async def _prefetch_statements_data(self, up_ticker, statement_types, frequency):
+        request = self._get_statements_request(up_ticker, statement_types, frequency)
+        if request is None:
+            return
+        missing, urls = request
+        try:
+            raw_responses = await asyncio.gather(*[
+                self._request_json(url, REQUEST_MAP['fundamentals'].get("response_field")) for url in urls])
+        except (ManagedException, DeadlineExceeded, KeyError) as e:
+            # The statements are requested one by one instead
+            logging.info("yahoofinancials ticker: %s error getting merged statements - %s", str(up_ticker), str(e))
+            return
+        for url in urls:
+            self._cache.pop(url, None)
+        self._cache_statement_data(missing, raw_responses)
+
+    # Private method to fetch the statements of every ticker with merged requests, used when several are requested
+    async def _prefetch_statements(self, statement_types, frequency):
+        statement_types = [s for s in statement_types if s in ('income', 'balance', 'cash')]
+        tickers = [self.ticker] if isinstance(self.ticker, str) else self.ticker
+        await asyncio.gather(*[self._prefetch_statements_data(tick, statement_types, frequency) for tick in tickers])
+
+    # Public Method for the user to get financial statement data
+    async def get_financial_stmts(self, frequency, statement_type, reformat=True):
+        report_num = self.get_report_type(frequency)
+        if isinstance(statement_type, str):
+            return await self._run_financial_stmt(statement_type, report_num, frequency, reformat)
+        data = {}
+        await self._prefetch_statements(statement_type, frequency)
+        re_data_list = await asyncio.gather(*[self._run_financial_stmt(stmt_type, report_num, frequency, reformat)
+                                              for stmt_type in statement_type])
+        for re_data in re_data_list:
+            data.update(re_data)
+        return data
+
+    # Public method to get several quoteSummary modules with one request per ticker
+    async def get_modules_data(self, modules):
+        data = await self.get_stock_data(statement_type='modules', tech_type=self._check_modules(modules))
+        if not isinstance(self.ticker, str):
+            for tick in self.ticker:
+                data.setdefault(tick, None)
+        return data
+
+    # Public Method for the user to get several quoteSummary modules with one request per ticker
+    async def get_modules(self, modules, reformat=True):
+        raw_data = await self.get_modules_data(modules)
+        return self._clean_modules_data(raw_data) if reformat else raw_data
+
+    # Public method to get statement line items by period with one small timeseries request per ticker
+    async def get_line_items_data(self, fields, frequency='annual', latest=False):
+        hist_obj = {'interval': frequency, 'latest': latest}
+        data = await self.get_stock_data(statement_type='line_items',
+                                         tech_type=self._check_line_items(fields, frequency), hist_obj=hist_obj)
+        if not isinstance(self.ticker, str):
+            for tick in self.ticker:
+                data.setdefault(tick, None)
+        return data
+
+    # Public Method for the user to get statement line items with one small timeseries request per ticker
+    async def get_line_items(self, fields, frequency='annual', latest=False):
+        raw_data = await self.get_line_items_data(fields, frequency, latest)
+        return self._get_latest_line_items(raw_data) if latest else raw_data
+
+    # Public Method for the user to get the yahoo summary url
+    async def get_stock_summary_url(self):
+        if isinstance(self.ticker, str):
+            return self._BASE_YAHOO_URL + self.ticker
+        return {t: self._BASE_YAHOO_URL + t for t in self.ticker}
+
+    async def _get_analytic_data(self, tech_type):
+        return await self.get_stock_data(statement_type='analytic', tech_type=tech_type)
+
+    # Public Method for user to get historical price data with
+    async def get_historical_price_data(self, start_date, end_date, time_interval):
+        hist_obj = self.get_history_obj(start_date, end_date, time_interval)
+        return await self.get_stock_data('history', hist_obj=hist_obj)
+
+    # Public method to get price or summaryDetail data of all tickers from the multi symbol quote endpoint
+    async def get_quote_data(self, report='price'):
+        responses = await asyncio.gather(*[self._request_json(url, REQUEST_MAP['quote'].get("response_field"))
+                                           for url in self._get_quote_urls()])
+        return self.get_clean_data(self._get_quote_report(responses, report), report)
+
+    # Private Method for Functions needing stock_price_data
+    async def _stock_price_data(self, data_field):
+        if self._use_quote_data('price', data_field):
+            return self._get_report_field(await self.get_quote_data('price'), data_field)
+        return self._get_report_field(await self.get_stock_price_data(), data_field)
+
+    # Private Method for Functions needing stock_summary_data
+    async def _stock_summary_data(self, data_field):
+        if self._use_quote_data('summaryDetail', data_field):
+            return self._get_report_field(await self.get_quote_data('summaryDetail'), data_field)
+        return self._get_report_field(await self.get_summary_data(), data_field)
+
+    # Private Method for Functions needing financial statement data
+    async def _financial_statement_data(self, stmt_type, stmt_code, field_name, freq):
+        if field_name in self._get_line_item_types(freq):
+            return self._get_report_field(self._get_first_line_items(await self.get_line_items([field_name], freq)),
+                                          field_name)
+        return self._get_stmt_field((await self.get_financial_stmts(freq, stmt_type))[stmt_code], field_name)
+
+    # Public method to get daily dividend data
+    async def get_daily_dividend_data(self, start_date, end_date):
+        start = self.format_date(start_date)
+        end = self.format_date(end_date)
+        return await self.get_stock_dividend_data(start, end, 'daily')
+
+    # Calculated Financial Methods
+    async def get_earnings_per_share(self):
+        price_data, pe_ratio = await asyncio.gather(self.get_current_price(), self.get_pe_ratio())
+        return self._calc_ticker_values(eps, price_data, pe_ratio)
+
+    async def get_num_shares_outstanding(self, price_type='current'):
+        today_low, today_high, cur_market_cap, current = await asyncio.gather(
+            self._stock_summary_data('dayHigh'),
+            self._stock_summary_data('dayLow'),
+            self._stock_summary_data('marketCap'),
+            self.get_current_price()
+        )
+
+        def calc_num_shares(market_cap, low, high, current_price):
+            return num_shares_outstanding(market_cap, low, high, price_type, current_price)
+
+        return self._calc_ticker_values(calc_num_shares, cur_market_cap, today_low, today_high, current)
+
+
+# Private function to build a coroutine getter of FIELD_GETTERS
+def _make_field_getter(method, args):
+    async def getter(self):
+        return await getattr(self, method)(*args)
+    return getter
+
+
+# Private function to build a coroutine getter of REPORT_GETTERS
+def _make_report_getter(method, args, report_type):
+    async def getter(self, reformat=True):
+        raw_data = await getattr(self, method)(*args)
+        return self.get_clean_data(raw_data, report_type) if reformat else raw_data
+    return getter
+
+
+add_getters(AsyncYahooFinancials, _make_field_getter, _make_report_getter)
@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import deque, namedtuple
+from urllib.parse import urlsplit
+
+from yahoofinancials.utils import get_request_endpoint
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CircuitState = namedtuple("CircuitState", ["state", "failure_rate", "requests", "retry_in"])
+
+
+# Private function to swap the query1 and query2 Yahoo Finance hosts
+def _get_alternate_host(host):
+    if host.startswith("query2."):
+        return host.replace("query2.", "query1.", 1)
+    elif host.startswith("query1."):
+        return host.replace("query1.", "query2.", 1)
+    return host
+
+
+class CircuitBreaker(object):
+    """
+    Thread-safe circuit breaker of one host and endpoint family.
+
+    The outcomes of the last window requests are kept. Once at least min_requests were made and the share of failures
+    reaches failure_rate, the circuit opens and rejects requests for open_seconds. It then half-opens and lets
+    half_open_probes requests through: a success closes it again, a failure opens it for another open_seconds.
+    """
+
+    def __init__(self, failure_rate=0.5, window=20, min_requests=5, open_seconds=30.0, half_open_probes=1):
+        if not 0 < failure_rate <= 1 or window < 1 or min_requests < 1 or half_open_probes < 1:
+            raise ValueError("yahoofinancials: invalid circuit breaker settings")
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened = None
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # Private method to move an open circuit to half-open once its open time has passed, called under the lock.
+    # Probes that never reported back, e.g. cancelled requests, are given up after another open_seconds.
+    def _update_state(self, now):
+        if self._state != CLOSED and now - self._opened >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._opened = now
+            self._probes = 0
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened = now
+        self._outcomes.clear()
+
+    def allow(self):
+        """Returns True if a request may be sent, a half-open circuit counts it as one of its probes"""
+        with self._lock:
+            self._update_state(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            now = time.monotonic()
+            self._update_state(now)
+            if self._state == HALF_OPEN:
+                if success:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._outcomes.append(success)
+            if len(self._outcomes) >= self.min_requests and self._get_failure_rate() >= self.failure_rate:
+                self._open(now)
+
+    def _get_failure_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / float(len(self._outcomes))
+
+    def get_state(self):
+        with self._lock:
+            now = time.monotonic()
+            self._update_state(now)
+            retry_in = self.open_seconds - (now - self._opened) if self._state == OPEN else 0.0
+            return CircuitState(self._state, self._get_failure_rate(), len(self._outcomes), max(retry_in, 0.0))
+
+
+class CircuitBreakers(object):
+    """
+    Circuit breakers of every Yahoo Finance host and endpoint family, used by every request path.
+
+    Requests answered with a retryable status (see yahoofinancials.retry.RETRY_STATUSES) or failing to connect count
+    as failures of their host and endpoint family, e.g. ('query2.finance.yahoo.com', 'quoteSummary'). While the
+    circuit of a host is open its requests go to the other query host, and fail at once if both circuits are open.
+
+    Arguments
+    ----------
+    failure_rate: float, default 0.5, optional
+        Share of failed requests in the window that opens a circuit.
+    window: int, default 20, optional
+        Number of recent requests a circuit keeps the outcome of.
+    min_requests: int, default 5, optional
+        Number of requests in the window before a circuit may open.
+    open_seconds: float, default 30.0, optional
+        Seconds an open circuit rejects requests before it half-opens to probe recovery.
+    half_open_probes: int, default 1, optional
+        Number of probe requests a half-open circuit lets through.
+    """
+
+    def __init__(self, failure_rate=0.5, window=20, min_requests=5, open_seconds=30.0, half_open_probes=1):
+        self.settings = dict(failure_rate=failure_rate, window=window, min_requests=min_requests,
+                             open_seconds=open_seconds, half_open_probes=half_open_probes)
+        CircuitBreaker(**self.settings)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(url):
+        return urlsplit(url).netloc, get_request_endpoint(url)
+
+    def get_breaker(self, url):
+        key = self.get_key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = self._breakers[key] = CircuitBreaker(**self.settings)
+        return breaker
+
+    def allow(self, url):
+        return self.get_breaker(url).allow()
+
+    def record(self, url, success):
+        self.get_breaker(url).record(success)
+
+    def get_state(self, endpoint=None):
+        """Returns the CircuitState of each (host, endpoint family) requested so far, optionally of one family"""
+        return {k: b.get_state() for k, b in list(self._breakers.items()) if endpoint is None or k[1] == endpoint}
+
+    def get_retry_in(self, endpoint):
+        """
+        Returns the seconds until a request of the endpoint family can be sent again, 0.0 if one host accepts
+        requests. Batch schedulers can pause for this long instead of spending their rate budget.
+        """
+        states = self.get_state(endpoint)
+        retry_in = []
+        for (host, family), state in states.items():
+            if state.state != OPEN:
+                return 0.0
+            # A query host whose counterpart was not requested yet still has a host to send requests to
+            alternate = _get_alternate_host(host)
+            if alternate != host and (alternate, family) not in states:
+                return 0.0
+            retry_in.append(state.retry_in)
+        return min(retry_in) if retry_in else 0.0
+
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+_default_breakers = None
+_default_breakers_lock = threading.Lock()
+
+
+def get_circuit_breakers():
+    """Returns the process wide circuit breakers shared by the instances that do not set circuit_breakers"""
+    global _default_breakers
+    if _default_breakers is None:
+        with _default_breakers_lock:
+            if _default_breakers is None:
+                _default_breakers = CircuitBreakers()
+    return _default_breakers
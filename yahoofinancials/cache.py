@@ -1,6 +1,9 @@
 import logging
 import time
 import random
+import hashlib as _hashlib
+import json as _json
+import zlib as _zlib
 import peewee as _peewee
 from threading import Lock
 import os as _os
@@ -8,6 +11,9 @@ import appdirs as _ad
 import atexit as _atexit
 import datetime as _datetime
 import pickle as _pkl
+from yahoofinancials.utils import DEFAULT_RESPONSE_TTLS, get_request_categories, get_response_key, \
+    get_response_ttl, next_market_close
+from contextlib import contextmanager as _contextmanager
 
 _cache_init_lock = Lock()
 
@@ -211,6 +217,8 @@ def set_tz_cache_location(cache_dir: str):
     :return: None
     """
     _TzDBManager.set_location(cache_dir)
+    for manager in _SharedDBManager.__subclasses__():
+        manager.set_location(cache_dir)
 
 
 # --------------
@@ -230,6 +238,12 @@ class _CookieCacheDummy:
     def store(self, tkr, Cookie):
         pass
 
+    def lookup_crumb(self, strategy):
+        return None
+
+    def store_crumb(self, strategy, crumb):
+        pass
+
     @property
     def Cookie_db(self):
         return None
@@ -319,6 +333,17 @@ class _CookieSchema(_peewee.Model):
         without_rowid = True
 
 
+class _CrumbSchema(_peewee.Model):
+    # Same key as the cookie the crumb was negotiated with
+    strategy = _peewee.CharField(primary_key=True)
+    fetch_time = _peewee.FloatField()
+    crumb = _peewee.CharField()
+
+    class Meta:
+        database = Cookie_db_proxy
+        without_rowid = True
+
+
 class _CookieCache:
     def __init__(self):
         self.initialised = -1
@@ -352,7 +377,7 @@ class _CookieCache:
             try:
                 db.connect()
                 Cookie_db_proxy.initialize(db)
-                db.create_tables([_CookieSchema])
+                db.create_tables([_CookieSchema, _CrumbSchema])
                 self.initialised = 1  # success
                 return
             except _peewee.OperationalError:
@@ -403,5 +428,578 @@ class _CookieCache:
             #         q.execute()
 
 
+    def lookup_crumb(self, strategy):
+        """Returns the stored crumb of a cookie and its fetch time in seconds since the epoch, or None"""
+        if self.dummy:
+            return None
+        if self.initialised == -1:
+            self.initialise()
+        if self.initialised == 0:  # failure
+            return None
+        try:
+            data = _CrumbSchema.get(_CrumbSchema.strategy == strategy)
+            return {'crumb': data.crumb, 'fetch_time': data.fetch_time}
+        except _CrumbSchema.DoesNotExist:
+            return None
+        except _peewee.OperationalError as err:
+            logging.debug(f"yahoofinancials: crumb cache unavailable: {err}")
+            return None
+
+    def store_crumb(self, strategy, crumb):
+        """Stores the crumb negotiated with the cookie of strategy, None drops it"""
+        if self.dummy:
+            return
+        if self.initialised == -1:
+            self.initialise()
+        if self.initialised == 0:  # failure
+            return
+        try:
+            if crumb is None:
+                _CrumbSchema.delete().where(_CrumbSchema.strategy == strategy).execute()
+            else:
+                _CrumbSchema.replace(strategy=strategy, fetch_time=time.time(), crumb=crumb).execute()
+        except _peewee.OperationalError as err:
+            logging.debug(f"yahoofinancials: crumb cache unavailable: {err}")
+
+
 def get_cookie_cache():
     return _CookieCacheManager.get_cookie_cache()
+
+
+@_contextmanager
+def cookie_refresh_lock(name, stale_after=120):
+    """
+    Lock file in the cookie cache folder held by the one process refreshing the cookie & crumb of name.
+    Yields True in the process holding it and False in the others, a lock older than stale_after seconds is taken over.
+    """
+    path = _os.path.join(_CookieDBManager.get_location(), "refresh-" + _hashlib.sha1(name.encode()).hexdigest()[:16] +
+                         ".lock")
+    fd = None
+    for attempt in range(2):
+        try:
+            fd = _os.open(path, _os.O_CREAT | _os.O_EXCL | _os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if attempt == 0 and time.time() - _os.path.getmtime(path) > stale_after:
+                    _os.remove(path)
+                    continue
+            except OSError:
+                pass
+            break
+        except OSError as err:
+            logging.debug(f"yahoofinancials: cookie refresh lock unavailable: {err}")
+            break
+    if fd is None:
+        yield False
+        return
+    try:
+        _os.write(fd, str(_os.getpid()).encode())
+        yield True
+    finally:
+        _os.close(fd)
+        try:
+            _os.remove(path)
+        except OSError:
+            pass
+
+
+# --------------
+# Shared DB manager
+# --------------
+
+class _SharedDBException(Exception):
+    pass
+
+
+class _SharedDBManager:
+    """Base manager for the sqlite databases kept in the "py-yfinance" cache folder"""
+    _db = None
+    _db_file = None
+    _cache_dir = _os.path.join(_ad.user_cache_dir(), "py-yfinance")
+
+    @classmethod
+    def get_database(cls):
+        if cls._db is None:
+            cls._initialise()
+        return cls._db
+
+    @classmethod
+    def close_db(cls):
+        if cls._db is not None:
+            try:
+                cls._db.close()
+            except Exception:
+                # Must discard exceptions because Python trying to quit.
+                pass
+
+    @classmethod
+    def _initialise(cls, cache_dir=None):
+        if cache_dir is not None:
+            cls._cache_dir = cache_dir
+
+        if not _os.path.isdir(cls._cache_dir):
+            try:
+                _os.makedirs(cls._cache_dir)
+            except OSError as err:
+                raise _SharedDBException(
+                    f"yahoofinancials: Error creating cache folder: '{cls._cache_dir}' reason: {err}")
+        elif not (_os.access(cls._cache_dir, _os.R_OK) and _os.access(cls._cache_dir, _os.W_OK)):
+            raise _SharedDBException(f"yahoofinancials: Cannot read and write in cache folder: '{cls._cache_dir}'")
+
+        cls._db = _peewee.SqliteDatabase(
+            _os.path.join(cls._cache_dir, cls._db_file),
+            pragmas={'journal_mode': 'wal', 'cache_size': -64, 'busy_timeout': 30000}
+        )
+
+    @classmethod
+    def set_location(cls, new_cache_dir):
+        if cls._db is not None:
+            cls._db.close()
+            cls._db = None
+        cls._cache_dir = new_cache_dir
+
+    @classmethod
+    def get_location(cls):
+        return cls._cache_dir
+
+
+class _SharedDBCache:
+    """Base for caches stored through a _SharedDBManager, falls back to a no-op if the DB is unusable"""
+    _manager = None
+    _proxy = None
+    _models = []
+
+    def __init__(self):
+        self.initialised = -1
+        self.db = None
+        self.dummy = False
+        self._init_lock = Lock()
+
+    def get_db(self):
+        if self.db is not None:
+            return self.db
+        try:
+            self.db = self._manager.get_database()
+        except _SharedDBException as err:
+            logging.info(f"yahoofinancials: Failed to create {self.__class__.__name__}, reason: {err}. "
+                         "It will not be used. "
+                         "Tip: You can direct cache to use a different location with 'set_tz_cache_location("
+                         "mylocation)'")
+            self.dummy = True
+            return None
+        return self.db
+
+    def initialise(self):
+        with self._init_lock:
+            if self.initialised != -1:
+                return
+            db = self.get_db()
+            if db is None:
+                self.initialised = 0  # failure
+                return
+            try:
+                db.connect(reuse_if_open=True)
+                self._proxy.initialize(db)
+                db.create_tables(self._models)
+                self.initialised = 1  # success
+            except _peewee.OperationalError as err:
+                logging.info(f"yahoofinancials: Failed to initialise {self.__class__.__name__}, reason: {err}")
+                self.initialised = 0  # failure
+
+    def ready(self):
+        if self.dummy:
+            return False
+        if self.initialised == -1:
+            self.initialise()
+        return self.initialised == 1
+
+
+# --------------
+# Rate limit state
+# --------------
+
+class _RateLimitDBManager(_SharedDBManager):
+    _db = None
+    _db_file = 'rate-limit.db'
+
+
+# close DB when Python exists
+_atexit.register(_RateLimitDBManager.close_db)
+
+rate_limit_db_proxy = _peewee.Proxy()
+
+
+class _RateLimitSchema(_peewee.Model):
+    bucket = _peewee.CharField(primary_key=True)
+    tokens = _peewee.FloatField()
+    updated = _peewee.FloatField()
+
+    class Meta:
+        database = rate_limit_db_proxy
+        without_rowid = True
+
+
+class _RateLimitStore(_SharedDBCache):
+    """Token bucket state shared by every process using the same cache folder"""
+    _manager = _RateLimitDBManager
+    _proxy = rate_limit_db_proxy
+    _models = [_RateLimitSchema]
+
+    def reserve(self, bucket, rate, capacity):
+        """
+        Takes one token from the named bucket and returns the number of seconds the caller must wait
+        before sending its request, or None if the shared store is unavailable.
+        """
+        if not self.ready():
+            return None
+        try:
+            with self.db.atomic(lock_type='IMMEDIATE'):
+                now = time.time()
+                row = _RateLimitSchema.get_or_none(_RateLimitSchema.bucket == bucket)
+                if row is None:
+                    tokens = capacity
+                else:
+                    tokens = min(capacity, row.tokens + max(0.0, now - row.updated) * rate)
+                tokens -= 1
+                _RateLimitSchema.replace(bucket=bucket, tokens=tokens, updated=now).execute()
+        except _peewee.OperationalError as err:
+            logging.debug(f"yahoofinancials: shared rate limit store unavailable: {err}")
+            return None
+        if tokens >= 0:
+            return 0.0
+        return -tokens / rate
+
+
+class _RateLimitStoreManager:
+    _store = None
+
+    @classmethod
+    def get_store(cls):
+        if cls._store is None:
+            with _cache_init_lock:
+                if cls._store is None:
+                    cls._store = _RateLimitStore()
+        return cls._store
+
+
+def get_rate_limit_store():
+    return _RateLimitStoreManager.get_store()
+
+
+# --------------
+# Response cache
+# --------------
+
+class _ResponseDBManager(_SharedDBManager):
+    _db = None
+    _db_file = 'responses.db'
+
+
+# close DB when Python exists
+_atexit.register(_ResponseDBManager.close_db)
+
+response_db_proxy = _peewee.Proxy()
+
+
+class _ResponseSchema(_peewee.Model):
+    key = _peewee.CharField(primary_key=True)
+    category = _peewee.CharField()
+    expires = _peewee.FloatField(index=True)
+    payload = _peewee.BlobField()
+
+    class Meta:
+        database = response_db_proxy
+        without_rowid = True
+
+
+class _ResponseCache(_SharedDBCache):
+    """Parsed responses stored on disk so that restarts and short lived jobs start warm"""
+    _manager = _ResponseDBManager
+    _proxy = response_db_proxy
+    _models = [_ResponseSchema]
+
+    def lookup(self, url):
+        if not self.ready():
+            return None
+        try:
+            row = _ResponseSchema.get_or_none(_ResponseSchema.key == get_response_key(url))
+        except _peewee.OperationalError:
+            return None
+        if row is None or row.expires < time.time():
+            return None
+        return _json.loads(_zlib.decompress(row.payload))
+
+    def store(self, url, payload, ttl):
+        if ttl <= 0 or not self.ready():
+            return
+        try:
+            with self.db.atomic():
+                _ResponseSchema.replace(
+                    key=get_response_key(url),
+                    category=get_request_categories(url)[0],
+                    expires=time.time() + ttl,
+                    payload=_zlib.compress(_json.dumps(payload).encode("utf-8"))
+                ).execute()
+        except _peewee.OperationalError as err:
+            logging.debug(f"yahoofinancials: failed to store response: {err}")
+
+    def purge(self, expired_only=True):
+        if not self.ready():
+            return
+        q = _ResponseSchema.delete()
+        if expired_only:
+            q = q.where(_ResponseSchema.expires < time.time())
+        q.execute()
+
+
+class _ResponseCacheManager:
+    _response_cache = None
+
+    @classmethod
+    def get_response_cache(cls):
+        if cls._response_cache is None:
+            with _cache_init_lock:
+                if cls._response_cache is None:
+                    cls._response_cache = _ResponseCache()
+        return cls._response_cache
+
+
+def get_response_cache():
+    return _ResponseCacheManager.get_response_cache()
+
+
+def clear_response_cache(expired_only=False):
+    """
+    Deletes the responses stored in the persistent response cache.
+    :param expired_only: Only delete the responses whose time to live has passed
+    :return: None
+    """
+    get_response_cache().purge(expired_only)
+
+
+# --------------
+# Price history cache
+# --------------
+
+class _PriceHistoryDBManager(_SharedDBManager):
+    _db = None
+    _db_file = 'price-history.db'
+
+
+# close DB when Python exists
+_atexit.register(_PriceHistoryDBManager.close_db)
+
+price_history_db_proxy = _peewee.Proxy()
+
+_BAR_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'adjclose')
+
+
+class _BarSchema(_peewee.Model):
+    symbol = _peewee.CharField()
+    interval = _peewee.CharField()
+    timestamp = _peewee.IntegerField()
+    open = _peewee.FloatField(null=True)
+    high = _peewee.FloatField(null=True)
+    low = _peewee.FloatField(null=True)
+    close = _peewee.FloatField(null=True)
+    volume = _peewee.IntegerField(null=True)
+    adjclose = _peewee.FloatField(null=True)
+
+    class Meta:
+        database = price_history_db_proxy
+        primary_key = _peewee.CompositeKey('symbol', 'interval', 'timestamp')
+        without_rowid = True
+
+
+class _BarEventSchema(_peewee.Model):
+    symbol = _peewee.CharField()
+    interval = _peewee.CharField()
+    event_type = _peewee.CharField()
+    timestamp = _peewee.IntegerField()
+    data = _peewee.TextField()
+
+    class Meta:
+        database = price_history_db_proxy
+        primary_key = _peewee.CompositeKey('symbol', 'interval', 'event_type', 'timestamp')
+        without_rowid = True
+
+
+class _BarRangeSchema(_peewee.Model):
+    symbol = _peewee.CharField()
+    interval = _peewee.CharField()
+    start = _peewee.IntegerField()
+    end = _peewee.IntegerField()
+    meta = _peewee.TextField(null=True)
+
+    class Meta:
+        database = price_history_db_proxy
+        primary_key = _peewee.CompositeKey('symbol', 'interval', 'start')
+        without_rowid = True
+
+
+def _subtract_ranges(start, end, held_ranges):
+    gaps = []
+    cur = start
+    for held_start, held_end in held_ranges:
+        if held_end <= cur:
+            continue
+        if held_start >= end:
+            break
+        if held_start > cur:
+            gaps.append((cur, held_start))
+        cur = max(cur, held_end)
+        if cur >= end:
+            break
+    if cur < end:
+        gaps.append((cur, end))
+    return gaps
+
+
+class _PriceHistoryCache(_SharedDBCache):
+    """
+    Per (symbol, interval) store of chart bars and events, which remembers the [start, end) ranges it holds so that
+    only the missing ranges of a request have to be downloaded.
+    """
+    _manager = _PriceHistoryDBManager
+    _proxy = price_history_db_proxy
+    _models = [_BarSchema, _BarEventSchema, _BarRangeSchema]
+
+    def get_ranges(self, symbol, interval):
+        if not self.ready():
+            return []
+        q = (_BarRangeSchema
+             .select(_BarRangeSchema.start, _BarRangeSchema.end)
+             .where((_BarRangeSchema.symbol == symbol) & (_BarRangeSchema.interval == interval))
+             .order_by(_BarRangeSchema.start))
+        return [(r.start, r.end) for r in q]
+
+    def missing_ranges(self, symbol, interval, start, end):
+        """Returns the [start, end) ranges of the request which are not held yet"""
+        if not self.ready():
+            return [(start, end)]
+        return _subtract_ranges(start, end, self.get_ranges(symbol, interval))
+
+    def has_range(self, symbol, interval):
+        return len(self.get_ranges(symbol, interval)) > 0
+
+    def store(self, symbol, interval, start, end, result):
+        """
+        Stores the bars and events of a chart API result and marks [start, end) as held. Pass end <= start to store
+        the bars without marking them as held, e.g. for a period that is still in progress.
+        """
+        if not self.ready():
+            return
+        quote = result['indicators']['quote'][0]
+        adjclose = (result['indicators'].get('adjclose') or [{}])[0].get('adjclose')
+        rows = []
+        for i, ts in enumerate(result.get('timestamp') or []):
+            row = {'symbol': symbol, 'interval': interval, 'timestamp': ts}
+            for field in _BAR_FIELDS:
+                values = adjclose if field == 'adjclose' else quote.get(field)
+                row[field] = values[i] if values is not None else None
+            rows.append(row)
+        events = []
+        for event_type, type_obj in (result.get('events') or {}).items():
+            for ts, event_obj in type_obj.items():
+                events.append({'symbol': symbol, 'interval': interval, 'event_type': event_type,
+                               'timestamp': int(ts), 'data': _json.dumps(event_obj)})
+        with self.db.atomic():
+            for batch in _peewee.chunked(rows, 100):
+                _BarSchema.insert_many(batch).on_conflict_replace().execute()
+            for batch in _peewee.chunked(events, 100):
+                _BarEventSchema.insert_many(batch).on_conflict_replace().execute()
+            if end > start:
+                self._add_range(symbol, interval, start, end, result.get('meta'))
+            elif result.get('meta') is not None:
+                (_BarRangeSchema
+                 .update(meta=_json.dumps(result['meta']))
+                 .where((_BarRangeSchema.symbol == symbol) & (_BarRangeSchema.interval == interval))
+                 .execute())
+
+    def _add_range(self, symbol, interval, start, end, meta):
+        where = (_BarRangeSchema.symbol == symbol) & (_BarRangeSchema.interval == interval)
+        merged_start, merged_end = start, end
+        for held_start, held_end in self.get_ranges(symbol, interval):
+            if held_start <= merged_end and held_end >= merged_start:
+                merged_start = min(merged_start, held_start)
+                merged_end = max(merged_end, held_end)
+        _BarRangeSchema.delete().where(
+            where & (_BarRangeSchema.start >= merged_start) & (_BarRangeSchema.start <= merged_end)).execute()
+        _BarRangeSchema.insert(symbol=symbol, interval=interval, start=merged_start, end=merged_end,
+                               meta=_json.dumps(meta) if meta is not None else None).execute()
+        if meta is not None:
+            _BarRangeSchema.update(meta=_json.dumps(meta)).where(where).execute()
+
+    def load(self, symbol, interval, start, end):
+        """Returns the held bars and events in [start, end) in the format of a chart API result"""
+        if not self.ready():
+            return None
+        where = (_BarSchema.symbol == symbol) & (_BarSchema.interval == interval)
+        bars = list(_BarSchema
+                    .select()
+                    .where(where & (_BarSchema.timestamp >= start) & (_BarSchema.timestamp < end))
+                    .order_by(_BarSchema.timestamp)
+                    .tuples())
+        meta_row = (_BarRangeSchema
+                    .select(_BarRangeSchema.meta)
+                    .where((_BarRangeSchema.symbol == symbol) & (_BarRangeSchema.interval == interval) &
+                           _BarRangeSchema.meta.is_null(False))
+                    .first())
+        events = {}
+        q = (_BarEventSchema
+             .select()
+             .where((_BarEventSchema.symbol == symbol) & (_BarEventSchema.interval == interval) &
+                    (_BarEventSchema.timestamp >= start) & (_BarEventSchema.timestamp < end)))
+        for event in q:
+            events.setdefault(event.event_type, {}).update({str(event.timestamp): _json.loads(event.data)})
+        # Tuples are (symbol, interval, timestamp, open, high, low, close, volume, adjclose)
+        columns = list(zip(*bars)) if bars else [[]] * 9
+        result = {
+            'meta': _json.loads(meta_row.meta) if meta_row is not None else {},
+            'timestamp': list(columns[2]),
+            'indicators': {
+                'quote': [{field: list(columns[3 + i]) for i, field in enumerate(_BAR_FIELDS[:-1])}],
+                'adjclose': [{'adjclose': list(columns[8])}]
+            }
+        }
+        if events:
+            result['events'] = events
+        return result
+
+    def clear(self, symbol=None, interval=None):
+        if not self.ready():
+            return
+        for model in self._models:
+            q = model.delete()
+            if symbol is not None:
+                q = q.where(model.symbol == symbol)
+            if interval is not None:
+                q = q.where(model.interval == interval)
+            q.execute()
+
+
+class _PriceHistoryCacheManager:
+    _price_history_cache = None
+
+    @classmethod
+    def get_price_history_cache(cls):
+        if cls._price_history_cache is None:
+            with _cache_init_lock:
+                if cls._price_history_cache is None:
+                    cls._price_history_cache = _PriceHistoryCache()
+        return cls._price_history_cache
+
+
+def get_price_history_cache():
+    return _PriceHistoryCacheManager.get_price_history_cache()
+
+
+def clear_price_history_cache(symbol=None, interval=None):
+    """
+    Deletes the bars held by the incremental price history cache.
+    :param symbol: Only delete the bars of this symbol
+    :param interval: Only delete the bars of this interval code, e.g. '1d'
+    :return: None
+    """
+    get_price_history_cache().clear(symbol, interval)
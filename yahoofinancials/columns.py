@@ -0,0 +1,101 @@
+from array import array
+
+from yahoofinancials.dates import format_epoch_dates
+from yahoofinancials.utils import lazy_import
+
+np = lazy_import("numpy", optional=True)
+
+# Fields of a historical price row, in the order of the list of dicts output
+PRICE_FIELDS = ('date', 'high', 'low', 'open', 'close', 'volume', 'adjclose')
+
+
+# Private function to build a typed array, missing values become NaN
+def _to_array(values, integer=False):
+    if integer:
+        if np is not None:
+            return np.asarray(values, dtype=np.int64)
+        return array('q', values)
+    values = [float('nan') if v is None else v for v in values]
+    if np is not None:
+        return np.asarray(values, dtype=np.float64)
+    return array('d', values)
+
+
+# Private function to turn an array value back into the value of the list of dicts output
+def _to_value(value, field):
+    value = float(value)
+    if value != value:
+        return None
+    if field in ('date', 'volume'):
+        return int(value)
+    return value
+
+
+class PriceColumns(object):
+    """
+    Columnar historical prices, returned as the 'prices' entry of get_historical_price_data() when columnar_prices is
+    set to True.
+
+    Each of the 'date', 'high', 'low', 'open', 'close', 'volume' and 'adjclose' fields is held in one typed array,
+    a NumPy array when NumPy is installed, otherwise an array.array. Missing prices and volumes are NaN. The
+    'YYYY-MM-DD' dates are only formatted when formatted_dates is first read.
+
+    prices['close'] returns a column, prices[i] the row dict of the default output, and to_rows() the whole list.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._formatted_dates = None
+
+    @classmethod
+    def from_chart_result(cls, result):
+        quote = result['indicators']['quote'][0]
+        columns = {
+            'date': _to_array(result['timestamp'], True),
+            'high': _to_array(quote.get('high') or []),
+            'low': _to_array(quote.get('low') or []),
+            'open': _to_array(quote.get('open') or []),
+            'close': _to_array(quote.get('close') or []),
+            'volume': _to_array(quote.get('volume') or []),
+            'adjclose': _to_array((result['indicators'].get('adjclose') or [{}])[0].get('adjclose') or []),
+        }
+        return cls(columns)
+
+    @property
+    def formatted_dates(self):
+        if self._formatted_dates is None:
+            self._formatted_dates = format_epoch_dates(self.columns['date'])
+        return self._formatted_dates
+
+    def __len__(self):
+        return len(self.columns['date'])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key == 'formatted_date':
+                return self.formatted_dates
+            return self.columns[key]
+        if isinstance(key, slice):
+            sliced = PriceColumns({k: v[key] for k, v in self.columns.items()})
+            if self._formatted_dates is not None:
+                sliced._formatted_dates = self._formatted_dates[key]
+            return sliced
+        row = {field: _to_value(self.columns[field][key], field) for field in PRICE_FIELDS}
+        row['formatted_date'] = self.formatted_dates[key]
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, PriceColumns):
+            return NotImplemented
+        return self.to_rows() == other.to_rows()
+
+    def __repr__(self):
+        return "PriceColumns(" + str(len(self)) + " rows)"
+
+    # Public method to return the prices as the list of dicts of the default output
+    def to_rows(self):
+        return list(self)
@@ -2,18 +2,33 @@ import calendar
 import datetime
 import logging
 import random
+import re
+import threading
 import time
+from urllib.parse import quote
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from functools import partial
-from json import loads
-from multiprocessing import Pool
-import pytz
 
-from yahoofinancials.maps import COUNTRY_MAP, REQUEST_MAP, USER_AGENTS
-from yahoofinancials.sessions import SessionManager, _init_session
-from yahoofinancials.utils import remove_prefix, get_request_config, get_request_category
+from yahoofinancials.breaker import CircuitBreakers, get_circuit_breakers
+from yahoofinancials.columns import PriceColumns
+from yahoofinancials.dates import format_epoch_date, format_epoch_dates, format_report_time, get_timezone
+from yahoofinancials.decoder import get_json_decoder
+from yahoofinancials.memcache import MemoryCache
+from yahoofinancials.maps import COUNTRY_MAP, FUNDAMENTALS_MAP, FUNDAMENTALS_TIME_MAP, MODULES_MAP, QUOTE_FIELD_MAP, \
+    REQUEST_MAP, USER_AGENTS
+from yahoofinancials.proxies import ProxyPool
+from yahoofinancials.ratelimit import get_rate_limiter
+from yahoofinancials.retry import RETRY, Deadline, DeadlineExceeded, RetryPolicy, deadline_scope, \
+    get_current_deadline, parse_retry_after
+from yahoofinancials.sessions import SessionManager
+from yahoofinancials.singleflight import SingleFlight, get_flight_key
+from yahoofinancials.utils import get_fundamental_field, get_period2, get_request_config, get_request_category, \
+    get_response_ttl, lazy_import
 
-# track the last get timestamp to add a minimum delay between gets - be nice!
-_lastget = 0
+cache = lazy_import("yahoofinancials.cache")
+
+# Placeholders of a url template, filled in on each request
+_URL_PLACEHOLDER = re.compile(r"(\{symbol\}|\{period1\}|\{period2\})")
 
 
 # Custom Exception class to handle custom error
@@ -40,7 +55,7 @@ class UrlOpener:
         self._session_manager = SessionManager(session=session)
 
     def open(self, url, request_headers=None, params=None, proxy=None, timeout=30):
-        response = self._session_manager.cache_get(
+        response = self._session_manager.get(
             url=url,
             params=params,
             proxy=proxy,
@@ -49,6 +64,15 @@ class UrlOpener:
         )
         return response
 
+    def set_pool_size(self, pool_connections=None, pool_maxsize=None):
+        self._session_manager.set_pool_size(pool_connections, pool_maxsize)
+
+    def transport_stats(self):
+        return self._session_manager.transport_stats()
+
+    def reset_session(self, proxy=None, since=None):
+        self._session_manager._reset_cookie_and_crumb(proxy, since)
+
     def get_data(self, session, url, request_headers=None, params=None, proxy=None, timeout=30):
         response = session.get(
             url=url,
@@ -71,12 +95,77 @@ class YahooFinanceData(object):
         self.max_workers = kwargs.get("max_workers", 8)
         self.timeout = kwargs.get("timeout", 30)
         self.proxies = kwargs.get("proxies")
+        self._proxy_pool = kwargs.get("proxy_pool")
+        if self._proxy_pool is None and isinstance(self.proxies, list) and self.proxies:
+            self._proxy_pool = ProxyPool(self.proxies)
         self.session = kwargs.pop("session", None)
+        self.pool_connections = kwargs.get("pool_connections")
+        self.pool_maxsize = kwargs.get("pool_maxsize")
+        self._urlopener = None
+        self._json_decoder = get_json_decoder(kwargs.get("json_decoder"))
         self.flat_format = kwargs.get("flat_format", False)
-        self._cache = {}
+        self.columnar_prices = kwargs.get("columnar_prices")
+        self.format_dates = kwargs.get("format_dates", True)
+        self.batch_quotes = kwargs.get("batch_quotes", True)
+        self.quote_chunk_size = kwargs.get("quote_chunk_size", 200)
+        self.max_url_length = kwargs.get("max_url_length", 16000)
+        self._rate_limiter = kwargs.get("rate_limiter") or get_rate_limiter(kwargs.get("rate_limits"),
+                                                                            kwargs.get("shared_rate_limit", False))
+        self.persistent_cache = kwargs.get("persistent_cache", False)
+        self.cache_ttls = kwargs.get("cache_ttls")
+        self._response_cache = cache.get_response_cache() if self.persistent_cache else None
+        self.history_cache = kwargs.get("history_cache", False)
+        self._history_cache = cache.get_price_history_cache() if self.history_cache else None
+        self.executor = kwargs.get("executor", "thread")
+        if not isinstance(self.executor, Executor) and self.executor not in ("thread", "process"):
+            raise ValueError("invalid executor: " + str(self.executor))
+        self._executor = self.executor if isinstance(self.executor, Executor) else None
+        self._executor_lock = threading.Lock()
+        self._chunk_executor = None
+        self._single_flight = kwargs.get("single_flight") or SingleFlight()
+        self._retry_policy = kwargs.get("retry_policy") or RetryPolicy()
+        self._circuit_breakers = kwargs.get("circuit_breakers") or get_circuit_breakers()
+        self._cache = kwargs.get("memory_cache")
+        if self._cache is None:
+            self._cache = MemoryCache(ttls=self.cache_ttls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Executors and locks stay with the parent when the instance is pickled into a worker process
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_chunk_executor'] = None
+        state['_urlopener'] = None
+        state['_response_cache'] = None
+        state['_history_cache'] = None
+        if isinstance(state['executor'], Executor):
+            state['executor'] = 'process'
+        del state['_executor_lock']
+        return state
 
-    # Minimum interval between Yahoo Finance requests for this instance
-    _MIN_INTERVAL = 7
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
+        if self.persistent_cache:
+            self._response_cache = cache.get_response_cache()
+        if self.history_cache:
+            self._history_cache = cache.get_price_history_cache()
+
+    # Public method to shut down the executors created by this instance, injected executors are left running
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None and not isinstance(self.executor, Executor):
+                self._executor.shutdown(wait=True)
+            if not isinstance(self.executor, Executor):
+                self._executor = None
+            if self._chunk_executor is not None:
+                self._chunk_executor.shutdown(wait=True)
+                self._chunk_executor = None
 
     # Meta-data dictionaries for the classes to use
     YAHOO_FINANCIAL_TYPES = {
@@ -100,16 +189,77 @@ class YahooFinanceData(object):
         ],
         'keystats': ['key-statistics'],
         'history': ['history'],
-        'profile': ['summaryProfile']
+        'profile': ['summaryProfile'],
+        'modules': ['modules']
+    }
+
+    # quoteSummary modules whose getters return cleaned data, mapped to the report type used to clean them
+    _MODULE_REPORT_TYPES = {
+        'price': 'price',
+        'summaryDetail': 'summaryDetail',
+        'defaultKeyStatistics': 'defaultKeyStatistics',
+        'financialData': 'financialData',
+        'assetProfile': 'earnings',
     }
 
     # Interval value translation dictionary
     _INTERVAL_DICT = {
         'daily': '1d',
         'weekly': '1wk',
-        'monthly': '1mo'
+        'monthly': '1mo',
+        '1m': '1m',
+        '2m': '2m',
+        '5m': '5m',
+        '15m': '15m',
+        '30m': '30m',
+        '60m': '60m',
+        '90m': '90m',
+        '1h': '1h'
+    }
+
+    # Length in seconds of the bars of each interval code, used to find the bar still in progress
+    _INTERVAL_SECONDS = {
+        '1m': 60,
+        '2m': 2 * 60,
+        '5m': 5 * 60,
+        '15m': 15 * 60,
+        '30m': 30 * 60,
+        '60m': 60 * 60,
+        '90m': 90 * 60,
+        '1h': 60 * 60,
+        '1d': 86400,
+        '1wk': 7 * 86400,
+        '1mo': 31 * 86400
+    }
+
+    # Longest window of one chart request and how far back bars are served, in days, of each intraday interval code
+    _INTRADAY_LIMITS = {
+        '1m': (7, 30),
+        '2m': (60, 60),
+        '5m': (60, 60),
+        '15m': (60, 60),
+        '30m': (60, 60),
+        '60m': (730, 730),
+        '90m': (60, 60),
+        '1h': (730, 730)
+    }
+
+    # Seconds of history requested for the most recent period of a line item of each frequency, long enough to cover
+    # the reporting delay of the latest statement
+    _LATEST_PERIOD_SECONDS = {
+        'annual': 2 * 366 * 86400,
+        'quarterly': 200 * 86400,
+        'monthly': 62 * 86400
     }
 
+    # Fundamentals timeseries type key of each line item field, by frequency, built on first use
+    _LINE_ITEM_TYPES = {}
+
+    # Url templates of the requests made so far, see _get_url_template(), and the params of their time window
+    _URL_TEMPLATES = {}
+    _MAX_URL_TEMPLATES = 4096
+    _WINDOW_PARAMS = ("period1", "period2")
+
     # Base Yahoo Finance URL for the class to build on
     _BASE_YAHOO_URL = 'https://finance.yahoo.com/quote/'
 
@@ -130,46 +280,149 @@ class YahooFinanceData(object):
         if isinstance(in_date, str):
             form_date = int(calendar.timegm(time.strptime(in_date, '%Y-%m-%d')))
         else:
-            form_date = str((datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=in_date)).date())
+            form_date = format_epoch_date(in_date)
         return form_date
 
     # Private Static Method to Convert Eastern Time to UTC
     @staticmethod
     def _convert_to_utc(date, mask='%Y-%m-%d %H:%M:%S'):
-        utc = pytz.utc
-        eastern = pytz.timezone('US/Eastern')
+        utc = get_timezone('UTC')
+        eastern = get_timezone('US/Eastern')
         date_ = datetime.datetime.strptime(date.replace(" 0:", " 12:"), mask)
         date_eastern = eastern.localize(date_, is_dst=None)
         date_utc = date_eastern.astimezone(utc)
         return date_utc.strftime('%Y-%m-%d %H:%M:%S %Z%z')
 
-    # _get_proxy randomly picks a proxy in the proxies list if not None
+    # _get_proxy picks a proxy from the proxy pool by health score, or returns the single proxy, if not None
     def _get_proxy(self):
+        if self._proxy_pool is not None:
+            return {"https": self._proxy_pool.select()}
         if self.proxies:
-            proxy_str = self.proxies
-            if isinstance(self.proxies, list):
-                proxy_str = random.choice(self.proxies)
-            return {"https": proxy_str}
+            return {"https": self.proxies}
         return None
 
-    # Private method that determines number of workers to use in a process
-    def _get_worker_count(self):
-        workers = self.max_workers
-        if len(self.ticker) < workers:
-            workers = len(self.ticker)
-        return workers
+    # Private method to return the seconds to wait for the rate limit of a proxy of the pool
+    def _reserve_proxy(self, proxy):
+        if self._proxy_pool is None or proxy is None:
+            return 0.0
+        return self._proxy_pool.reserve(proxy)
 
-    # Private method to construct historical data url
-    def _construct_url(self, symbol, config, params, freq, request_type):
-        url = config["path"].replace("{symbol}", symbol.lower())
+    # Private method to record the outcome and latency of a request in the health of its proxy
+    def _record_proxy(self, proxy, status, latency):
+        if self._proxy_pool is not None and proxy is not None:
+            self._proxy_pool.record(proxy, status, latency)
+
+    # Public method to return the health of each proxy of the proxy pool
+    def get_proxy_stats(self):
+        if self._proxy_pool is None:
+            return {}
+        return self._proxy_pool.get_stats()
+
+    # Private method to return the url opener shared by the requests of the instance, the connection pool of the
+    # shared session is sized to the concurrency of the instance on first use
+    def _get_urlopener(self):
+        if self._urlopener is None:
+            urlopener = UrlOpener(self.session)
+            pool_maxsize = self.pool_maxsize or (self.max_workers if self.concurrent else None)
+            urlopener.set_pool_size(self.pool_connections, pool_maxsize)
+            self._urlopener = urlopener
+        return self._urlopener
+
+    # Public method to return the requests sent, connections opened and connections reused by the shared sessions
+    def get_transport_stats(self):
+        return self._get_urlopener().transport_stats()
+
+    # Private method to return the long-lived executor used for concurrent requests
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.executor == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                            thread_name_prefix="yahoofinancials")
+        return self._executor
+
+    # Private method to return the thread pool fetching the chunks of long intraday windows, apart from the ticker
+    # executor since its workers wait on the chunks
+    def _get_chunk_executor(self):
+        if self._chunk_executor is None:
+            with self._executor_lock:
+                if self._chunk_executor is None:
+                    self._chunk_executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                              thread_name_prefix="yahoofinancials-chunk")
+        return self._chunk_executor
+
+    # Private method to determine if the executor runs tasks in other processes
+    def _is_process_executor(self):
+        return isinstance(self._get_executor(), ProcessPoolExecutor)
+
+    # Private method to run a ticker function in a worker process and return the cache entries it added
+    def _call_with_cache(self, func, deadline, tick):
+        cache_keys = set(self._cache)
+        out = self._call_with_deadline(func, deadline, tick)
+        errors = deadline.errors if deadline is not None else {}
+        return out, {k: v for k, v in self._cache.items() if k not in cache_keys}, errors
+
+    # Private static method to run a ticker function under the deadline of the calling thread
+    @staticmethod
+    def _call_with_deadline(func, deadline, tick):
+        with deadline_scope(deadline):
+            return func(tick)
+
+    # Private method to map a ticker function over the tickers with the executor, in ticker order
+    def _map_tickers(self, func):
+        executor = self._get_executor()
+        # Context variables do not follow tasks into the workers, so the deadline is passed along
+        deadline = get_current_deadline()
+        if not self._is_process_executor():
+            return list(executor.map(partial(self._call_with_deadline, func, deadline), self.ticker))
+        results = []
+        for out, cache_ents, errors in executor.map(partial(self._call_with_cache, func, deadline), self.ticker):
+            self._cache.update(cache_ents)
+            if deadline is not None:
+                deadline.errors.update(errors)
+            results.append(out)
+        return results
+
+    # Public method to run the calls of a with block under one time budget, returns the Deadline whose errors
+    # attribute maps the tickers that could not be fetched in time, or failed, to the reason
+    def deadline(self, seconds):
+        return deadline_scope(Deadline(seconds))
+
+    # Private method to return the socket timeout of a request, shortened to the time left of the deadline
+    def _get_timeout(self):
+        budget = get_current_deadline()
+        if budget is None:
+            return self.timeout
+        return max(min(self.timeout, budget.remaining()), 0.001)
+
+    # Private static method to record why a ticker is missing from the results of a deadline scope
+    @staticmethod
+    def _add_ticker_error(up_ticker, error):
+        budget = get_current_deadline()
+        if budget is not None:
+            budget.add_error(up_ticker, str(error))
+
+    # Private method to build the url template of a request, the symbol and the period1 & period2 time window are left
+    # as placeholders
+    def _build_url_template(self, config, params, freq, request_type):
+        params = dict(params)
+        url = config["path"]
         _default_query_params = COUNTRY_MAP.get(self.country.upper())
         for k, v in config['request'].items():  # request type defaults
             if k == "type":
-                params.update({k: v['options'][request_type].get(freq)})
+                if k not in params:
+                    params.update({k: v['options'][request_type].get(freq)})
+            elif k == "modules" and isinstance(request_type, (list, tuple)):
+                params.update({k: ",".join([m for m in request_type if m in v['options']])})
             elif k == "modules" and request_type in v['options']:
                 params.update({k: request_type})
             elif k == "symbol":
-                params.update({k: symbol.lower()})
+                params.update({k: "{symbol}"})
+            elif k in self._WINDOW_PARAMS:
+                params.update({k: "{" + k + "}"})
             elif k not in params:
                 if k == 'reportsCount' and v is None:
                     continue
@@ -180,63 +433,161 @@ class YahooFinanceData(object):
             if k not in params:
                 params.update({k: v})
         if params.get("type"):
-            field_params = "%2C".join(params.get("type"))
-            url += "?type=" + field_params
-            for k, v in params.items():
-                if k != "type":
-                    url += "&" + k + "=" + str(v)
+            query = ["type=" + "%2C".join(params.get("type"))]
+            query.extend([k + "=" + str(v) for k, v in params.items() if k != "type"])
+            url += "?" + "&".join(query)
         elif params.get("modules"):
-            url += "?modules=" + params.get("modules")
-            for k, v in params.items():
-                if k != "modules":
-                    url += "&" + k + "=" + str(v)
+            query = ["modules=" + params.get("modules")]
+            query.extend([k + "=" + str(v) for k, v in params.items() if k != "modules"])
+            url += "?" + "&".join(query)
         elif params.get("symbol"):
             url += "?symbol=" + params.get("symbol")
         return url
 
-    # Private method to execute a web scrape request and decrypt the return
+    # Private method to return the url template of a request split around its placeholders, built once per endpoint,
+    # request type, frequency, country and fixed params
+    def _get_url_template(self, config, params, freq, request_type):
+        key = (config["path"], self.country.upper(), freq,
+               tuple(request_type) if isinstance(request_type, list) else request_type,
+               tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in params.items()
+                     if k not in self._WINDOW_PARAMS))
+        template = self._URL_TEMPLATES.get(key)
+        if template is None:
+            template = tuple(_URL_PLACEHOLDER.split(self._build_url_template(config, params, freq, request_type)))
+            if len(self._URL_TEMPLATES) >= self._MAX_URL_TEMPLATES:
+                self._URL_TEMPLATES.clear()
+            self._URL_TEMPLATES[key] = template
+        return template
+
+    # Private method to construct a request url from its cached template, only the symbol and time window are filled in
+    def _construct_url(self, symbol, config, params, freq, request_type):
+        template = self._get_url_template(config, params, freq, request_type)
+        values = {"{symbol}": symbol.lower()}
+        if "{period2}" in template:
+            values["{period1}"] = str(params.get("period1", config['request']['period1']['default']))
+            values["{period2}"] = str(params.get("period2") or get_period2())
+        return "".join([values.get(part, part) for part in template])
+
+    # Private method to load a response from the persistent response cache into the instance cache
+    def _load_stored_response(self, url):
+        if self._response_cache is None:
+            return None
+        data = self._response_cache.lookup(url)
+        if data is not None:
+            self._cache[url] = data
+        return data
+
+    # Private method to save a response in the persistent response cache for its request category's TTL
+    def _store_response(self, url, data):
+        if self._response_cache is not None:
+            self._response_cache.store(url, data, get_response_ttl(url, self.cache_ttls))
+
+    # Private method to execute a web scrape request and decrypt the return, identical requests in flight share a fetch
     def _request_handler(self, url, res_field=""):
-        urlopener = UrlOpener(self.session)
-        # Try to open the URL up to 10 times sleeping random time if something goes wrong
-        open_session = False
+        data = self._load_stored_response(url)
+        if data is not None:
+            return data
+        data = self._single_flight.do(get_flight_key(url, res_field), partial(self._fetch_url, url, res_field))
+        if data is not None:
+            self._cache[url] = data
+        return data
+
+    # Private method to return the parsed response of a url from the instance cache, requesting it if missing
+    def _get_response(self, url, res_field=""):
+        data = self._cache.get(url)
+        if not data:
+            data = self._request_handler(url, res_field)
+        if data is None:
+            raise KeyError(url)
+        return data
+
+    # Private method to fetch a url under the retry policy and return the parsed response field
+    def _fetch_url(self, url, res_field=""):
+        cur_url, status, content = self._open_with_retry(url)
+        if content is None:
+            budget = get_current_deadline()
+            if budget is not None and budget.expired():
+                raise DeadlineExceeded("deadline exceeded while opening the url: " + str(cur_url))
+            # Raise a custom exception if we can't get the web page within the retry policy
+            raise ManagedException("Server replied with server error code, HTTP " + str(status) +
+                                   " code while opening the url: " + str(cur_url))
+        data = self._json_decoder.loads_field(content, res_field)
+        self._store_response(url, data)
+        return data
+
+    # Private method to open a url under the retry policy, returns the last url, status code and body of a 200
+    def _open_with_retry(self, url):
+        urlopener = self._get_urlopener()
+        retry = self._retry_policy.start()
         cur_url = url
-        max_retry = 10
-        for i in range(0, max_retry):
-            if open_session:
-                open_session = False
-                try:
-                    session, crumb = _init_session(None, proxies=self._get_proxy(), timeout=self.timeout)
-                    crumb_url = cur_url + "&crumb=" + str(crumb)
-                    response = urlopener.get_data(session, crumb_url, proxy=self._get_proxy(), timeout=self.timeout)
-                except:
-                    continue
-            else:
-                try:
-                    response = urlopener.open(cur_url, proxy=self._get_proxy(), timeout=self.timeout)
-                    if response.status_code == 401:
-                        open_session = True
-                except AttributeError:
-                    open_session = True
-                    continue
-            if response.status_code != 200:
-                time.sleep(random.randrange(1, 5))
+        while True:
+            proxy = self._get_proxy()
+            wait = max(self._rate_limiter.reserve_url(cur_url), self._reserve_proxy(proxy))
+            remaining = retry.remaining()
+            if remaining is not None and wait >= remaining:
+                budget = get_current_deadline()
+                if budget is not None and wait >= budget.remaining():
+                    raise DeadlineExceeded("deadline exceeded waiting to open the url: " + str(cur_url))
+                return cur_url, None, None
+            if wait > 0:
+                time.sleep(wait)
+            cur_url = self._get_open_url(cur_url)
+            status, retry_after, content = None, None, None
+            started, sent = time.monotonic(), time.time()
+            try:
+                response = urlopener.open(cur_url, proxy=proxy, timeout=self._get_timeout())
+                status = response.status_code
+                if status == 200:
+                    content = response.content
+                else:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
                 response.close()
-                time.sleep(random.randrange(1, 5))
-                if response.status_code == 404 and i % 2 == 0:
-                    if 'query2.' in cur_url:
-                        cur_url = cur_url.replace("query2.", "query1.")
-                    elif 'query1.' in cur_url:
-                        cur_url = cur_url.replace("query1.", "query2.")
+            except Exception as e:
+                logging.debug("yahoofinancials: request to %s failed: %s", cur_url, str(e))
+            self._record_outcome(cur_url, status)
+            self._record_proxy(proxy, status, time.monotonic() - started)
+            if status == 200:
+                return cur_url, status, content
+            if status == 401:
+                # The shared cookie & crumb are renegotiated once, unless another request already did
+                urlopener.reset_session(proxy, sent)
+            elif self._retry_policy.classify(status) == RETRY:
+                cur_url = self._get_alternate_host_url(cur_url)
+            if not retry.wait(status, retry_after):
+                return cur_url, status, None
 
-            else:
-                res_content = response.text
-                response.close()
-                self._cache[url] = loads(res_content).get(res_field)
-                break
-            if i == max_retry - 1:
-                # Raise a custom exception if we can't get the web page within max_retry attempts
-                raise ManagedException("Server replied with server error code, HTTP " + str(response.status_code) +
-                                       " code while opening the url: " + str(cur_url))
+    # Private method to return the url of the next attempt, sent to the other query host while the circuit of its host
+    # and endpoint family is open, fails fast when both circuits are open
+    def _get_open_url(self, url):
+        if self._circuit_breakers.allow(url):
+            return url
+        alt_url = self._get_alternate_host_url(url)
+        if alt_url != url and self._circuit_breakers.allow(alt_url):
+            return alt_url
+        host, endpoint = CircuitBreakers.get_key(url)
+        raise ManagedException("Circuit open for " + endpoint + " requests to " + host + ", not opening the url: " +
+                               str(url))
+
+    # Private method to record the outcome of a request in the circuit of its host and endpoint family
+    def _record_outcome(self, url, status):
+        self._circuit_breakers.record(url, self._retry_policy.classify(status) != RETRY)
+
+    # Public method to return the circuit state of each host and endpoint family, optionally of one family
+    def get_circuit_state(self, endpoint=None):
+        return self._circuit_breakers.get_state(endpoint)
+
+    # Public method to return the seconds until requests of an endpoint family are accepted again, 0.0 if they are
+    def get_circuit_retry_in(self, endpoint):
+        return self._circuit_breakers.get_retry_in(endpoint)
+
+    # Private static method to swap the query1 and query2 hosts of a url
+    @staticmethod
+    def _get_alternate_host_url(url):
+        if 'query2.' in url:
+            return url.replace("query2.", "query1.")
+        elif 'query1.' in url:
+            return url.replace("query1.", "query2.")
+        return url
 
     @staticmethod
     def _format_raw_fundamental_data(raw_data):
@@ -244,11 +595,7 @@ class YahooFinanceData(object):
         for i in raw_data.get("result"):
             for k, v in i.items():
                 if k not in ['meta', 'timestamp']:
-                    cleaned_k = remove_prefix(remove_prefix(remove_prefix(k, "quarterly"), "annual"), "trailing")
-                    if cleaned_k in ['EBIT']:
-                        cleaned_k = cleaned_k.lower()
-                    else:
-                        cleaned_k = cleaned_k[0].lower() + cleaned_k[1:]
+                    cleaned_k = get_fundamental_field(k)
                     for rec in v:
                         if rec.get("asOfDate") in data:
                             data[rec.get("asOfDate")].update({cleaned_k: rec.get('reportedValue', {}).get('raw')})
@@ -267,15 +614,11 @@ class YahooFinanceData(object):
 
     # Private method to _get_historical_data from yahoo finance
     def _get_historical_data(self, url, config, tech_type, statement_type):
-        global _lastget
-        if not self._cache.get(url):
-            now = int(time.time())
-            if _lastget and now - _lastget < self._MIN_INTERVAL:
-                time.sleep(self._MIN_INTERVAL - (now - _lastget) + 1)
-                now = int(time.time())
-            _lastget = now
-            self._request_handler(url, config.get("response_field"))
-        data = self._cache[url]
+        return self._format_response_data(self._get_response(url, config.get("response_field")), tech_type,
+                                          statement_type)
+
+    # Private method to format a parsed response into the data returned for the statement and tech type
+    def _format_response_data(self, data, tech_type, statement_type):
         if tech_type == '' and statement_type in ["income", "balance", "cash"]:
             data = self._format_raw_fundamental_data(data)
         elif statement_type == 'analytic':
@@ -298,8 +641,7 @@ class YahooFinanceData(object):
 
     # Private method to format date serial string to readable format and vice versa
     def _format_time(self, in_time):
-        form_date_time = datetime.datetime.fromtimestamp(int(in_time)).strftime('%Y-%m-%d %H:%M:%S')
-        return self._convert_to_utc(form_date_time)
+        return format_report_time(in_time)
 
     # Private method to return a sub dictionary entry for the earning report cleaning
     def _get_cleaned_sub_dict_ent(self, key, val_list):
@@ -355,8 +697,10 @@ class YahooFinanceData(object):
             return None
         for k, v in raw_data.items():
             if 'Time' in k:
-                formatted_utc_time = self._format_time(v)
-                dict_ent = {k: formatted_utc_time}
+                if self.format_dates:
+                    dict_ent = {k: self._format_time(v)}
+                else:
+                    dict_ent = {k: v}
             elif 'Date' in k:
                 try:
                     formatted_date = v['fmt']
@@ -381,7 +725,12 @@ class YahooFinanceData(object):
     def _clean_historical_data(self, hist_data, last_attempt=False):
         data = {}
         for k, v in hist_data.items():
-            if k == 'eventsData':
+            if not self.format_dates and k != 'prices':
+                # Epoch ints are kept untouched, only missing dates are still checked
+                if v is None and 'date' in k.lower() and last_attempt is False:
+                    return None
+                dict_ent = {k: v}
+            elif k == 'eventsData':
                 event_obj = {}
                 if isinstance(v, list):
                     dict_ent = {k: event_obj}
@@ -405,11 +754,11 @@ class YahooFinanceData(object):
                     else:
                         dict_ent = {k: {'formatted_date': None, 'date': v}}
             elif isinstance(v, list):
-                sub_dict_list = []
-                for sub_dict in v:
-                    sub_dict['formatted_date'] = self.format_date(sub_dict['date'])
-                    sub_dict_list.append(sub_dict)
-                dict_ent = {k: sub_dict_list}
+                if self.format_dates:
+                    # The dates of all the bars are formatted at once
+                    for sub_dict, formatted_date in zip(v, format_epoch_dates([d['date'] for d in v])):
+                        sub_dict['formatted_date'] = formatted_date
+                dict_ent = {k: v}
             else:
                 dict_ent = {k: v}
             data.update(dict_ent)
@@ -434,37 +783,36 @@ class YahooFinanceData(object):
         return api_url
 
     # Private Method to get financial data via API Call
-    def _get_api_data(self, api_url, tries=0):
-        if tries == 0 and self._cache.get(api_url):
-            return self._cache[api_url]
-        cur_url = api_url
-        if tries > 0 and tries % 2 == 0:
-            if 'query2.' in cur_url:
-                cur_url = cur_url.replace("query2.", "query1.")
-            elif 'query1.' in cur_url:
-                cur_url = cur_url.replace("query1.", "query2.")
-        urlopener = UrlOpener(self.session)
-        response = urlopener.open(cur_url, proxy=self._get_proxy(), timeout=self.timeout)
-        if response.status_code == 200:
-            res_content = response.text
-            response.close()
-            data = loads(res_content)
-            self._cache[api_url] = data
+    def _get_api_data(self, api_url):
+        data = self._cache.get(api_url) or self._load_stored_response(api_url)
+        if data:
             return data
-        else:
-            if tries < 5:
-                time.sleep(random.randrange(1, 5))
-                response.close()
-                time.sleep(random.randrange(1, 5))
-                tries += 1
-                return self._get_api_data(api_url, tries)
-            else:
-                response.close()
-                return None
+        data = self._single_flight.do(get_flight_key(api_url), partial(self._fetch_api_data, api_url))
+        if data is not None:
+            self._cache[api_url] = data
+        return data
+
+    # Private Method to fetch a chart API url under the retry policy, None if every attempt failed or both circuits
+    # are open
+    def _fetch_api_data(self, api_url):
+        try:
+            cur_url, status, content = self._open_with_retry(api_url)
+        except ManagedException as e:
+            logging.warning("yahoofinancials: %s", str(e))
+            return None
+        if content is None:
+            return None
+        data = self._json_decoder.loads(content)
+        self._store_response(api_url, data)
+        return data
 
     # Private Method to clean API data
     def _clean_api_data(self, api_url):
-        raw_data = self._get_api_data(api_url)
+        return self._clean_chart_data(self._get_api_data(api_url))
+
+    # Private Method to clean a parsed chart API response
+    @staticmethod
+    def _clean_chart_data(raw_data, columnar=False):
         ret_obj = {}
         ret_obj.update({'eventsData': []})
         if raw_data is None:
@@ -480,13 +828,17 @@ class YahooFinanceData(object):
             ret_obj.update({'instrumentType': result['meta'].get('instrumentType', 'NA')})
             tz_sub_dict.update({'gmtOffset': result['meta']['gmtoffset']})
             ret_obj.update({'timeZone': tz_sub_dict})
+            if columnar:
+                ret_obj.update({'prices': PriceColumns.from_chart_result(result)})
+                continue
             timestamp_list = result['timestamp']
             high_price_list = result['indicators']['quote'][0]['high']
             low_price_list = result['indicators']['quote'][0]['low']
             open_price_list = result['indicators']['quote'][0]['open']
             close_price_list = result['indicators']['quote'][0]['close']
             volume_list = result['indicators']['quote'][0]['volume']
-            adj_close_list = result['indicators']['adjclose'][0]['adjclose']
+            # Intraday responses have no adjusted close
+            adj_close_list = (result['indicators'].get('adjclose') or [{}])[0].get('adjclose') or close_price_list
             i = 0
             prices_list = []
             for timestamp in timestamp_list:
@@ -503,22 +855,150 @@ class YahooFinanceData(object):
             ret_obj.update({'prices': prices_list})
         return ret_obj
 
-    # Private Method to Handle Recursive API Request
-    def _recursive_api_request(self, hist_obj, up_ticker, clean=True, i=0):
+    # Public method to build the history request of a date range, intraday windows start no earlier than Yahoo serves
+    def get_history_obj(self, start_date, end_date, time_interval):
+        interval_code = self.get_time_code(time_interval)
+        start = self.format_date(start_date)
+        end = self.format_date(end_date)
+        if interval_code in self._INTRADAY_LIMITS:
+            # Yahoo rejects intraday requests reaching further back than the interval's lookback
+            lookback_start = int(time.time()) - self._INTRADAY_LIMITS[interval_code][1] * 86400 + 60
+            start = min(max(start, lookback_start), end)
+        return {'start': start, 'end': end, 'interval': interval_code}
+
+    # Private method to determine if the prices of an interval are returned as PriceColumns
+    def _use_columnar_prices(self, interval):
+        if self.columnar_prices is None:
+            return interval in self._INTRADAY_LIMITS
+        return self.columnar_prices
+
+    # Private method to split a history request into the windows of the chart requests fetching it
+    def _get_chart_chunks(self, hist_obj):
+        limits = self._INTRADAY_LIMITS.get(hist_obj['interval'])
+        if limits is None:
+            return [hist_obj]
+        chunk_seconds = limits[0] * 86400
+        return [dict(hist_obj, start=s, end=min(s + chunk_seconds, hist_obj['end']))
+                for s in range(hist_obj['start'], hist_obj['end'], chunk_seconds)] or [hist_obj]
+
+    # Private static method to join the chart API results of consecutive windows, bars repeated at the boundaries
+    # are kept once. Returns None if a window failed, a gapped series is never returned as complete
+    @staticmethod
+    def _stitch_chart_data(raw_responses):
+        if not raw_responses or any(r is None for r in raw_responses):
+            return None
+        # Windows without any trading day have no result
+        results = [r['chart']['result'][0] for r in raw_responses if r['chart'].get('result')]
+        if not results:
+            return raw_responses[0]
+        fields = ('open', 'high', 'low', 'close', 'volume', 'adjclose')
+        timestamps, columns, events = [], {f: [] for f in fields}, {}
+        for result in results:
+            result_timestamps = result.get('timestamp') or []
+            # Skip the bars the previous window already returned
+            first = len(result_timestamps)
+            for i, timestamp in enumerate(result_timestamps):
+                if not timestamps or timestamp > timestamps[-1]:
+                    first = i
+                    break
+            quote = result['indicators']['quote'][0]
+            result_columns = {f: quote.get(f) or [None] * len(result_timestamps) for f in fields[:-1]}
+            # Intraday responses have no adjusted close
+            result_columns['adjclose'] = (result['indicators'].get('adjclose') or [{}])[0].get('adjclose') or \
+                result_columns['close']
+            timestamps.extend(result_timestamps[first:])
+            for field in fields:
+                columns[field].extend(result_columns[field][first:])
+            for event_type, event_data in (result.get('events') or {}).items():
+                events.setdefault(event_type, {}).update(event_data)
+        stitched = dict(results[-1], timestamp=timestamps, events=events)
+        stitched['indicators'] = {'quote': [{f: columns[f] for f in fields[:-1]}],
+                                  'adjclose': [{'adjclose': columns['adjclose']}]}
+        return {'chart': {'result': [stitched], 'error': None}}
+
+    # Private method to fetch the chart API data of a window, intraday windows longer than one request allows are
+    # fetched in chunks in parallel, each under the rate limiter, and stitched together
+    def _get_chart_range(self, hist_obj, up_ticker, v="2"):
+        url = self._build_api_url(hist_obj, up_ticker, v)
+        chunks = self._get_chart_chunks(hist_obj)
+        if len(chunks) < 2 and hist_obj['interval'] not in self._INTRADAY_LIMITS:
+            return self._get_api_data(url)
+        data = self._cache.get(url)
+        if data:
+            return data
+        chunk_urls = [self._build_api_url(chunk, up_ticker, v) for chunk in chunks]
+        fetch = partial(self._call_with_deadline, self._get_api_data, get_current_deadline())
+        raw_responses = list(self._get_chunk_executor().map(fetch, chunk_urls))
+        return self._cache_chart_range(url, up_ticker, chunk_urls, raw_responses)
+
+    # Private method to cache the stitched chunks of a window under its url. If a chunk failed nothing is stitched,
+    # the chunks that succeeded stay cached so a retry only requests the failed ones
+    def _cache_chart_range(self, url, up_ticker, chunk_urls, raw_responses):
+        data = self._stitch_chart_data(raw_responses)
+        if data is None:
+            logging.warning("yahoofinancials ticker: %s failed to get %d of %d chart windows of %s", str(up_ticker),
+                            sum(r is None for r in raw_responses), len(raw_responses), url)
+            return None
+        for chunk_url in chunk_urls:
+            self._cache.pop(chunk_url, None)
+        self._cache[url] = data
+        return data
+
+    # Private Method to get the chart API data of a history request, from the price history cache when enabled
+    def _get_chart_data(self, hist_obj, up_ticker, v="2"):
+        if self._history_cache is None or not self._history_cache.ready():
+            return self._get_chart_range(hist_obj, up_ticker, v)
+        return self._get_incremental_chart_data(hist_obj, up_ticker, v)
+
+    # Private Method to download only the ranges of a history request missing from the price history cache
+    def _get_incremental_chart_data(self, hist_obj, up_ticker, v, reload=True):
+        store = self._history_cache
+        interval = hist_obj['interval']
+        had_range = store.has_range(up_ticker, interval)
+        # Bars of the period still in progress are stored but not marked as held, so they are fetched again
+        complete_end = int(time.time()) - self._INTERVAL_SECONDS.get(interval, 86400)
+        raw_data = None
+        for gap_start, gap_end in store.missing_ranges(up_ticker, interval, hist_obj['start'], hist_obj['end']):
+            gap_obj = {'start': gap_start, 'end': gap_end, 'interval': interval}
+            raw_data = self._get_chart_range(gap_obj, up_ticker, v)
+            self._cache.pop(self._build_api_url(gap_obj, up_ticker, v), None)
+            if raw_data is None:
+                return None
+            if not raw_data['chart'].get('result'):
+                # Yahoo answers a gap without any trading day with an error, it is fetched again next time
+                continue
+            result = raw_data['chart']['result'][0]
+            events = result.get('events', {})
+            if reload and had_range and (events.get('dividends') or events.get('splits')):
+                # A new dividend or split changes the adjusted close of every held bar, so start over
+                store.clear(up_ticker, interval)
+                return self._get_incremental_chart_data(hist_obj, up_ticker, v, False)
+            store.store(up_ticker, interval, gap_start, min(gap_end, complete_end), result)
+        result = store.load(up_ticker, interval, hist_obj['start'], hist_obj['end'])
+        if not result['meta']:
+            # Nothing is held for the symbol yet, e.g. the request only covers the period still in progress
+            return raw_data
+        return {'chart': {'result': [result], 'error': None}}
+
+    # Private Method to Handle Recursive API Request, incomplete chart data is fetched again under the retry policy
+    def _recursive_api_request(self, hist_obj, up_ticker, clean=True):
         v = "2"
+        retry = self._retry_policy.start()
+        re_data = None
+        while True:
+            raw_data = self._get_chart_data(hist_obj, up_ticker, v)
+            if clean:
+                re_data = self._clean_chart_data(raw_data, self._use_columnar_prices(hist_obj['interval']))
+                cleaned_re_data = self._clean_historical_data(re_data)
+                if cleaned_re_data is not None:
+                    return cleaned_re_data
+            elif raw_data is not None:
+                return raw_data
+            # Failed requests were already retried, only an incomplete response is requested again
+            if raw_data is None or not retry.wait():
+                break
+            self._cache.pop(self._build_api_url(hist_obj, up_ticker, v), None)
         if clean:
-            re_data = self._clean_api_data(self._build_api_url(hist_obj, up_ticker, v))
-            cleaned_re_data = self._clean_historical_data(re_data)
-            if cleaned_re_data is not None:
-                return cleaned_re_data
-        else:
-            re_data = self._get_api_data(self._build_api_url(hist_obj, up_ticker, v))
-            if re_data is not None:
-                return re_data
-        if i < 6:
-            i += 1
-            return self._recursive_api_request(hist_obj, up_ticker, clean, i)
-        elif clean:
             return self._clean_historical_data(re_data, True)
 
     # Private Method to take scrapped data and build a data dictionary with, used by get_stock_data()
@@ -529,47 +1009,317 @@ class YahooFinanceData(object):
             except KeyError:
                 cleaned_re_data = None
             return {up_ticker: cleaned_re_data}
+        elif statement_type == 'modules':
+            return {up_ticker: self._get_modules_data(up_ticker, tech_type)}
+        elif statement_type == 'line_items':
+            return {up_ticker: self._get_line_items_data(up_ticker, tech_type, hist_obj)}
         else:
-            dict_ent = {}
-            params = {}
-            r_map = get_request_config(tech_type, REQUEST_MAP)
-            r_cat = None
-            if statement_type != 'analytic':
-                r_cat = get_request_category(tech_type, self.YAHOO_FINANCIAL_TYPES, statement_type)
-            YAHOO_URL = self._construct_url(
-                up_ticker.lower(),
-                r_map,
-                params,
-                hist_obj.get("interval"),
-                r_cat
-            )
-            if tech_type == '' and statement_type != 'history':
-                try:
-                    re_data = self._get_historical_data(YAHOO_URL, REQUEST_MAP['fundamentals'], tech_type,
-                                                        statement_type)
-                    dict_ent = {up_ticker: re_data, 'dataType': report_name}
-                except KeyError:
-                    re_data = None
-                    dict_ent = {up_ticker: re_data, 'dataType': report_name}
-            elif tech_type != '' and statement_type != 'history':
-                r_map = get_request_config(tech_type, REQUEST_MAP)
-                try:
-                    re_data = self._get_historical_data(YAHOO_URL, r_map, tech_type, statement_type)
-                except KeyError:
-                    re_data = None
-                dict_ent = {up_ticker: re_data}
-            return dict_ent
+            YAHOO_URL, r_map = self._get_request_url(up_ticker, statement_type, tech_type, hist_obj)
+            try:
+                re_data = self._get_historical_data(YAHOO_URL, r_map, tech_type, statement_type)
+            except KeyError:
+                re_data = None
+            return self._get_dict_ent(up_ticker, tech_type, report_name, re_data)
+
+    # Private method to build the request url and config for a statement, module or analytic request
+    def _get_request_url(self, up_ticker, statement_type, tech_type, hist_obj):
+        r_map = get_request_config(tech_type, REQUEST_MAP)
+        r_cat = None
+        if statement_type != 'analytic':
+            r_cat = get_request_category(tech_type, self.YAHOO_FINANCIAL_TYPES, statement_type)
+        url = self._construct_url(up_ticker.lower(), r_map, {}, hist_obj.get("interval"), r_cat)
+        return url, r_map
+
+    # Private method to return the single module quoteSummary urls used as cache keys by the module getters
+    def _get_module_urls(self, up_ticker, modules):
+        return {m: self._get_request_url(up_ticker, 'modules', m, {})[0] for m in modules}
+
+    # Private method to return the url fetching several quoteSummary modules in one request
+    def _get_modules_url(self, up_ticker, modules):
+        return self._construct_url(up_ticker.lower(), REQUEST_MAP['quoteSummary'], {}, None, modules)
+
+    # Private method to split a multi module quoteSummary response into the per module cache entries
+    def _cache_module_data(self, module_urls, raw_data):
+        results = (raw_data or {}).get("result") or [{}]
+        module_responses = {}
+        for module, url in module_urls.items():
+            module_data = results[0].get(module)
+            if module_data is not None:
+                module_responses[module] = self._cache[url] = {'result': [{module: module_data}], 'error': None}
+        return module_responses
+
+    # Private method to return the per module data of a ticker from the fetched responses or the module caches
+    def _get_cached_module_data(self, module_urls, module_responses=None):
+        data = {}
+        for module, url in module_urls.items():
+            raw_data = (module_responses or {}).get(module) or self._cache.get(url)
+            if raw_data:
+                data.update({module: self._format_raw_module_data(raw_data, module)})
+            else:
+                data.update({module: None})
+        return data
+
+    # Private method to fetch the uncached modules of a ticker with one quoteSummary request
+    def _get_modules_data(self, up_ticker, modules):
+        module_urls = self._get_module_urls(up_ticker, modules)
+        missing = {m: url for m, url in module_urls.items() if not self._cache.get(url)}
+        module_responses = None
+        if missing:
+            modules_url = self._get_modules_url(up_ticker, list(missing))
+            raw_data = self._request_handler(modules_url, REQUEST_MAP['quoteSummary'].get("response_field"))
+            self._cache.pop(modules_url, None)
+            module_responses = self._cache_module_data(missing, raw_data)
+        return self._get_cached_module_data(module_urls, module_responses)
+
+    # Private static method to map the timeseries type key of each result of fundamentals timeseries responses to it
+    @staticmethod
+    def _get_type_results(raw_responses):
+        results = {}
+        for raw_data in raw_responses:
+            for result in (raw_data or {}).get("result") or []:
+                for type_key in (result.get("meta") or {}).get("type") or []:
+                    results[type_key] = result
+        return results
+
+    # Private method to return the fundamentals timeseries type keys of a statement type
+    def _get_statement_types(self, statement_type, frequency):
+        r_cat = get_request_category('', self.YAHOO_FINANCIAL_TYPES, statement_type)
+        return REQUEST_MAP['fundamentals']['request']['type']['options'][r_cat].get(frequency) or []
+
+    # Private method to return the urls requesting the type keys of several statements, as few as possible while each
+    # stays under max_url_length
+    def _get_statements_urls(self, up_ticker, type_keys):
+        r_map = REQUEST_MAP['fundamentals']
+        base_length = len(self._construct_url(up_ticker.lower(), r_map, {"type": ["x"]}, None, None)) - 1
+        chunks, chunk, length = [], [], base_length
+        for type_key in type_keys:
+            if chunk and length + len(type_key) > self.max_url_length:
+                chunks.append(chunk)
+                chunk, length = [], base_length
+            chunk.append(type_key)
+            length += len(type_key) + 3  # %2C separator
+        if chunk:
+            chunks.append(chunk)
+        return [self._construct_url(up_ticker.lower(), r_map, {"type": c}, None, None) for c in chunks]
+
+    # Private method to return the statement urls of a ticker missing from the caches, with their type keys and the
+    # merged urls requesting them, or None if fewer than two statements are missing
+    def _get_statements_request(self, up_ticker, statement_types, frequency):
+        hist_obj = {"interval": frequency}
+        missing = {}
+        for statement_type in statement_types:
+            url = self._get_request_url(up_ticker, statement_type, '', hist_obj)[0]
+            if not self._cache.get(url) and self._load_stored_response(url) is None:
+                missing[url] = self._get_statement_types(statement_type, frequency)
+        if len(missing) < 2:
+            return None
+        type_keys = list(dict.fromkeys(t for types in missing.values() for t in types))
+        return missing, self._get_statements_urls(up_ticker, type_keys)
+
+    # Private method to split merged statement responses into the response each statement url would have returned
+    def _cache_statement_data(self, missing, raw_responses):
+        results = self._get_type_results(raw_responses)
+        for url, type_keys in missing.items():
+            data = {'result': [results[t] for t in type_keys if t in results], 'error': None}
+            self._cache[url] = data
+            self._store_response(url, data)
+
+    # Private method to fetch several statements of a ticker with merged timeseries requests, the statements are then
+    # served from the cache as if requested one by one
+    def _prefetch_statements_data(self, up_ticker, statement_types, frequency):
+        request = self._get_statements_request(up_ticker, statement_types, frequency)
+        if request is None:
+            return
+        missing, urls = request
+        raw_responses = []
+        try:
+            for url in urls:
+                raw_responses.append(self._request_handler(url, REQUEST_MAP['fundamentals'].get("response_field")))
+                self._cache.pop(url, None)
+        except (ManagedException, DeadlineExceeded, KeyError) as e:
+            # The statements are requested one by one instead
+            logging.info("yahoofinancials ticker: %s error getting merged statements - %s", str(up_ticker), str(e))
+            return
+        self._cache_statement_data(missing, raw_responses)
+
+    # Private method to fetch the statements of every ticker with merged requests, used when several are requested
+    def _prefetch_statements(self, statement_types, frequency):
+        statement_types = [s for s in statement_types if s in ('income', 'balance', 'cash')]
+        func = partial(self._prefetch_statements_data, statement_types=statement_types, frequency=frequency)
+        if isinstance(self.ticker, str):
+            func(self.ticker)
+        elif self.concurrent:
+            self._map_tickers(func)
+        else:
+            for tick in self.ticker:
+                func(tick)
 
+    # Private method to return the single line item timeseries urls used as cache keys of each line item
+    def _get_line_item_urls(self, up_ticker, type_keys, hist_obj):
+        return {t: self._get_line_items_url(up_ticker, [t], hist_obj) for t in type_keys}
+
+    # Private method to return the url fetching several line items in one timeseries request
+    def _get_line_items_url(self, up_ticker, type_keys, hist_obj):
+        r_map = REQUEST_MAP['fundamentals']
+        params = {"type": type_keys}
+        if hist_obj.get("latest"):
+            period2 = get_period2()
+            params.update({"period1": period2 - self._LATEST_PERIOD_SECONDS[hist_obj['interval']], "period2": period2})
+        return self._construct_url(up_ticker.lower(), r_map, params, None, None)
+
+    # Private method to split a multi line item timeseries response into the per line item cache entries, line items
+    # missing from the response are cached empty so they are not requested again
+    def _cache_line_item_data(self, item_urls, raw_data):
+        if raw_data is None:
+            return {}
+        results = self._get_type_results([raw_data])
+        item_responses = {}
+        for type_key, url in item_urls.items():
+            item_result = [results[type_key]] if type_key in results else []
+            item_responses[type_key] = self._cache[url] = {'result': item_result, 'error': None}
+        return item_responses
+
+    # Private method to return the line items of a ticker by period from the fetched responses or the line item caches
+    def _get_cached_line_item_data(self, item_urls, item_responses=None):
+        results = []
+        for type_key, url in item_urls.items():
+            raw_data = (item_responses or {}).get(type_key) or self._cache.get(url)
+            if raw_data:
+                results.extend(raw_data.get("result") or [])
+        data = self._format_raw_fundamental_data({'result': results})
+        return {date: data[date] for date in sorted(data, key=str)}
+
+    # Private method to fetch the uncached line items of a ticker with one timeseries request
+    def _get_line_items_data(self, up_ticker, type_keys, hist_obj):
+        item_urls = self._get_line_item_urls(up_ticker, type_keys, hist_obj)
+        missing = {t: url for t, url in item_urls.items() if not self._cache.get(url)}
+        item_responses = None
+        if missing:
+            items_url = self._get_line_items_url(up_ticker, list(missing), hist_obj)
+            raw_data = self._request_handler(items_url, REQUEST_MAP['fundamentals'].get("response_field"))
+            self._cache.pop(items_url, None)
+            item_responses = self._cache_line_item_data(missing, raw_data)
+        return self._get_cached_line_item_data(item_urls, item_responses)
+
+    # Private static method to keep the value of the most recent period of each line item
+    @staticmethod
+    def _get_latest_line_items(raw_data):
+        latest_data = {}
+        for tick, periods in raw_data.items():
+            if periods is None:
+                latest_data.update({tick: None})
+                continue
+            latest = {}
+            for date_key in periods:
+                latest.update({k: v for k, v in periods[date_key].items() if v is not None})
+            latest_data.update({tick: latest})
+        return latest_data
+
+    # Private static method to keep the line items of the first period, the baseline period the single field statement
+    # getters read
+    @staticmethod
+    def _get_first_line_items(raw_data):
+        first_data = {}
+        for tick, periods in raw_data.items():
+            if periods is None:
+                first_data.update({tick: None})
+                continue
+            first_data.update({tick: next(iter(periods.values()), {})})
+        return first_data
+
+    # Private method to clean the per module data of each ticker the same way the module getters do
+    def _clean_modules_data(self, raw_data):
+        cleaned_data = {}
+        for tick, modules_data in raw_data.items():
+            if modules_data is None:
+                cleaned_data.update({tick: None})
+                continue
+            cleaned_modules = {}
+            for module, module_data in modules_data.items():
+                report_type = self._MODULE_REPORT_TYPES.get(module)
+                if report_type is not None:
+                    module_data = self._clean_data_process(module, report_type, modules_data)
+                cleaned_modules.update({module: module_data})
+            cleaned_data.update({tick: cleaned_modules})
+        return cleaned_data
+
+    # Private static method to build the data dictionary entry returned for a ticker
+    @staticmethod
+    def _get_dict_ent(up_ticker, tech_type, report_name, re_data):
+        if tech_type == '':
+            return {up_ticker: re_data, 'dataType': report_name}
+        return {up_ticker: re_data}
+
+    # Private method to build a data dictionary entry, unexpected errors are retried under the retry policy
     def _retry_create_dict_ent(self, up_ticker, statement_type, tech_type, report_name, hist_obj):
-        i = 0
-        while i < 250:
+        retry = self._retry_policy.start()
+        if retry.expired():
+            self._add_ticker_error(up_ticker, DeadlineExceeded("deadline exceeded"))
+            return self._get_dict_ent(up_ticker, tech_type, report_name, None)
+        while True:
             try:
-                out = self._create_dict_ent(up_ticker, statement_type, tech_type, report_name, hist_obj)
-                return out
-            except:
-                time.sleep(random.randint(2, 10))
-                i += 1
-                continue
+                return self._create_dict_ent(up_ticker, statement_type, tech_type, report_name, hist_obj)
+            except ManagedException as e:
+                # The request already used up its retry policy
+                error = e
+                break
+            except Exception as e:
+                error = e
+                if not retry.wait():
+                    break
+        logging.info("yahoofinancials ticker: %s error getting %s - %s\n\tContinuing extraction...",
+                     str(up_ticker), statement_type, str(error))
+        self._add_ticker_error(up_ticker, error)
+        return self._get_dict_ent(up_ticker, tech_type, report_name, None)
+
+    # Private method to pick a single field out of per ticker report data
+    def _get_report_field(self, report_data, data_field):
+        if isinstance(self.ticker, str):
+            if report_data[self.ticker] is None:
+                return None
+            return report_data[self.ticker].get(data_field)
+        else:
+            ret_obj = {}
+            for tick in self.ticker:
+                if report_data[tick] is None:
+                    ret_obj.update({tick: None})
+                else:
+                    ret_obj.update({tick: report_data[tick].get(data_field)})
+            return ret_obj
+
+    # Private method to pick a field of the most recent period out of reformatted statement data
+    def _get_stmt_field(self, re_data, field_name):
+        if isinstance(self.ticker, str):
+            try:
+                date_key = re_data[self.ticker][0].keys()[0]
+            except (IndexError, AttributeError, TypeError):
+                date_key = list(re_data[self.ticker][0])[0]
+            data = re_data[self.ticker][0][date_key].get(field_name)
+        else:
+            data = {}
+            for tick in self.ticker:
+                try:
+                    date_key = re_data[tick][0].keys()[0]
+                except:
+                    try:
+                        date_key = list(re_data[tick][0].keys())[0]
+                    except:
+                        date_key = None
+                if date_key is not None:
+                    sub_data = re_data[tick][0][date_key][field_name]
+                    data.update({tick: sub_data})
+                else:
+                    data.update({tick: None})
+        return data
+
+    # Private method to apply a calculation to per ticker values
+    def _calc_ticker_values(self, calc_func, *values):
+        if isinstance(self.ticker, str):
+            return calc_func(*values)
+        ret_obj = {}
+        for tick in self.ticker:
+            ret_obj.update({tick: calc_func(*[value[tick] for value in values])})
+        return ret_obj
 
     # Private method to return the stmt_id for the reformat_process
     def _get_stmt_id(self, statement_type, raw_data):
@@ -609,18 +1359,124 @@ class YahooFinanceData(object):
     # Private Method to return subdict entry for the statement reformat process
     def _get_sub_dict_ent(self, ticker, raw_data):
         if self.flat_format:
-            form_data_dict = self._reformat_stmt_data_process_flat(raw_data[ticker])
+            form_data_dict = self._reformat_stmt_data_process_flat(raw_data.get(ticker))
             return {ticker: form_data_dict}
-        form_data_list = self._reformat_stmt_data_process(raw_data[ticker])
+        form_data_list = self._reformat_stmt_data_process(raw_data.get(ticker))
         return {ticker: form_data_list}
 
+    # Private method to build the multi symbol quote urls, quote_chunk_size symbols per url
+    def _get_quote_urls(self):
+        tickers = [self.ticker] if isinstance(self.ticker, str) else self.ticker
+        country_ent = COUNTRY_MAP.get(self.country.upper())
+        meta_str = '&formatted=false&lang=' + country_ent.get("lang", "en-US") + '&region=' + \
+                   country_ent.get("region", "US")
+        urls = []
+        for i in range(0, len(tickers), self.quote_chunk_size):
+            symbols = ",".join([quote(t, safe='') for t in tickers[i:i + self.quote_chunk_size]])
+            urls.append(REQUEST_MAP['quote']['path'] + '?symbols=' + symbols + meta_str)
+        return urls
+
+    # Private method to map multi symbol quote responses onto the keys of a quoteSummary module
+    def _get_quote_report(self, responses, report):
+        quotes = {}
+        for response in responses:
+            for quote_ent in (response or {}).get("result") or []:
+                quotes.update({quote_ent.get("symbol", "").upper(): quote_ent})
+        tickers = [self.ticker] if isinstance(self.ticker, str) else self.ticker
+        report_data = {}
+        for tick in tickers:
+            quote_ent = quotes.get(tick)
+            if quote_ent is None:
+                report_data.update({tick: None})
+                continue
+            module_data = {}
+            for key, (quote_key, scale) in QUOTE_FIELD_MAP[report].items():
+                value = quote_ent.get(quote_key)
+                if value is None:
+                    continue
+                if scale != 1 and isinstance(value, (int, float)):
+                    value = value * scale
+                module_data.update({key: value})
+            report_data.update({tick: module_data})
+        return report_data
+
+    # Private method to determine if a field getter should be served by the multi symbol quote endpoint,
+    # modules already fetched for every ticker, e.g. by get_modules(), are used instead
+    def _use_quote_data(self, report, data_field):
+        if not self.batch_quotes or isinstance(self.ticker, str) or data_field not in QUOTE_FIELD_MAP[report]:
+            return False
+        return not all(self._cache.get(self._get_module_urls(tick, [report])[report]) for tick in self.ticker)
+
+    # Public method to get price or summaryDetail data of all tickers from the multi symbol quote endpoint
+    def get_quote_data(self, report='price'):
+        responses = []
+        for url in self._get_quote_urls():
+            responses.append(self._get_response(url, REQUEST_MAP['quote'].get("response_field")))
+        return self.get_clean_data(self._get_quote_report(responses, report), report)
+
+    # Private static method to validate a list of quoteSummary module names
+    @staticmethod
+    def _check_modules(modules):
+        if isinstance(modules, str):
+            modules = [modules]
+        for module in modules:
+            if module not in MODULES_MAP:
+                raise ValueError("invalid module: " + str(module))
+        return list(modules)
+
+    # Public method to get several quoteSummary modules with one request per ticker
+    def get_modules_data(self, modules):
+        data = self.get_stock_data(statement_type='modules', tech_type=self._check_modules(modules))
+        if not isinstance(self.ticker, str):
+            for tick in self.ticker:
+                data.setdefault(tick, None)
+        return data
+
+    # Private class method to return the fundamentals timeseries type key of each line item field of a frequency
+    @classmethod
+    def _get_line_item_types(cls, frequency):
+        if frequency not in FUNDAMENTALS_TIME_MAP:
+            raise ValueError("invalid frequency: " + str(frequency))
+        types = cls._LINE_ITEM_TYPES.get(frequency)
+        if types is None:
+            types = {}
+            for stmt_types in FUNDAMENTALS_MAP.values():
+                for type_key in stmt_types.get(frequency, []):
+                    types.setdefault(get_fundamental_field(type_key), type_key)
+            cls._LINE_ITEM_TYPES[frequency] = types
+        return types
+
+    # Private class method to validate a list of line item fields and return their timeseries type keys
+    @classmethod
+    def _check_line_items(cls, fields, frequency):
+        if isinstance(fields, str):
+            fields = [fields]
+        types = cls._get_line_item_types(frequency)
+        for field in fields:
+            if field not in types:
+                raise ValueError("invalid line item: " + str(field))
+        return [types[field] for field in fields]
+
+    # Public method to get statement line items by period with one small timeseries request per ticker
+    def get_line_items_data(self, fields, frequency='annual', latest=False):
+        hist_obj = {'interval': frequency, 'latest': latest}
+        data = self.get_stock_data(statement_type='line_items', tech_type=self._check_line_items(fields, frequency),
+                                   hist_obj=hist_obj)
+        if not isinstance(self.ticker, str):
+            for tick in self.ticker:
+                data.setdefault(tick, None)
+        return data
+
     # Public method to get time interval code
     def get_time_code(self, time_interval):
         interval_code = self._INTERVAL_DICT[time_interval.lower()]
         return interval_code
 
     # Public Method to get stock data
-    def get_stock_data(self, statement_type='income', tech_type='', report_name='', hist_obj={}):
+    def get_stock_data(self, statement_type='income', tech_type='', report_name='', hist_obj={}, deadline=None):
+        if deadline is not None:
+            with self.deadline(deadline):
+                return self.get_stock_data(statement_type, tech_type, report_name, hist_obj)
         data = {}
         if statement_type == 'income' and tech_type == '' and report_name == '':  # temp, so this method doesn't return nulls
             statement_type = 'profile'
@@ -631,27 +1487,59 @@ class YahooFinanceData(object):
             data.update(dict_ent)
         else:
             if self.concurrent:
-                with Pool(self._get_worker_count()) as pool:
-                    dict_ents = pool.map(partial(self._retry_create_dict_ent,
-                                                 statement_type=statement_type,
-                                                 tech_type=tech_type,
-                                                 report_name=report_name,
-                                                 hist_obj=hist_obj), self.ticker)
-                    for dict_ent in dict_ents:
-                        data.update(dict_ent)
-                    pool.close()
-                    pool.join()
+                dict_ents = self._map_tickers(partial(self._retry_create_dict_ent,
+                                                      statement_type=statement_type,
+                                                      tech_type=tech_type,
+                                                      report_name=report_name,
+                                                      hist_obj=hist_obj))
+                for dict_ent in dict_ents:
+                    data.update(dict_ent)
             else:
+                budget = get_current_deadline()
                 for tick in self.ticker:
+                    if budget is not None and budget.expired():
+                        # Partial results, the remaining tickers are mapped to None and recorded in the errors of the
+                        # deadline
+                        self._add_ticker_error(tick, DeadlineExceeded("deadline exceeded"))
+                        data.update(self._get_dict_ent(tick, tech_type, report_name, None))
+                        continue
                     try:
                         dict_ent = self._create_dict_ent(tick, statement_type, tech_type, report_name, hist_obj)
                         data.update(dict_ent)
-                    except ManagedException:
+                    except (ManagedException, DeadlineExceeded) as e:
                         logging.info("yahoofinancials ticker: %s error getting %s - %s\n\tContinuing extraction...",
-                                     str(tick), statement_type, str(ManagedException))
-                        continue
+                                     str(tick), statement_type, str(e))
+                        self._add_ticker_error(tick, e)
+                        data.update(self._get_dict_ent(tick, tech_type, report_name, None))
         return data
 
+    # Private method to return the chart API result or the fundamentals timeseries response of a ticker
+    def _get_raw_ent(self, up_ticker, statement_type, hist_obj):
+        if statement_type == 'history':
+            raw_data = self._get_chart_data(hist_obj, up_ticker)
+            try:
+                return raw_data['chart']['result'][0]
+            except (KeyError, IndexError, TypeError):
+                return None
+        url, r_map = self._get_request_url(up_ticker, statement_type, '', hist_obj)
+        try:
+            return self._get_response(url, r_map.get("response_field"))
+        except KeyError:
+            return None
+        except ManagedException as e:
+            logging.warning("yahoofinancials ticker: %s error: %s", str(up_ticker), str(e))
+            self._add_ticker_error(up_ticker, e)
+            return None
+
+    # Private method to return the unformatted responses of each ticker, used by the DataFrame and Arrow exports
+    def _get_raw_data(self, statement_type, hist_obj):
+        func = partial(self._get_raw_ent, statement_type=statement_type, hist_obj=hist_obj)
+        if isinstance(self.ticker, str):
+            return {self.ticker: func(self.ticker)}
+        if self.concurrent:
+            return dict(zip(self.ticker, self._map_tickers(func)))
+        return {tick: func(tick) for tick in self.ticker}
+
     # Public Method to get technical stock data
     def get_stock_tech_data(self, tech_type):
         if tech_type == 'defaultKeyStatistics':
@@ -669,18 +1557,10 @@ class YahooFinanceData(object):
             dict_ent = {data_type: sub_dict}
             data_dict.update(dict_ent)
         else:
-            if self.concurrent:
-                with Pool(self._get_worker_count()) as pool:
-                    sub_dict_ents = pool.map(partial(self._get_sub_dict_ent,
-                                                     raw_data=raw_data), self.ticker)
-                    for dict_ent in sub_dict_ents:
-                        sub_dict.update(dict_ent)
-                    pool.close()
-                    pool.join()
-            else:
-                for tick in self.ticker:
-                    sub_dict_ent = self._get_sub_dict_ent(tick, raw_data)
-                    sub_dict.update(sub_dict_ent)
+            # Reformatting is CPU-light, so it always runs in the calling thread
+            for tick in self.ticker:
+                sub_dict_ent = self._get_sub_dict_ent(tick, raw_data)
+                sub_dict.update(sub_dict_ent)
             dict_ent = {data_type: sub_dict}
             data_dict.update(dict_ent)
         return data_dict
@@ -706,32 +1586,26 @@ class YahooFinanceData(object):
             cleaned_data = self._clean_data_process(self.ticker, report_type, raw_report_data)
             cleaned_data_dict.update({self.ticker: cleaned_data})
         else:
-            if self.concurrent:
-                with Pool(self._get_worker_count()) as pool:
-                    cleaned_data_list = pool.map(partial(self._clean_data_process,
-                                                         report_type=report_type,
-                                                         raw_report_data=raw_report_data), self.ticker)
-                    for idx, cleaned_data in enumerate(cleaned_data_list):
-                        cleaned_data_dict.update({self.ticker[idx]: cleaned_data})
-                    pool.close()
-                    pool.join()
-            else:
-                for tick in self.ticker:
-                    cleaned_data = self._clean_data_process(tick, report_type, raw_report_data)
-                    cleaned_data_dict.update({tick: cleaned_data})
+            # Cleaning is CPU-light, so it always runs in the calling thread
+            for tick in self.ticker:
+                cleaned_data = self._clean_data_process(tick, report_type, raw_report_data)
+                cleaned_data_dict.update({tick: cleaned_data})
         return cleaned_data_dict
 
     # Private method to handle dividend data requests
     def _handle_api_dividend_request(self, cur_ticker, start, end, interval):
-        re_dividends = []
         hist_obj = {"start": start, "end": end, "interval": interval}
-        div_dict = self._recursive_api_request(hist_obj, cur_ticker, False)['chart']['result'][0]['events']['dividends']
+        return self._get_dividends(self._recursive_api_request(hist_obj, cur_ticker, False))
+
+    # Private method to extract the sorted dividends from a parsed chart API response
+    def _get_dividends(self, raw_data):
+        re_dividends = []
+        div_dict = raw_data['chart']['result'][0]['events']['dividends']
         for div_time_key, div_obj in div_dict.items():
-            dividend_obj = {
-                'date': div_obj['date'],
-                'formatted_date': self.format_date(int(div_obj['date'])),
-                'amount': div_obj.get('amount', None)
-            }
+            dividend_obj = {'date': div_obj['date']}
+            if self.format_dates:
+                dividend_obj['formatted_date'] = self.format_date(int(div_obj['date']))
+            dividend_obj['amount'] = div_obj.get('amount', None)
             re_dividends.append(dividend_obj)
         return sorted(re_dividends, key=lambda div: div['date'])
 
@@ -746,15 +1620,12 @@ class YahooFinanceData(object):
         else:
             re_data = {}
             if self.concurrent:
-                with Pool(self._get_worker_count()) as pool:
-                    div_data_list = pool.map(partial(self._handle_api_dividend_request,
-                                                     start=start,
-                                                     end=end,
-                                                     interval=interval_code), self.ticker)
-                    for idx, div_data in enumerate(div_data_list):
-                        re_data.update({self.ticker[idx]: div_data})
-                    pool.close()
-                    pool.join()
+                div_data_list = self._map_tickers(partial(self._handle_api_dividend_request,
+                                                          start=start,
+                                                          end=end,
+                                                          interval=interval_code))
+                for idx, div_data in enumerate(div_data_list):
+                    re_data.update({self.ticker[idx]: div_data})
             else:
                 for tick in self.ticker:
                     try:
@@ -0,0 +1,54 @@
+import datetime
+from functools import lru_cache
+
+from yahoofinancials.utils import lazy_import
+
+np = lazy_import("numpy", optional=True)
+pytz = lazy_import("pytz")
+
+_EPOCH_DATE = datetime.date(1970, 1, 1)
+_DAY_SECONDS = 86400
+
+# 'YYYY-MM-DD' string of each day since the epoch formatted so far, cleared once it holds _MAX_DAY_STRINGS days
+_day_strings = {}
+_MAX_DAY_STRINGS = 1 << 16
+
+
+def format_epoch_date(timestamp):
+    """Returns the 'YYYY-MM-DD' UTC date of an epoch timestamp, the string of each day is only built once"""
+    day = int(timestamp // _DAY_SECONDS)
+    date = _day_strings.get(day)
+    if date is None:
+        if len(_day_strings) >= _MAX_DAY_STRINGS:
+            _day_strings.clear()
+        date = _day_strings[day] = str(_EPOCH_DATE + datetime.timedelta(days=day))
+    return date
+
+
+def format_epoch_dates(timestamps):
+    """
+    Returns the 'YYYY-MM-DD' UTC dates of a sequence of epoch timestamps.
+
+    NumPy arrays are converted at once with datetime64, other sequences go through the per day strings, which is
+    faster than building a NumPy array from a list since the bars of a day share one string.
+    """
+    if np is not None and isinstance(timestamps, np.ndarray):
+        return np.datetime_as_string(timestamps.astype('datetime64[s]'), unit='D').tolist()
+    return [format_epoch_date(t) for t in timestamps]
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name):
+    """Returns the pytz timezone of a name, each zone is only looked up once"""
+    return pytz.timezone(name)
+
+
+@lru_cache(maxsize=4096)
+def format_report_time(timestamp):
+    """
+    Returns the '%Y-%m-%d %H:%M:%S %Z%z' UTC time of a report *Time field, reading the local wall clock time of the
+    timestamp as US/Eastern time the way report cleaning always has. Repeated timestamps are only converted once.
+    """
+    local_time = datetime.datetime.fromtimestamp(int(timestamp))
+    eastern_time = get_timezone('US/Eastern').localize(local_time, is_dst=None)
+    return eastern_time.astimezone(pytz.utc).strftime('%Y-%m-%d %H:%M:%S %Z%z')
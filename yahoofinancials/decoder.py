@@ -0,0 +1,96 @@
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# JSON backends in order of preference for 'auto'
+DECODER_BACKENDS = ("orjson", "ujson", "json")
+
+# Leading key of a JSON object, Yahoo Finance responses hold their payload under one top level field
+_FIRST_KEY = re.compile(r'\s*\{\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+
+
+# Private function to return the loads function of a JSON backend
+def _get_backend_loads(backend):
+    if backend == "orjson" and orjson is not None:
+        return orjson.loads
+    if backend == "ujson" and ujson is not None:
+        return ujson.loads
+    if backend == "json":
+        return json.loads
+    raise ImportError("yahoofinancials: the " + str(backend) + " JSON decoder is not installed, "
+                      "install it with: pip install " + str(backend))
+
+
+class JsonDecoder(object):
+    """
+    Decodes Yahoo Finance responses straight from their body bytes.
+
+    The 'auto' backend uses orjson or ujson if one is installed, otherwise the json module of the standard library.
+    loads_field() returns only the response field holding the payload, e.g. 'quoteSummary' or 'chart'. With the
+    standard library backend it parses that field alone when it leads the response, without building the rest of it.
+
+    Arguments
+    ----------
+    backend: str or callable, default 'auto', optional
+        'auto', 'orjson', 'ujson', 'json', or a function parsing bytes or str into Python objects.
+    """
+
+    def __init__(self, backend="auto"):
+        if callable(backend):
+            self.backend = "custom"
+            self._loads = backend
+            return
+        if backend == "auto":
+            backend = next(b for b in DECODER_BACKENDS if b == "json" or globals()[b] is not None)
+        if backend not in DECODER_BACKENDS:
+            raise ValueError("invalid json decoder: " + str(backend))
+        self.backend = backend
+        self._loads = _get_backend_loads(backend)
+
+    def __getstate__(self):
+        return {'backend': self.backend if self.backend in DECODER_BACKENDS else self._loads}
+
+    def __setstate__(self, state):
+        self.__init__(state['backend'])
+
+    def loads(self, content):
+        return self._loads(content)
+
+    def loads_field(self, content, field):
+        """Returns the value of a top level field of a response body, or the whole response if field is empty"""
+        if not field:
+            return self.loads(content)
+        if self.backend == "json":
+            text = content.decode("utf-8") if isinstance(content, (bytes, bytearray)) else content
+            match = _FIRST_KEY.match(text)
+            if match is not None and match.group(1) == field:
+                try:
+                    return json.JSONDecoder().raw_decode(text, match.end())[0]
+                except ValueError:
+                    pass
+            return json.loads(text).get(field)
+        return self.loads(content).get(field)
+
+
+_default_decoder = None
+
+
+def get_json_decoder(backend=None):
+    """Returns the process wide 'auto' decoder when called without a backend, otherwise a new decoder"""
+    global _default_decoder
+    if backend is None or backend == "auto":
+        if _default_decoder is None:
+            _default_decoder = JsonDecoder()
+        return _default_decoder
+    if isinstance(backend, JsonDecoder):
+        return backend
+    return JsonDecoder(backend)
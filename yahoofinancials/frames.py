@@ -0,0 +1,123 @@
+import datetime
+
+from yahoofinancials.utils import get_fundamental_field, lazy_import
+
+pd = lazy_import("pandas", optional=True)
+pa = lazy_import("pyarrow", optional=True)
+
+# Columns of a historical price frame, in the order of the list of dicts output
+PRICE_COLUMNS = ('high', 'low', 'open', 'close', 'volume', 'adjclose')
+
+
+# Private function to raise a helpful error when an optional export dependency is missing
+def _require(module, name):
+    if module is None:
+        raise ImportError("yahoofinancials: " + name + " is required for this export, "
+                          "install it with: pip install yahoofinancials[" + name + "]")
+
+
+# Private function to return the dates and value columns of a chart API result
+def _get_chart_columns(result):
+    quote = result['indicators']['quote'][0]
+    dates = result.get('timestamp') or []
+    columns = {}
+    for field in PRICE_COLUMNS:
+        if field == 'adjclose':
+            values = (result['indicators'].get('adjclose') or [{}])[0].get('adjclose')
+        else:
+            values = quote.get(field)
+        columns[field] = values if values is not None else [None] * len(dates)
+    return dates, columns
+
+
+# Private function to return the dates and line item columns of a fundamentals timeseries response
+def _get_fundamental_columns(raw_data):
+    dates = sorted({rec.get('asOfDate') for i in raw_data.get('result') or [] for k, v in i.items()
+                    if k not in ['meta', 'timestamp'] for rec in v or []})
+    positions = {d: n for n, d in enumerate(dates)}
+    columns = {}
+    for i in raw_data.get('result') or []:
+        for k, v in i.items():
+            if k in ['meta', 'timestamp'] or not v:
+                continue
+            column = columns.setdefault(get_fundamental_field(k), [None] * len(dates))
+            for rec in v:
+                column[positions[rec.get('asOfDate')]] = rec.get('reportedValue', {}).get('raw')
+    return dates, columns
+
+
+# Private function to stack the columns of each symbol into one set of columns with a symbol column
+def _stack_columns(raw_data, get_columns):
+    symbols, dates, columns = [], [], {}
+    for symbol, data in raw_data.items():
+        if not data:
+            continue
+        sym_dates, sym_columns = get_columns(data)
+        n = len(dates)
+        for field, values in sym_columns.items():
+            column = columns.setdefault(field, [None] * n)
+            column.extend(values)
+        for column in columns.values():
+            if len(column) < n + len(sym_dates):
+                column.extend([None] * (n + len(sym_dates) - len(column)))
+        symbols.extend([symbol] * len(sym_dates))
+        dates.extend(sym_dates)
+    return symbols, dates, columns
+
+
+def prices_to_pandas(raw_data, multi_index):
+    """
+    Builds a DataFrame from the chart API result of each symbol. The index holds the bar dates, prefixed by the
+    symbol in a (symbol, date) MultiIndex when multi_index is True.
+    """
+    _require(pd, 'pandas')
+    symbols, dates, columns = _stack_columns(raw_data, _get_chart_columns)
+    index = pd.to_datetime(pd.Index(dates, dtype='int64'), unit='s')
+    return _build_pandas_frame(symbols, index, columns, PRICE_COLUMNS, multi_index)
+
+
+def fundamentals_to_pandas(raw_data, multi_index):
+    """
+    Builds a DataFrame with one column per line item from the fundamentals timeseries response of each symbol.
+    The index holds the asOfDate of each report, prefixed by the symbol when multi_index is True.
+    """
+    _require(pd, 'pandas')
+    symbols, dates, columns = _stack_columns(raw_data, _get_fundamental_columns)
+    index = pd.to_datetime(pd.Index(dates, dtype='object'), format='%Y-%m-%d')
+    return _build_pandas_frame(symbols, index, columns, sorted(columns), multi_index)
+
+
+# Private function to build a DataFrame from stacked columns
+def _build_pandas_frame(symbols, index, columns, column_order, multi_index):
+    index.name = 'date'
+    if multi_index:
+        index = pd.MultiIndex.from_arrays([symbols, index], names=['symbol', 'date'])
+    return pd.DataFrame({c: columns.get(c, [None] * len(index)) for c in column_order}, index=index)
+
+
+def prices_to_arrow(raw_data, with_symbol):
+    """Builds an Arrow table with a date column and one column per price field from the chart API results"""
+    _require(pa, 'pyarrow')
+    symbols, dates, columns = _stack_columns(raw_data, _get_chart_columns)
+    arrays = {'date': pa.array(dates, pa.timestamp('s'))}
+    for field in PRICE_COLUMNS:
+        arrays[field] = pa.array(columns.get(field, [None] * len(dates)),
+                                 pa.int64() if field == 'volume' else pa.float64())
+    return _build_arrow_table(symbols, arrays, with_symbol)
+
+
+def fundamentals_to_arrow(raw_data, with_symbol):
+    """Builds an Arrow table with a date column and one column per line item from the timeseries responses"""
+    _require(pa, 'pyarrow')
+    symbols, dates, columns = _stack_columns(raw_data, _get_fundamental_columns)
+    arrays = {'date': pa.array([datetime.date.fromisoformat(d) for d in dates], pa.date32())}
+    for field in sorted(columns):
+        arrays[field] = pa.array(columns[field], pa.float64())
+    return _build_arrow_table(symbols, arrays, with_symbol)
+
+
+# Private function to build an Arrow table, with a leading symbol column for ticker lists
+def _build_arrow_table(symbols, arrays, with_symbol):
+    if with_symbol:
+        arrays = {'symbol': pa.array(symbols, pa.string()), **arrays}
+    return pa.table(arrays)
@@ -1,5 +1,3 @@
-import time
-
 COUNTRY_MAP = {
     "FR": {"lang": "fr-FR", "region": "FR", "corsDomain": "fr.finance.yahoo.com"},
     "IN": {"lang": "en-IN", "region": "IN", "corsDomain": "in.finance.yahoo.com"},
@@ -2365,7 +2363,7 @@ REQUEST_MAP = {
         "response_field": "timeseries",
         "request": {
             "period1": {"required": True, "default": 493590046},
-            "period2": {"required": True, "default": int(time.time())},
+            "period2": {"required": True, "default": None},
             "type": {
                 "required": True,
                 "default": None,
@@ -2388,6 +2386,77 @@ REQUEST_MAP = {
         "response_field": "finance",
         "request": {},
     },
+    "quote": {
+        "path": "https://query1.finance.yahoo.com/v7/finance/quote",
+        "response_field": "quoteResponse",
+        "request": {
+            "symbols": {"required": True, "default": None},
+            "formatted": {"required": False, "default": False},
+        },
+    },
+}
+
+# Maps the price and summaryDetail module keys to the multi symbol quote endpoint keys and the scale applied to them,
+# the quote endpoint returns percentages where the modules return fractions
+QUOTE_FIELD_MAP = {
+    "price": {
+        "regularMarketPrice": ("regularMarketPrice", 1),
+        "regularMarketChange": ("regularMarketChange", 1),
+        "regularMarketChangePercent": ("regularMarketChangePercent", 0.01),
+        "regularMarketTime": ("regularMarketTime", 1),
+        "regularMarketVolume": ("regularMarketVolume", 1),
+        "regularMarketPreviousClose": ("regularMarketPreviousClose", 1),
+        "regularMarketOpen": ("regularMarketOpen", 1),
+        "regularMarketDayHigh": ("regularMarketDayHigh", 1),
+        "regularMarketDayLow": ("regularMarketDayLow", 1),
+        "averageDailyVolume10Day": ("averageDailyVolume10Day", 1),
+        "averageDailyVolume3Month": ("averageDailyVolume3Month", 1),
+        "preMarketPrice": ("preMarketPrice", 1),
+        "preMarketChange": ("preMarketChange", 1),
+        "preMarketChangePercent": ("preMarketChangePercent", 0.01),
+        "preMarketTime": ("preMarketTime", 1),
+        "postMarketPrice": ("postMarketPrice", 1),
+        "postMarketChange": ("postMarketChange", 1),
+        "postMarketChangePercent": ("postMarketChangePercent", 0.01),
+        "postMarketTime": ("postMarketTime", 1),
+        "exchange": ("exchange", 1),
+        "exchangeName": ("fullExchangeName", 1),
+        "exchangeDataDelayedBy": ("exchangeDataDelayedBy", 1),
+        "marketState": ("marketState", 1),
+        "quoteType": ("quoteType", 1),
+        "symbol": ("symbol", 1),
+        "shortName": ("shortName", 1),
+        "longName": ("longName", 1),
+        "currency": ("currency", 1),
+        "quoteSourceName": ("quoteSourceName", 1),
+        "priceHint": ("priceHint", 1),
+        "marketCap": ("marketCap", 1),
+    },
+    "summaryDetail": {
+        "previousClose": ("regularMarketPreviousClose", 1),
+        "open": ("regularMarketOpen", 1),
+        "dayLow": ("regularMarketDayLow", 1),
+        "dayHigh": ("regularMarketDayHigh", 1),
+        "volume": ("regularMarketVolume", 1),
+        "averageDailyVolume10Day": ("averageDailyVolume10Day", 1),
+        "averageVolume": ("averageDailyVolume3Month", 1),
+        "bid": ("bid", 1),
+        "ask": ("ask", 1),
+        "bidSize": ("bidSize", 1),
+        "askSize": ("askSize", 1),
+        "marketCap": ("marketCap", 1),
+        "fiftyTwoWeekLow": ("fiftyTwoWeekLow", 1),
+        "fiftyTwoWeekHigh": ("fiftyTwoWeekHigh", 1),
+        "fiftyDayAverage": ("fiftyDayAverage", 1),
+        "twoHundredDayAverage": ("twoHundredDayAverage", 1),
+        "dividendRate": ("dividendRate", 1),
+        "dividendYield": ("dividendYield", 0.01),
+        "trailingAnnualDividendRate": ("trailingAnnualDividendRate", 1),
+        "trailingAnnualDividendYield": ("trailingAnnualDividendYield", 1),
+        "trailingPE": ("trailingPE", 1),
+        "forwardPE": ("forwardPE", 1),
+        "currency": ("currency", 1),
+    },
 }
 
 USER_AGENTS = [
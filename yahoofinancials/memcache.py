@@ -0,0 +1,195 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from yahoofinancials.utils import get_response_ttl
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "expirations", "entries", "bytes"])
+
+_EVICTION_POLICIES = ("lru", "lfu")
+
+
+# Private function to estimate the memory held by a parsed JSON response
+def _estimate_size(obj):
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_estimate_size(v) for v in obj)
+    return size
+
+
+class _Entry(object):
+    __slots__ = ("value", "expires", "size", "hits")
+
+    def __init__(self, value, expires, size):
+        self.value = value
+        self.expires = expires
+        self.size = size
+        self.hits = 0
+
+
+class MemoryCache(object):
+    """
+    Bounded in-memory cache of parsed responses, keyed by request url.
+
+    Entries expire after the time to live of their request category (see yahoofinancials.utils.DEFAULT_RESPONSE_TTLS)
+    and the least recently ('lru') or least frequently ('lfu') used entries are evicted once max_entries or
+    max_bytes is exceeded. It is thread-safe, so one instance can be shared by many YahooFinancials objects through
+    their memory_cache keyword argument.
+
+    Arguments
+    ----------
+    max_entries: int, default 1024, optional
+        Maximum number of entries, None for no limit.
+    max_bytes: int, default None, optional
+        Maximum estimated size of the cached responses in bytes, None for no limit.
+    policy: str, default 'lru', optional
+        Eviction policy, 'lru' or 'lfu'.
+    ttls: dict, default None, optional
+        Overrides the time to live in seconds of request categories, e.g. {'quoteSummary:price': 5}.
+    expire: bool, default True, optional
+        If set to False, entries never expire and are only evicted to respect the size limits.
+    sizeof: callable, default None, optional
+        Returns the size in bytes of a cached value, used with max_bytes. Defaults to a recursive sys.getsizeof.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, policy="lru", ttls=None, expire=True, sizeof=None):
+        if policy not in _EVICTION_POLICIES:
+            raise ValueError("invalid policy: " + str(policy))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.ttls = ttls
+        self.expire = expire
+        self.sizeof = sizeof or _estimate_size
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    # Private method to return the live entry of a key, dropping it if it has expired
+    def _get_entry(self, key, now=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires is not None and entry.expires <= (now or time.monotonic()):
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        return entry
+
+    # Private method to evict entries other than the newest until the limits are respected
+    def _evict(self, keep):
+        while len(self._entries) > 1 and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            if self.policy == "lfu":
+                victim = min((k for k in self._entries if k != keep), key=lambda k: self._entries[k].hits)
+            else:
+                victim = next(k for k in self._entries if k != keep)
+            self._remove(victim)
+            self.evictions += 1
+
+    # Private method to return the monotonic expiry time of a key, None if it does not expire
+    def _get_expiry(self, key, ttl):
+        if ttl is None:
+            if not self.expire or not isinstance(key, str) or "://" not in key:
+                return None
+            ttl = get_response_ttl(key, self.ttls)
+        return time.monotonic() + ttl
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key, value, ttl=None):
+        """Stores a value, ttl overrides the time to live in seconds of the key's request category"""
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        expires = self._get_expiry(key, ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, expires, size)
+            self._bytes += size
+            self._evict(key)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if self._get_entry(key) is None:
+                return default
+            return self._remove(key).value
+
+    def update(self, entries):
+        for key, value in entries.items():
+            self.set(key, value)
+
+    def keys(self):
+        return [k for k, v in self.items()]
+
+    def items(self):
+        with self._lock:
+            now = time.monotonic()
+            return [(k, self._entries[k].value) for k in list(self._entries) if self._get_entry(k, now) is not None]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def cache_info(self):
+        """Returns the hit, miss, eviction and expiration counters and the current number of entries and bytes"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.expirations, len(self._entries),
+                             self._bytes)
+
+
+_MISSING = object()
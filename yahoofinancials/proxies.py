@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from collections import namedtuple
+
+from yahoofinancials.ratelimit import TokenBucket
+from yahoofinancials.retry import RETRY_STATUSES
+
+ProxyStats = namedtuple("ProxyStats", ["requests", "successes", "failures", "throttled", "latency", "score",
+                                       "quarantined_for"])
+
+
+def get_proxy_key(proxy):
+    """Returns the proxy url of a proxy given as a string or in requests format, None for direct connections"""
+    if isinstance(proxy, dict):
+        proxy = proxy.get("https")
+    return proxy or None
+
+
+class _ProxyHealth(object):
+
+    def __init__(self, rate, capacity):
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        self.quarantined_until = 0.0
+        self.bucket = TokenBucket(rate, capacity) if rate else None
+
+
+class ProxyPool(object):
+    """
+    Health-scored pool of proxies, replacing the uniform random choice of a proxies list.
+
+    Each proxy keeps its success rate, an exponentially weighted moving average of its latency and its count of 429
+    responses. Proxies are picked at random weighted by their score, the smoothed success rate divided by one plus
+    the latency in seconds, so slow or failing proxies receive less traffic. A proxy failing failure_threshold requests
+    in a row, or answering 429, is quarantined for quarantine_seconds. Each proxy has its own cookie & crumb, since
+    Yahoo often rejects a session negotiated through another egress IP.
+
+    Arguments
+    ----------
+    proxies: list
+        Proxy urls, e.g. ['http://10.0.0.1:3128', 'http://10.0.0.2:3128'].
+    rate: float, default None, optional
+        Requests per second allowed through each proxy, None for no per proxy limit.
+    capacity: int, default 5, optional
+        Burst capacity of each proxy's rate limit.
+    quarantine_seconds: float, default 60.0, optional
+        Seconds a failing proxy is left out of the selection.
+    failure_threshold: int, default 3, optional
+        Consecutive failures after which a proxy is quarantined.
+    latency_alpha: float, default 0.3, optional
+        Weight of the latest request in the latency moving average.
+    """
+
+    def __init__(self, proxies, rate=None, capacity=5, quarantine_seconds=60.0, failure_threshold=3,
+                 latency_alpha=0.3):
+        if not proxies:
+            raise ValueError("yahoofinancials: a proxy pool needs at least one proxy")
+        self.proxies = [get_proxy_key(p) for p in proxies]
+        self.rate = rate
+        self.capacity = capacity
+        self.quarantine_seconds = quarantine_seconds
+        self.failure_threshold = failure_threshold
+        self.latency_alpha = latency_alpha
+        self._health = {p: _ProxyHealth(rate, capacity) for p in self.proxies}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_score(health):
+        score = (health.successes + 1.0) / (health.requests + 2.0)
+        if health.latency is not None:
+            score /= 1.0 + health.latency
+        return score
+
+    def select(self):
+        """Returns a proxy url picked by health score, the one leaving quarantine first if all are quarantined"""
+        with self._lock:
+            now = time.monotonic()
+            available = [p for p in self.proxies if self._health[p].quarantined_until <= now]
+            if not available:
+                return min(self.proxies, key=lambda p: self._health[p].quarantined_until)
+            weights = [self._get_score(self._health[p]) for p in available]
+        return random.choices(available, weights)[0]
+
+    def reserve(self, proxy):
+        """Takes a token of the proxy's rate limit, returns the seconds to wait before sending the request"""
+        health = self._health.get(get_proxy_key(proxy))
+        if health is None or health.bucket is None:
+            return 0.0
+        return health.bucket.reserve()
+
+    def record(self, proxy, status, latency=None):
+        """Records the outcome of a request sent through a proxy, status None for a connection error"""
+        health = self._health.get(get_proxy_key(proxy))
+        if health is None:
+            return
+        with self._lock:
+            health.requests += 1
+            if latency is not None:
+                if health.latency is None:
+                    health.latency = latency
+                else:
+                    health.latency += self.latency_alpha * (latency - health.latency)
+            if status == 429:
+                health.throttled += 1
+            if status is not None and status not in RETRY_STATUSES:
+                health.successes += 1
+                health.consecutive_failures = 0
+                return
+            health.failures += 1
+            health.consecutive_failures += 1
+            if status == 429 or health.consecutive_failures >= self.failure_threshold:
+                health.quarantined_until = time.monotonic() + self.quarantine_seconds
+                health.consecutive_failures = 0
+
+    def get_stats(self):
+        """Returns the ProxyStats of each proxy, quarantined_for being the seconds left in quarantine"""
+        with self._lock:
+            now = time.monotonic()
+            return {p: ProxyStats(h.requests, h.successes, h.failures, h.throttled, h.latency, self._get_score(h),
+                                  max(h.quarantined_until - now, 0.0)) for p, h in self._health.items()}
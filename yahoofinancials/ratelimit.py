@@ -0,0 +1,152 @@
+import threading
+import time
+
+from yahoofinancials.utils import get_request_endpoint, lazy_import
+
+cache = lazy_import("yahoofinancials.cache")
+
+# Default (requests per second, burst capacity) for each Yahoo Finance endpoint family
+DEFAULT_RATE_LIMITS = {
+    "quoteSummary": (2.0, 10),
+    "fundamentals": (1.0, 5),
+    "chart": (2.0, 10),
+    "insights": (1.0, 5),
+    "recommendations": (1.0, 5),
+    "quote": (1.0, 5),
+    "default": (1.0, 5),
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Allows bursts of up to capacity requests and then refills at rate tokens per second.
+    Callers that find the bucket empty reserve a future token and sleep until it is due, so waiting callers are
+    served in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("yahoofinancials: rate must be > 0 and capacity >= 1")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in the sqlite cache folder so that every process on the host draws from one
+    budget. Falls back to a process local bucket if the shared store can not be used.
+    """
+
+    def __init__(self, name, rate, capacity):
+        super(SharedTokenBucket, self).__init__(rate, capacity)
+        self.name = name
+
+    def reserve(self):
+        wait = cache.get_rate_limit_store().reserve(self.name, self.rate, self.capacity)
+        if wait is None:
+            return super(SharedTokenBucket, self).reserve()
+        return wait
+
+
+class RateLimiter:
+    """
+    Per-endpoint rate limiter used by every request path.
+
+    Arguments
+    ----------
+    rates: dict, optional
+        Maps an endpoint family ('quoteSummary', 'fundamentals', 'chart', 'insights', 'recommendations', 'quote',
+        'default') to a (requests_per_second, burst_capacity) tuple. Missing families use DEFAULT_RATE_LIMITS.
+    shared: bool, default False, optional
+        If True, the buckets are stored in the cache folder and shared by all processes on the host.
+    """
+
+    def __init__(self, rates=None, shared=False):
+        self.rates = {**DEFAULT_RATE_LIMITS, **(rates or {})}
+        self.shared = shared
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, endpoint):
+        if endpoint not in self.rates:
+            endpoint = 'default'
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(endpoint)
+                if bucket is None:
+                    rate, capacity = self.rates[endpoint]
+                    if self.shared:
+                        bucket = SharedTokenBucket(endpoint, rate, capacity)
+                    else:
+                        bucket = TokenBucket(rate, capacity)
+                    self._buckets[endpoint] = bucket
+        return bucket
+
+    def acquire(self, endpoint):
+        """Blocks until a request to the endpoint family is allowed, returns the seconds spent waiting."""
+        return self._get_bucket(endpoint).acquire()
+
+    def acquire_url(self, url):
+        return self.acquire(get_request_endpoint(url))
+
+    def reserve(self, endpoint):
+        """Takes a token without blocking, returns the seconds the caller must wait before its request."""
+        return self._get_bucket(endpoint).reserve()
+
+    def reserve_url(self, url):
+        return self.reserve(get_request_endpoint(url))
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(rates=None, shared=False):
+    """Returns the process wide limiter when called with the defaults, otherwise a new configured limiter."""
+    global _default_limiter
+    if rates is None and not shared:
+        if _default_limiter is None:
+            with _default_limiter_lock:
+                if _default_limiter is None:
+                    _default_limiter = RateLimiter()
+        return _default_limiter
+    return RateLimiter(rates, shared)
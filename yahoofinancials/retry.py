@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+# Status codes worth retrying, Yahoo answers 429 when it throttles and 5xx when it is unhealthy
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+# Retry actions returned by RetryPolicy.classify()
+RETRY = "retry"
+REFRESH_CRUMB = "refresh_crumb"
+FAIL = "fail"
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline(object):
+    """
+    Time budget shared by every request made inside a deadline scope, see YahooFinancials.deadline().
+    errors maps each ticker that could not be fetched within the budget to the reason it failed.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self.errors = {}
+
+    def remaining(self):
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def add_error(self, ticker, reason):
+        self.errors[ticker] = reason
+
+
+_current_deadline = contextvars.ContextVar("yahoofinancials_deadline", default=None)
+
+
+def get_current_deadline():
+    """Returns the Deadline of the innermost deadline scope, or None"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Runs the block under a Deadline, None leaves the current budget in place"""
+    if deadline is None:
+        yield get_current_deadline()
+        return
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def parse_retry_after(value):
+    """Returns the seconds to wait from a Retry-After header value, in seconds or as an HTTP date, or None"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy(object):
+    """
+    Retry policy shared by every request path.
+
+    Failed attempts are classified by status code: 401 refreshes the cookie & crumb, the codes in retry_statuses and
+    connection errors (status None) are retried with exponential backoff and full jitter, honouring Retry-After, and
+    every other code, e.g. 404 for an unknown symbol, fails at once. A call stops retrying once max_attempts attempts
+    were made or once the next attempt would start after its deadline.
+
+    Arguments
+    ----------
+    max_attempts: int, default 5, optional
+        Maximum number of attempts per call, including the first one.
+    backoff_base: float, default 1.0, optional
+        Backoff before the second attempt, doubled for each following attempt.
+    backoff_max: float, default 30.0, optional
+        Upper bound of a single backoff, also applied to Retry-After.
+    deadline: float, default 60.0, optional
+        Seconds after which a call stops retrying, None for no limit.
+    retry_statuses: tuple, default RETRY_STATUSES, optional
+        Status codes that are retried.
+    jitter: bool, default True, optional
+        If True, each backoff is drawn uniformly between 0 and its exponential bound.
+    """
+
+    def __init__(self, max_attempts=5, backoff_base=1.0, backoff_max=30.0, deadline=60.0,
+                 retry_statuses=RETRY_STATUSES, jitter=True):
+        if max_attempts < 1:
+            raise ValueError("yahoofinancials: max_attempts must be >= 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.retry_statuses = tuple(retry_statuses)
+        self.jitter = jitter
+
+    def classify(self, status):
+        if status == 401:
+            return REFRESH_CRUMB
+        if status is None or status in self.retry_statuses:
+            return RETRY
+        return FAIL
+
+    def get_backoff(self, attempt, retry_after=None):
+        """Returns the seconds to wait after the given failed attempt, counted from 1"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        bound = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, bound) if self.jitter else bound
+
+    def start(self, deadline=None):
+        """Returns the retry state of a new call, deadline overrides the policy's deadline in seconds"""
+        return RetryState(self, self.deadline if deadline is None else deadline)
+
+
+class RetryState(object):
+    """Attempts and deadline of one call made under a RetryPolicy"""
+
+    def __init__(self, policy, deadline=None):
+        self.policy = policy
+        self.attempts = 0
+        self.expires = None if deadline is None else time.monotonic() + deadline
+        # The budget of the enclosing deadline scope also bounds the call
+        budget = get_current_deadline()
+        if budget is not None and (self.expires is None or budget.expires < self.expires):
+            self.expires = budget.expires
+
+    def remaining(self):
+        if self.expires is None:
+            return None
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self):
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def next_delay(self, status=None, retry_after=None):
+        """
+        Records a failed attempt and returns the seconds to wait before the next one, or None if the call must stop
+        because the status is not retryable, the attempts are exhausted or the deadline would be passed.
+        """
+        self.attempts += 1
+        action = self.policy.classify(status)
+        if action == FAIL or self.attempts >= self.policy.max_attempts:
+            return None
+        delay = 0.0 if action == REFRESH_CRUMB else self.policy.get_backoff(self.attempts, retry_after)
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def wait(self, status=None, retry_after=None):
+        """Sleeps before the next attempt, returns False if the call must stop instead"""
+        delay = self.next_delay(status, retry_after)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def async_wait(self, status=None, retry_after=None):
+        delay = self.next_delay(status, retry_after)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
@@ -1,20 +1,36 @@
-import functools
-from functools import lru_cache
+from urllib.parse import urlencode
 from urllib3.util import Retry
 import requests as requests
 from requests import Session
 from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, RetryError
-from bs4 import BeautifulSoup
 import datetime
 import logging
-from frozendict import frozendict
 import threading
 import random
-from . import cache
+import time
+import weakref
+from collections import namedtuple
+from collections.abc import Mapping
+from .decoder import get_json_decoder
+from .memcache import MemoryCache
+from .proxies import get_proxy_key
+from .utils import lazy_import
+
+bs4 = lazy_import("bs4")
+cache = lazy_import("yahoofinancials.cache")
 
 DEFAULT_TIMEOUT = 5
 cache_maxsize = 64
+# Default connection pool of the sessions created by SessionManager, grown to the concurrency of the instances using it
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+TransportStats = namedtuple("TransportStats", ["requests", "connections", "reused", "pools"])
+
+# Stored cookies and crumbs are used for a day, and refreshed in the background once older than crumb_refresh_age
+cookie_max_age = 24 * 60 * 60
+crumb_refresh_age = 20 * 60 * 60
 
 HEADERS = [
     {'upgrade-insecure-requests': '1', 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.114 Safari/537.36 Edg/89.0.774.76', 'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3', 'sec-ch-ua': 'Microsoft Edge;v="89", "Chromium";v="89", ";Not A Brand";v="99"', 'sec-ch-ua-mobile': '?0', 'sec-ch-ua-platform': 'Windows', 'sec-fetch-site': 'none', 'sec-fetch-mod': '', 'sec-fetch-user': '?1', 'accept-encoding': 'gzip', 'accept-language': 'en-US,es;q=0.6'},
@@ -120,24 +136,41 @@ HEADERS = [
 ]
 
 
-def lru_cache_freezeargs(func):
-    """
-    Decorator transforms mutable dictionary and list arguments into immutable types
-    Needed so lru_cache can cache method calls what has dict or list arguments.
-    """
+def _mount_pool(session, pool_connections, pool_maxsize):
+    """Mounts a keep-alive connection pool adapter for the http and https urls of a session"""
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    for prefix in ("https://", "http://"):
+        old_adapter = session.adapters.get(prefix)
+        session.mount(prefix, adapter)
+        if old_adapter is not None and old_adapter is not adapter:
+            old_adapter.close()
+    return session
+
+
+# Private function to return the urllib3 connection pools of the adapters of sessions, including the proxied ones
+def _get_session_pools(sessions):
+    adapters = {id(a): a for s in sessions for a in s.adapters.values()}
+    pools = []
+    for adapter in adapters.values():
+        managers = [getattr(adapter, "poolmanager", None)] + list(getattr(adapter, "proxy_manager", {}).values())
+        for manager in managers:
+            if manager is not None:
+                pools.extend(manager.pools[k] for k in manager.pools.keys())
+    return pools
 
-    @functools.wraps(func)
-    def wrapped(*args, **kwargs):
-        args = tuple([frozendict(arg) if isinstance(arg, dict) else arg for arg in args])
-        kwargs = {k: frozendict(v) if isinstance(v, dict) else v for k, v in kwargs.items()}
-        args = tuple([tuple(arg) if isinstance(arg, list) else arg for arg in args])
-        kwargs = {k: tuple(v) if isinstance(v, list) else v for k, v in kwargs.items()}
-        return func(*args, **kwargs)
-    # copy over the lru_cache extra methods to this wrapper to be able to access them
-    # after this decorator has been applied
-    wrapped.cache_info = func.cache_info
-    wrapped.cache_clear = func.cache_clear
-    return wrapped
+
+# Private function to return the requests sent and connections opened by connection pools
+def _count_pool_usage(pools):
+    return sum(getattr(p, "num_requests", 0) for p in pools), sum(getattr(p, "num_connections", 0) for p in pools)
+
+
+def get_payload_key(url, params=None):
+    """Returns the cache key of a request, the url with its sorted params and without the crumb"""
+    key = url.replace("query2.", "query1.")
+    params = sorted((k, v) for k, v in (params or {}).items() if k != 'crumb')
+    if params:
+        key += ("&" if "?" in key else "?") + urlencode(params)
+    return key
 
 
 class SingletonMeta(type):
@@ -157,6 +190,31 @@ class SingletonMeta(type):
             return cls._instances[cls]
 
 
+class _ProxyState(object):
+    """
+    Session, cookie, crumb and cookie strategy negotiated through one proxy, None for direct connections, since Yahoo
+    often rejects a cookie obtained through another egress IP. The lock guards the negotiation of its fields.
+    """
+
+    def __init__(self, key, session, session_is_caching=False):
+        self.key = key
+        self.session = session
+        self.session_is_caching = session_is_caching
+        self.cookie = None
+        self.crumb = None
+        # Default to using 'basic' strategy, if it fails the fallback method is 'csrf'
+        self.cookie_strategy = 'basic'
+        # Time the crumb was negotiated, in seconds since the epoch, also when it was loaded from the cookie cache
+        self.crumb_fetched = None
+        self.lock = threading.Lock()
+
+    def get_cache_key(self, strategy):
+        """Returns the persistent cookie cache key of a strategy"""
+        if self.key is None:
+            return strategy
+        return strategy + "@" + self.key
+
+
 class SessionManager(metaclass=SingletonMeta):
     """
     Have one place to retrieve data from Yahoo API in order to ease caching and speed up operations.
@@ -167,105 +225,187 @@ class SessionManager(metaclass=SingletonMeta):
     }
 
     def __init__(self, session=None):
-        self._session = session or requests.Session()
+        self._pool_connections = DEFAULT_POOL_CONNECTIONS
+        self._pool_maxsize = DEFAULT_POOL_MAXSIZE
+        # Sessions created by the manager, whose connection pools it sizes, sessions passed by the caller are left as is
+        self._pooled_sessions = weakref.WeakSet()
+        self._retired_usage = (0, 0)
+        session = session or self._new_session()
         try:
-            self._session.cache
+            session.cache
         except AttributeError:
             # Not caching
-            self._session_is_caching = False
+            session_is_caching = False
         else:
             # Is caching. This is annoying.
             # Can't simply use a non-caching session to fetch cookie & crumb,
             # because then the caching-session won't have cookie.
-            self._session_is_caching = True
+            session_is_caching = True
             from requests_cache import DO_NOT_CACHE
             self._expire_after = DO_NOT_CACHE
-        self._crumb = None
-        self._cookie = None
-        if self._session_is_caching and self._cookie is None:
+        # False for the managers refreshing the cookie & crumb in the background, which must not reuse stored ones
+        self._load_stored = True
+        self._refreshing = set()
+        if session_is_caching:
             logging.warning(
                 "yahoofinancials: cookie & crumb does not work well with requests_cache. Am experimenting with "
                 "'expire_after=DO_NOT_CACHE', but you need to help stress-test."
             )
-        # Default to using 'basic' strategy
-        self._cookie_strategy = 'basic'
-        # If it fails, then fallback method is 'csrf'
-        # self._cookie_strategy = 'csrf'
+        # Guards the proxy states, the connection pools and the background refreshes
         self._cookie_lock = threading.Lock()
-
-    def _set_session(self, session):
+        self._payload_cache = MemoryCache(max_entries=cache_maxsize)
+        # Session, cookie, crumb and cookie strategy of each proxy, None for direct connections
+        self._proxy_states = {None: _ProxyState(None, session, session_is_caching)}
+
+    # Private method to create a session with the manager's keep-alive connection pool
+    def _new_session(self):
+        session = _mount_pool(requests.Session(), self._pool_connections, self._pool_maxsize)
+        self._pooled_sessions.add(session)
+        return session
+
+    def set_pool_size(self, pool_connections=None, pool_maxsize=None):
+        """
+        Grows the connection pools of the sessions created by the manager, shared by every instance and request path.
+        pool_connections is the number of hosts kept alive and pool_maxsize the connections kept per host.
+        """
+        with self._cookie_lock:
+            pool_connections = max(pool_connections or 0, self._pool_connections)
+            pool_maxsize = max(pool_maxsize or 0, self._pool_maxsize)
+            if (pool_connections, pool_maxsize) == (self._pool_connections, self._pool_maxsize):
+                return
+            self._pool_connections, self._pool_maxsize = pool_connections, pool_maxsize
+            sessions = list(self._pooled_sessions)
+            # The replaced pools are closed, their usage is kept in the statistics
+            n_requests, n_connections = _count_pool_usage(_get_session_pools(sessions))
+            self._retired_usage = (self._retired_usage[0] + n_requests, self._retired_usage[1] + n_connections)
+            for session in sessions:
+                _mount_pool(session, pool_connections, pool_maxsize)
+
+    def transport_stats(self):
+        """Returns the requests sent, connections opened, connections reused and pools of the manager's sessions"""
+        with self._cookie_lock:
+            sessions = {id(st.session): st.session for st in self._proxy_states.values()}
+            retired_requests, retired_connections = self._retired_usage
+        pools = _get_session_pools(sessions.values())
+        n_requests, n_connections = _count_pool_usage(pools)
+        n_requests += retired_requests
+        n_connections += retired_connections
+        return TransportStats(n_requests, n_connections, max(n_requests - n_connections, 0), len(pools))
+
+    def _set_session(self, session=None):
         if session is None:
             return
         with self._cookie_lock:
-            self._session = session
+            self._proxy_states[None].session = session
 
-    def _set_cookie_strategy(self, strategy, have_lock=False):
-        if strategy == self._cookie_strategy:
-            return
-        if not have_lock:
-            self._cookie_lock.acquire()
+    # Private method to return the state of a proxy, created with a new session the first time the proxy is used
+    def _get_proxy_state(self, proxy=None):
+        key = get_proxy_key(proxy)
+        with self._cookie_lock:
+            state = self._proxy_states.get(key)
+            if state is None:
+                state = self._proxy_states[key] = _ProxyState(key, self._new_session())
+            return state
 
-        try:
-            if self._cookie_strategy == 'csrf':
-                logging.debug(f'yahoofinancials: toggling cookie strategy {self._cookie_strategy} -> basic')
-                self._session.cookies.clear()
-                self._cookie_strategy = 'basic'
-            else:
-                logging.debug(f'yahoofinancials: toggling cookie strategy {self._cookie_strategy} -> csrf')
-                self._cookie_strategy = 'csrf'
-            self._cookie = None
-            self._crumb = None
-        except Exception:
-            self._cookie_lock.release()
-            raise
+    # Private method to return the session whose cookies were negotiated through a proxy
+    def _get_proxy_session(self, proxy=None):
+        return self._get_proxy_state(proxy).session
 
+    def _set_cookie_strategy(self, state, strategy, have_lock=False):
         if not have_lock:
-            self._cookie_lock.release()
-
-    def _save_session_cookies(self):
+            state.lock.acquire()
+        try:
+            if strategy == state.cookie_strategy:
+                return
+            if state.cookie_strategy == 'csrf':
+                logging.debug(f'yahoofinancials: toggling cookie strategy {state.cookie_strategy} -> basic')
+                state.session.cookies.clear()
+                state.cookie_strategy = 'basic'
+            else:
+                logging.debug(f'yahoofinancials: toggling cookie strategy {state.cookie_strategy} -> csrf')
+                state.cookie_strategy = 'csrf'
+            state.cookie = None
+            state.crumb = None
+            state.crumb_fetched = None
+        finally:
+            if not have_lock:
+                state.lock.release()
+
+    def _save_session_cookies(self, state):
         try:
-            cache.get_cookie_cache().store('csrf', self._session.cookies)
+            cache.get_cookie_cache().store(state.get_cache_key('csrf'), state.session.cookies)
         except Exception:
             return False
         return True
 
-    def _load_session_cookies(self):
-        cookie_dict = cache.get_cookie_cache().lookup('csrf')
+    # Private method to load the stored session cookies together with their crumb, without a crumb the cookies may
+    # have been rejected and are negotiated again
+    def _load_session_cookies(self, state):
+        if not self._load_stored:
+            return False
+        cookie_dict = cache.get_cookie_cache().lookup(state.get_cache_key('csrf'))
         if cookie_dict is None:
             return False
         # Periodically refresh, 24 hours seems fair.
-        if cookie_dict['age'] > datetime.timedelta(days=1):
+        if cookie_dict['age'] > datetime.timedelta(seconds=cookie_max_age):
+            return False
+        crumb = self._load_crumb(state, 'csrf')
+        if crumb is None:
             return False
-        self._session.cookies.update(cookie_dict['cookie'])
+        state.session.cookies.update(cookie_dict['cookie'])
+        state.crumb = crumb
         logging.debug('yahoofinancials: loaded persistent cookie')
+        return True
 
-    def _save_cookie_basic(self, cookie):
+    def _save_cookie_basic(self, state, cookie):
         try:
-            cache.get_cookie_cache().store('basic', cookie)
+            cache.get_cookie_cache().store(state.get_cache_key('basic'), cookie)
         except Exception:
             return False
         return True
 
-    def _load_cookie_basic(self):
-        cookie_dict = cache.get_cookie_cache().lookup('basic')
+    def _load_cookie_basic(self, state):
+        if not self._load_stored:
+            return None
+        cookie_dict = cache.get_cookie_cache().lookup(state.get_cache_key('basic'))
         if cookie_dict is None:
             return None
         # Periodically refresh, 24 hours seems fair.
-        if cookie_dict['age'] > datetime.timedelta(days=1):
+        if cookie_dict['age'] > datetime.timedelta(seconds=cookie_max_age):
             return None
         logging.debug('yahoofinancials: loaded persistent cookie')
         return cookie_dict['cookie']
 
-    def _get_cookie_basic(self, proxy=None, timeout=30):
-        if self._cookie is not None:
+    # Private method to save the crumb negotiated with the cookie of a strategy, shared by every process on the host
+    def _save_crumb(self, state, strategy, crumb):
+        state.crumb_fetched = time.time() if crumb is not None else None
+        try:
+            cache.get_cookie_cache().store_crumb(state.get_cache_key(strategy), crumb)
+        except Exception:
+            return False
+        return True
+
+    # Private method to load the stored crumb of the cookie of a strategy, None if missing or expired
+    def _load_crumb(self, state, strategy):
+        if not self._load_stored:
+            return None
+        crumb_dict = cache.get_cookie_cache().lookup_crumb(state.get_cache_key(strategy))
+        if crumb_dict is None or time.time() - crumb_dict['fetch_time'] > cookie_max_age:
+            return None
+        logging.debug('yahoofinancials: loaded persistent crumb')
+        state.crumb_fetched = crumb_dict['fetch_time']
+        return crumb_dict['crumb']
+
+    def _get_cookie_basic(self, state, proxy=None, timeout=30):
+        if state.cookie is not None:
             logging.debug('yahoofinancials: reusing cookie')
-            return self._cookie
-        self._cookie = self._load_cookie_basic()
-        if self._cookie is not None:
-            return self._cookie
+            return state.cookie
+        state.cookie = self._load_cookie_basic(state)
+        if state.cookie is not None:
+            return state.cookie
         # To avoid infinite recursion, do NOT use self.get()
         # - 'allow_redirects' copied from @psychoz971 solution - does it help USA?
-        response = self._session.get(
+        response = state.session.get(
             url='https://finance.yahoo.com',
             headers=self.user_agent_headers,
             proxies=proxy,
@@ -274,22 +414,27 @@ class SessionManager(metaclass=SingletonMeta):
         if not response.cookies:
             logging.debug("yahoofinancials: response.cookies = None")
             return None
-        self._cookie = list(response.cookies)[0]
-        if self._cookie == '':
+        state.cookie = list(response.cookies)[0]
+        if state.cookie == '':
             logging.debug("yahoofinancials: list(response.cookies)[0] = ''")
             return None
-        self._save_cookie_basic(self._cookie)
-        logging.debug(f"yahoofinancials: fetched basic cookie = {self._cookie}")
-        return self._cookie
-
-    def _get_crumb_basic(self, proxy=None, timeout=30):
-        if self._crumb is not None:
+        self._save_cookie_basic(state, state.cookie)
+        # The stored crumb belongs to the previous cookie
+        self._save_crumb(state, 'basic', None)
+        logging.debug(f"yahoofinancials: fetched basic cookie = {state.cookie}")
+        return state.cookie
+
+    def _get_crumb_basic(self, state, proxy=None, timeout=30):
+        if state.crumb is not None:
             logging.debug('yahoofinancials: reusing crumb')
-            return self._crumb
+            return state.crumb
 
-        cookie = self._get_cookie_basic()
+        cookie = self._get_cookie_basic(state, proxy, timeout)
         if cookie is None:
             return None
+        state.crumb = self._load_crumb(state, 'basic')
+        if state.crumb is not None:
+            return state.crumb
 
         # - 'allow_redirects' copied from @psychoz971 solution - does it help USA?
         get_args = {
@@ -300,43 +445,44 @@ class SessionManager(metaclass=SingletonMeta):
             'timeout': timeout,
             'allow_redirects': True
         }
-        if self._session_is_caching:
+        if state.session_is_caching:
             get_args['expire_after'] = self._expire_after
-            crumb_response = self._session.get(**get_args)
+            crumb_response = state.session.get(**get_args)
         else:
-            crumb_response = self._session.get(**get_args)
-        self._crumb = crumb_response.text
-        if self._crumb is None or '<html>' in self._crumb:
+            crumb_response = state.session.get(**get_args)
+        state.crumb = crumb_response.text
+        if state.crumb is None or '<html>' in state.crumb:
             logging.debug("yahoofinancials: didn't receive crumb")
             return None
-        logging.debug(f"yahoofinancials: crumb = '{self._crumb}'")
-        return self._crumb
+        self._save_crumb(state, 'basic', state.crumb)
+        logging.debug(f"yahoofinancials: crumb = '{state.crumb}'")
+        return state.crumb
 
-    def _get_cookie_and_crumb_basic(self, proxy, timeout):
-        cookie = self._get_cookie_basic(proxy, timeout)
-        crumb = self._get_crumb_basic(proxy, timeout)
+    def _get_cookie_and_crumb_basic(self, state, proxy, timeout):
+        cookie = self._get_cookie_basic(state, proxy, timeout)
+        crumb = self._get_crumb_basic(state, proxy, timeout)
         return cookie, crumb
 
-    def _get_cookie_csrf(self, proxy, timeout):
-        if self._cookie is not None:
+    def _get_cookie_csrf(self, state, proxy, timeout):
+        if state.cookie is not None:
             logging.debug('yahoofinancials: reusing cookie')
             return True
 
-        elif self._load_session_cookies():
+        elif self._load_session_cookies(state):
             logging.debug('yahoofinancials: reusing persistent cookie')
-            self._cookie = True
+            state.cookie = True
             return True
         base_args = {
             'headers': self.user_agent_headers,
             'proxies': proxy,
             'timeout': timeout}
         get_args = {**base_args, 'url': 'https://guce.yahoo.com/consent'}
-        if self._session_is_caching:
+        if state.session_is_caching:
             get_args['expire_after'] = self._expire_after
-            response = self._session.get(**get_args)
+            response = state.session.get(**get_args)
         else:
-            response = self._session.get(**get_args)
-        soup = BeautifulSoup(response.content, 'html.parser')
+            response = state.session.get(**get_args)
+        soup = bs4.BeautifulSoup(response.content, 'html.parser')
         csrfTokenInput = soup.find('input', attrs={'name': 'csrfToken'})
         if csrfTokenInput is None:
             logging.debug('yahoofinancials: Failed to find "csrfToken" in response')
@@ -362,62 +508,129 @@ class SessionManager(metaclass=SingletonMeta):
         get_args = {**base_args,
                     'url': f'https://guce.yahoo.com/copyConsent?sessionId={sessionId}',
                     'data': data}
-        if self._session_is_caching:
+        if state.session_is_caching:
             post_args['expire_after'] = self._expire_after
             get_args['expire_after'] = self._expire_after
-            self._session.post(**post_args)
-            self._session.get(**get_args)
+            state.session.post(**post_args)
+            state.session.get(**get_args)
         else:
-            self._session.post(**post_args)
-            self._session.get(**get_args)
-        self._cookie = True
-        self._save_session_cookies()
+            state.session.post(**post_args)
+            state.session.get(**get_args)
+        state.cookie = True
+        self._save_session_cookies(state)
         return True
 
-    def _get_crumb_csrf(self, proxy=None, timeout=30):
-        if self._crumb is not None:
+    def _get_crumb_csrf(self, state, proxy=None, timeout=30):
+        if state.crumb is not None:
             logging.debug('yahoofinancials: reusing crumb')
-            return self._crumb
-        if not self._get_cookie_csrf(proxy, timeout):
+            return state.crumb
+        if not self._get_cookie_csrf(state, proxy, timeout):
             # This cookie stored in session
             return None
+        if state.crumb is not None:
+            # Loaded with the stored cookies
+            return state.crumb
         get_args = {
             'url': 'https://query2.finance.yahoo.com/v1/test/getcrumb',
             'headers': self.user_agent_headers,
             'proxies': proxy,
             'timeout': timeout}
-        if self._session_is_caching:
+        if state.session_is_caching:
             get_args['expire_after'] = self._expire_after
-            r = self._session.get(**get_args)
+            r = state.session.get(**get_args)
         else:
-            r = self._session.get(**get_args)
-        self._crumb = r.text
-        if self._crumb is None or '<html>' in self._crumb or self._crumb == '':
+            r = state.session.get(**get_args)
+        state.crumb = r.text
+        if state.crumb is None or '<html>' in state.crumb or state.crumb == '':
             logging.debug("yahoofinancials: didn't receive crumb")
             return None
-        logging.debug(f"yahoofinancials: crumb = '{self._crumb}'")
-        return self._crumb
+        self._save_crumb(state, 'csrf', state.crumb)
+        logging.debug(f"yahoofinancials: crumb = '{state.crumb}'")
+        return state.crumb
 
     def _get_cookie_and_crumb(self, proxy=None, timeout=30):
         cookie, crumb, strategy = None, None, None
-        logging.debug(f"yahoofinancials: cookie_mode = '{self._cookie_strategy}'")
-        with self._cookie_lock:
-            if self._cookie_strategy == 'csrf':
-                crumb = self._get_crumb_csrf()
+        state = self._get_proxy_state(proxy)
+        logging.debug(f"yahoofinancials: cookie_mode = '{state.cookie_strategy}'")
+        with state.lock:
+            self._use_refreshed_crumb(state)
+            if state.cookie_strategy == 'csrf':
+                crumb = self._get_crumb_csrf(state, proxy, timeout)
                 if crumb is None:
                     # Fail
-                    self._set_cookie_strategy('basic', have_lock=True)
-                    cookie, crumb = self._get_cookie_and_crumb_basic(proxy, timeout)
+                    self._set_cookie_strategy(state, 'basic', have_lock=True)
+                    cookie, crumb = self._get_cookie_and_crumb_basic(state, proxy, timeout)
             else:
                 # Fallback strategy
-                cookie, crumb = self._get_cookie_and_crumb_basic(proxy, timeout)
+                cookie, crumb = self._get_cookie_and_crumb_basic(state, proxy, timeout)
                 if cookie is None or crumb is None:
                     # Fail
-                    self._set_cookie_strategy('csrf', have_lock=True)
-                    crumb = self._get_crumb_csrf()
-            strategy = self._cookie_strategy
+                    self._set_cookie_strategy(state, 'csrf', have_lock=True)
+                    crumb = self._get_crumb_csrf(state, proxy, timeout)
+            strategy = state.cookie_strategy
+            self._schedule_refresh(state, proxy, timeout)
         return cookie, crumb, strategy
 
+    # Private method to drop a crumb due for refresh once a newer one was stored by another thread or process, the
+    # stored cookie & crumb are then loaded instead. Called under the lock of the state.
+    def _use_refreshed_crumb(self, state):
+        if state.crumb_fetched is None or time.time() - state.crumb_fetched < crumb_refresh_age:
+            return
+        crumb_dict = cache.get_cookie_cache().lookup_crumb(state.get_cache_key(state.cookie_strategy))
+        if crumb_dict is not None and crumb_dict['fetch_time'] > state.crumb_fetched:
+            logging.debug('yahoofinancials: switching to the refreshed cookie & crumb')
+            state.cookie = None
+            state.crumb = None
+            state.crumb_fetched = None
+
+    # Private method to start the background refresh of a crumb older than crumb_refresh_age, called under the lock
+    # of the state
+    def _schedule_refresh(self, state, proxy, timeout):
+        if not self._load_stored or state.crumb_fetched is None:
+            return
+        if time.time() - state.crumb_fetched < crumb_refresh_age:
+            return
+        with self._cookie_lock:
+            if state.key in self._refreshing:
+                return
+            self._refreshing.add(state.key)
+        threading.Thread(target=self._refresh_cookie_and_crumb,
+                         args=(state.key, proxy, timeout, state.cookie_strategy, state.crumb_fetched),
+                         name="yahoofinancials-crumb-refresh", daemon=True).start()
+
+    # Private method to negotiate a new cookie & crumb and store them for every process, only one process refreshes
+    # them under the refresh lock file while the others keep using the current ones
+    def _refresh_cookie_and_crumb(self, proxy_key, proxy, timeout, strategy, fetched):
+        try:
+            cache_key = strategy if proxy_key is None else strategy + "@" + proxy_key
+            with cache.cookie_refresh_lock(cache_key) as locked:
+                crumb_dict = cache.get_cookie_cache().lookup_crumb(cache_key)
+                if not locked or (crumb_dict is not None and crumb_dict['fetch_time'] > fetched):
+                    return
+                # A manager outside of the singleton, so the cookies in use are left untouched
+                manager = type.__call__(SessionManager)
+                manager._load_stored = False
+                manager._get_proxy_state(proxy).cookie_strategy = strategy
+                manager._get_cookie_and_crumb(proxy, timeout)
+        except Exception as e:
+            logging.debug(f"yahoofinancials: background cookie & crumb refresh failed: {e}")
+        finally:
+            with self._cookie_lock:
+                self._refreshing.discard(proxy_key)
+
+    def _reset_cookie_and_crumb(self, proxy=None, since=None):
+        """
+        Drops the cookie & crumb of a proxy after Yahoo rejected them, also from the cookie cache, so the next request
+        negotiates new ones. Nothing is dropped if they were negotiated after since, in seconds since the epoch.
+        """
+        state = self._get_proxy_state(proxy)
+        with state.lock:
+            if since is not None and state.crumb_fetched is not None and state.crumb_fetched > since:
+                return
+            state.cookie = None
+            state.crumb = None
+            self._save_crumb(state, state.cookie_strategy, None)
+
     def get(self, url, user_agent_headers=None, params=None, proxy=None, timeout=30):
         # Important: treat input arguments as immutable.
         proxy = self._get_proxy(proxy)
@@ -425,7 +638,8 @@ class SessionManager(metaclass=SingletonMeta):
             params = {}
         if 'crumb' in params:
             raise Exception("yahoofinancials: Don't manually add 'crumb' to params dict, let sessions.py handle it")
-        cookie, crumb, strategy = self._get_cookie_and_crumb()
+        state = self._get_proxy_state(proxy)
+        cookie, crumb, strategy = self._get_cookie_and_crumb(proxy, timeout)
         if crumb is not None:
             crumbs = {'crumb': crumb}
         else:
@@ -443,30 +657,48 @@ class SessionManager(metaclass=SingletonMeta):
             'timeout': timeout,
             'headers': user_agent_headers or self.user_agent_headers
         }
-        response = self._session.get(**request_args)
+        response = state.session.get(**request_args)
         if response.status_code >= 400:
             # Retry with other cookie strategy
             if strategy == 'basic':
-                self._set_cookie_strategy('csrf')
+                self._set_cookie_strategy(state, 'csrf')
             else:
-                self._set_cookie_strategy('basic')
+                self._set_cookie_strategy(state, 'basic')
             cookie, crumb, strategy = self._get_cookie_and_crumb(proxy, timeout)
             request_args['params']['crumb'] = crumb
             if strategy == 'basic':
                 request_args['cookies'] = {cookie.name: cookie.value}
-            response = self._session.get(**request_args)
+            response = state.session.get(**request_args)
 
         return response
 
-    @lru_cache_freezeargs
-    @lru_cache(maxsize=cache_maxsize)
     def cache_get(self, url, user_agent_headers=None, params=None, proxy=None, timeout=30):
-        return self.get(url, user_agent_headers, params, proxy, timeout)
+        """
+        Returns the decoded JSON of a request, served from the payload cache while its request category's time to
+        live lasts. Only successful responses are cached, failures raise requests.HTTPError. The cache is opt-in, the
+        requests of YahooFinancials go through get() and are cached per instance.
+        """
+        key = get_payload_key(url, params)
+        data = self._payload_cache.get(key)
+        if data is None:
+            data = self.get_raw_json(url, user_agent_headers, params, proxy, timeout)
+            self._payload_cache.set(key, data)
+        return data
+
+    def set_cache_size(self, max_entries=cache_maxsize, max_bytes=None):
+        """Replaces the payload cache of cache_get() with an empty one of the given size"""
+        self._payload_cache = MemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+
+    def cache_info(self):
+        return self._payload_cache.cache_info()
+
+    def cache_clear(self):
+        self._payload_cache.clear()
 
     def _get_proxy(self, proxy):
         # setup proxy in requests format
         if proxy is not None:
-            if isinstance(proxy, (dict, frozendict)) and "https" in proxy:
+            if isinstance(proxy, Mapping) and "https" in proxy:
                 proxy = proxy["https"]
             proxy = {"https": proxy}
         return proxy
@@ -475,7 +707,7 @@ class SessionManager(metaclass=SingletonMeta):
         logging.debug(f'yahoofinancials: get_raw_json(): {url}')
         response = self.get(url, user_agent_headers=user_agent_headers, params=params, proxy=proxy, timeout=timeout)
         response.raise_for_status()
-        return response.json()
+        return get_json_decoder().loads(response.content)
 
 
 class TimeoutHTTPAdapter(HTTPAdapter):
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+from yahoofinancials.utils import get_response_key
+from yahoofinancials.retry import DeadlineExceeded, get_current_deadline
+
+
+def get_flight_key(url, res_field=""):
+    """Returns the key of a request, equal for urls that only differ by query host or fundamentals period2"""
+    return (res_field or "", get_response_key(url))
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent identical requests. The first caller of do() for a key runs the fetch, callers arriving
+    while it is in flight wait for it and receive the same parsed result, or the same exception.
+    Nothing is kept once the fetch completes, caching is left to the caller. Waiting callers give up with
+    DeadlineExceeded when the budget of their deadline scope runs out.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def __getstate__(self):
+        return {'coalesced': self.coalesced}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.coalesced = state['coalesced']
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            budget = get_current_deadline()
+            if not call.done.wait(budget.remaining() if budget is not None else None):
+                raise DeadlineExceeded("deadline exceeded waiting for " + str(key[1]))
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight(object):
+    """Asyncio counterpart of SingleFlight, callers of one event loop await the in-flight coroutine of their key"""
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, coro_func):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The fetching caller was cancelled, e.g. by its deadline, so this caller fetches again
+                return await self.do(key, coro_func)
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await coro_func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no other caller was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._calls[key]
+        return result
@@ -1,3 +1,35 @@
+import datetime
+import hashlib
+import importlib
+import importlib.util
+import re
+import time
+
+
+class LazyModule(object):
+    """Stands in for a module, which is only imported when one of its attributes is first used"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self.__dict__['_name'])
+        return getattr(module, attr)
+
+
+def lazy_import(name, optional=False):
+    """Returns a LazyModule of name, or None if optional is True and the module is not installed"""
+    if optional and importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
+
+
+pytz = lazy_import("pytz")
+
+
 def remove_prefix(s, prefix):
     return s[len(prefix):] if s.startswith(prefix) else s
 
@@ -20,3 +52,111 @@ def get_request_category(tech_type, fin_types, statement_type):
     else:
         r_cat = tech_type
     return r_cat
+
+
+def get_request_endpoint(url):
+    if '/v8/finance/chart/' in url:
+        return 'chart'
+    elif '/fundamentals-timeseries/' in url:
+        return 'fundamentals'
+    elif '/quoteSummary/' in url:
+        return 'quoteSummary'
+    elif '/finance/insights' in url:
+        return 'insights'
+    elif '/recommendationsbysymbol/' in url:
+        return 'recommendations'
+    elif '/v7/finance/quote' in url:
+        return 'quote'
+    return 'default'
+
+
+def get_fundamental_field(type_key):
+    field = remove_prefix(remove_prefix(remove_prefix(type_key, "quarterly"), "annual"), "trailing")
+    if field in ['EBIT']:
+        return field.lower()
+    return field[0].lower() + field[1:]
+
+
+# Default time to live in seconds of each request category, 'market_close' keeps the response until the next close
+DEFAULT_RESPONSE_TTLS = {
+    "fundamentals": 24 * 60 * 60,
+    "quoteSummary:price": 15,
+    "quoteSummary": 60 * 60,
+    "quote": 15,
+    "chart": "market_close",
+    "chart:intraday": 60,
+    "insights": 60 * 60,
+    "recommendations": 24 * 60 * 60,
+    "default": 5 * 60,
+}
+
+_INTRADAY_INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h")
+
+
+def _get_query_param(url, name):
+    match = re.search(r"[?&]" + name + r"=([^&]*)", url)
+    return match.group(1) if match else None
+
+
+def get_request_categories(url):
+    """Returns the cache categories of a request url, most specific first"""
+    endpoint = get_request_endpoint(url)
+    if endpoint == "quoteSummary":
+        modules = (_get_query_param(url, "modules") or "").replace("%2C", ",").split(",")
+        return ["quoteSummary:" + m for m in modules if m] + ["quoteSummary"]
+    elif endpoint == "chart":
+        if _get_query_param(url, "interval") in _INTRADAY_INTERVALS:
+            return ["chart:intraday", "chart"]
+        return ["chart"]
+    return [endpoint]
+
+
+def next_market_close(now=None):
+    """Returns the epoch time of the next 16:00 US/Eastern close on a weekday"""
+    eastern = pytz.timezone("US/Eastern")
+    now_eastern = datetime.datetime.fromtimestamp(now if now is not None else time.time(), eastern)
+    close = now_eastern.replace(hour=16, minute=0, second=0, microsecond=0, tzinfo=None)
+    if now_eastern.replace(tzinfo=None) >= close:
+        close += datetime.timedelta(days=1)
+    while close.weekday() >= 5:
+        close += datetime.timedelta(days=1)
+    return eastern.localize(close).timestamp()
+
+
+def _resolve_ttl(ttl):
+    if ttl == "market_close":
+        return next_market_close() - time.time()
+    return ttl
+
+
+def get_response_ttl(url, ttls=None):
+    """Returns the seconds a response to the url may be served from the cache"""
+    ttls = {**DEFAULT_RESPONSE_TTLS, **(ttls or {})}
+    categories = get_request_categories(url)
+    endpoint_ttl = ttls.get(categories[-1], ttls["default"])
+    module_categories = [c for c in categories if c.startswith("quoteSummary:")]
+    if module_categories:
+        # A multi module response expires with its shortest lived module
+        return min([_resolve_ttl(ttls.get(c, endpoint_ttl)) for c in module_categories])
+    for category in categories:
+        if category in ttls:
+            return _resolve_ttl(ttls[category])
+    return _resolve_ttl(endpoint_ttl)
+
+
+# Seconds the period2 of fundamentals timeseries requests is rounded up to, so their urls and cache keys stay stable
+PERIOD2_BUCKET = 24 * 60 * 60
+
+
+def get_period2(now=None, bucket=PERIOD2_BUCKET):
+    """Returns the period2 of a fundamentals timeseries request, the end of the bucket holding now"""
+    now = int(now if now is not None else time.time())
+    return (now // bucket + 1) * bucket
+
+
+def get_response_key(url):
+    """Returns the canonical cache key of a request url"""
+    # period2 of a fundamentals request is the end of the current day, it must not make the key unique
+    if "/fundamentals-timeseries/" in url:
+        url = re.sub(r"&period2=\d+", "", url)
+    return hashlib.sha256(url.replace("query2.", "query1.").encode("utf-8")).hexdigest()
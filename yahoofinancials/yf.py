@@ -18,17 +18,46 @@ List of Included Functions:
    - frequency can be either 'annual' or 'quarterly'.
    - statement_type can be 'income', 'balance', 'cash'.
    - reformat optional value defaulted to true. Enter False for unprocessed raw data from Yahoo Finance.
+   - statement_type can also be a list, e.g. ['income', 'balance', 'cash'], fetched with one merged request per ticker.
+1b) get_line_items(fields, frequency='annual', latest=False)
+   - fields is a list of statement line items, e.g. ['ebit', 'netIncome', 'totalRevenue'].
+   - Requests only those fundamentals timeseries, one request per ticker, and caches each line item on its own.
+   - latest=True requests only the most recent periods and returns the latest value of each line item.
 2) get_stock_price_data(reformat=True)
 3) get_stock_earnings_data()
    - reformat optional value defaulted to true. Enter False for unprocessed raw data from Yahoo Finance.
 4) get_summary_data(reformat=True)
    - reformat optional value defaulted to true. Enter False for unprocessed raw data from Yahoo Finance.
+4b) get_modules(modules, reformat=True)
+   - modules is a list of quoteSummary modules, e.g. ['price', 'summaryDetail', 'defaultKeyStatistics'].
+   - Fetches all modules with a single request per ticker, later module getters are served from that response.
 5) get_stock_quote_type_data()
 6) get_historical_price_data(start_date, end_date, time_interval)
    - Gets historical price data for currencies, stocks, indexes, cryptocurrencies, and commodity futures.
    - start_date should be entered in the 'YYYY-MM-DD' format. First day that financial data will be pulled.
    - end_date should be entered in the 'YYYY-MM-DD' format. Last day that financial data will be pulled.
    - time_interval can be either 'daily', 'weekly', or 'monthly'. Parameter determines the time period interval.
+   - Intraday intervals '1m', '2m', '5m', '15m', '30m', '60m', '90m' and '1h' are also accepted. Windows longer than
+     one request allows are fetched in chunks in parallel and stitched together, and the start is moved up to the
+     oldest bar Yahoo serves, 30 days back for '1m', 730 days for '60m' and '1h' and 60 days otherwise.
+6b) to_pandas(dataset, *args) and to_arrow(dataset, *args)
+   - dataset 'history' takes the get_historical_price_data() arguments, 'financial_stmts' takes frequency and
+     statement_type.
+   - Builds a pandas DataFrame or pyarrow Table straight from the Yahoo Finance responses, indexed by
+     (symbol, date) when tickers is a list.
+6c) deadline(seconds)
+   - Context manager running every call of the with block under one time budget, covering retries, backoff,
+     rate limiting and the cookie & crumb requests. Once it is spent, the remaining tickers of a list are skipped
+     and the partial results are returned. get_stock_data() also takes a deadline argument in seconds.
+   - The Deadline it returns maps each ticker that failed or ran out of time to the reason in its errors attribute.
+6d) get_circuit_state(endpoint=None) and get_circuit_retry_in(endpoint)
+   - Circuit breaker state of each (host, endpoint family), e.g. ('query2.finance.yahoo.com', 'quoteSummary').
+   - get_circuit_retry_in() returns the seconds until the endpoint family accepts requests again, 0.0 if it does,
+     so batch schedulers can pause instead of spending their rate budget.
+6e) get_transport_stats()
+   - Requests sent, connections opened and connections reused by the shared keep-alive connection pool.
+6f) get_proxy_stats()
+   - Requests, successes, failures, 429s, latency moving average, score and quarantine time left of each proxy.
 
 Usage Examples:
 from yahoofinancials import YahooFinancials
@@ -41,12 +70,113 @@ earnings_data = yahoo_financials.get_stock_earnings_data()
 historical_prices = yahoo_financials.get_historical_price_data('2015-01-15', '2017-10-15', 'weekly')
 """
 
+from yahoofinancials import frames
 from yahoofinancials.calcs import num_shares_outstanding, eps
 from yahoofinancials.data import YahooFinanceData
 
 __version__ = "1.20"
 __author__ = "Connor Sanders"
 
+# Getters shared by YahooFinancials and AsyncYahooFinancials, which only differ in awaiting the data method they call.
+# Maps each getter name to the data method and its arguments.
+FIELD_GETTERS = {
+    # Report Data Methods
+    'get_stock_earnings_data': ('get_stock_tech_data', ('earnings',)),
+    'get_stock_quote_type_data': ('get_stock_tech_data', ('quoteType',)),
+    'get_esg_score_data': ('get_stock_tech_data', ('esgScores',)),
+    # Price Data Methods
+    'get_current_price': ('_stock_price_data', ('regularMarketPrice',)),
+    'get_current_change': ('_stock_price_data', ('regularMarketChange',)),
+    'get_current_percent_change': ('_stock_price_data', ('regularMarketChangePercent',)),
+    'get_current_volume': ('_stock_price_data', ('regularMarketVolume',)),
+    'get_prev_close_price': ('_stock_price_data', ('regularMarketPreviousClose',)),
+    'get_open_price': ('_stock_price_data', ('regularMarketOpen',)),
+    'get_ten_day_avg_daily_volume': ('_stock_summary_data', ('averageDailyVolume10Day',)),
+    'get_stock_exchange': ('_stock_price_data', ('exchangeName',)),
+    'get_market_cap': ('_stock_price_data', ('marketCap',)),
+    'get_daily_low': ('_stock_price_data', ('regularMarketDayLow',)),
+    'get_daily_high': ('_stock_price_data', ('regularMarketDayHigh',)),
+    'get_currency': ('_stock_price_data', ('currency',)),
+    # Summary Data Methods
+    'get_yearly_high': ('_stock_summary_data', ('fiftyTwoWeekHigh',)),
+    'get_yearly_low': ('_stock_summary_data', ('fiftyTwoWeekLow',)),
+    'get_dividend_yield': ('_stock_summary_data', ('dividendYield',)),
+    'get_annual_avg_div_yield': ('_stock_summary_data', ('trailingAnnualDividendYield',)),
+    'get_five_yr_avg_div_yield': ('_stock_summary_data', ('fiveYearAvgDividendYield',)),
+    'get_dividend_rate': ('_stock_summary_data', ('dividendRate',)),
+    'get_annual_avg_div_rate': ('_stock_summary_data', ('trailingAnnualDividendRate',)),
+    'get_50day_moving_avg': ('_stock_summary_data', ('fiftyDayAverage',)),
+    'get_200day_moving_avg': ('_stock_summary_data', ('twoHundredDayAverage',)),
+    'get_beta': ('_stock_summary_data', ('beta',)),
+    'get_payout_ratio': ('_stock_summary_data', ('payoutRatio',)),
+    'get_pe_ratio': ('_stock_summary_data', ('trailingPE',)),
+    'get_price_to_sales': ('_stock_summary_data', ('priceToSalesTrailing12Months',)),
+    'get_exdividend_date': ('_stock_summary_data', ('exDividendDate',)),
+    # Financial Statement Data Methods
+    'get_book_value': ('_financial_statement_data', ('balance', 'balanceSheetHistoryQuarterly',
+                                                     'totalStockholderEquity', 'quarterly')),
+    'get_ebit': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'ebit', 'annual')),
+    'get_net_income': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'netIncome', 'annual')),
+    'get_interest_expense': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'interestExpense',
+                                                           'annual')),
+    'get_operating_income': ('_financial_statement_data', ('income', 'incomeStatementHistory',
+                                                           'netIncomeContinuousOperations', 'annual')),
+    'get_total_operating_expense': ('_financial_statement_data', ('income', 'incomeStatementHistory',
+                                                                  'totalOperatingExpenses', 'annual')),
+    'get_total_revenue': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'totalRevenue',
+                                                        'annual')),
+    'get_cost_of_revenue': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'costOfRevenue',
+                                                          'annual')),
+    'get_income_before_tax': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'incomeBeforeTax',
+                                                            'annual')),
+    'get_income_tax_expense': ('_financial_statement_data', ('income', 'incomeStatementHistory',
+                                                             'incomeTaxExpense', 'annual')),
+    'get_gross_profit': ('_financial_statement_data', ('income', 'incomeStatementHistory', 'grossProfit', 'annual')),
+    'get_net_income_from_continuing_ops': ('_financial_statement_data', ('income', 'incomeStatementHistory',
+                                                                         'netIncomeFromContinuingOps', 'annual')),
+    'get_research_and_development': ('_financial_statement_data', ('income', 'incomeStatementHistory',
+                                                                   'researchDevelopment', 'annual')),
+    # Analytic Data Methods
+    'get_recommendations': ('_get_analytic_data', ('recommendations',)),
+    'get_insights': ('_get_analytic_data', ('insights',)),
+}
+
+# Getters taking a reformat argument, maps each getter name to the data method, its arguments and the report type the
+# data is cleaned as
+REPORT_GETTERS = {
+    'get_stock_price_data': ('get_stock_tech_data', ('price',), 'price'),
+    'get_key_statistics_data': ('get_stock_tech_data', ('defaultKeyStatistics',), 'defaultKeyStatistics'),
+    'get_stock_profile_data': ('get_stock_data', ('profile', 'assetProfile', 'assetProfile'), 'earnings'),
+    'get_financial_data': ('get_stock_data', ('keystats', 'financialData'), 'financialData'),
+    'get_summary_data': ('get_stock_tech_data', ('summaryDetail',), 'summaryDetail'),
+}
+
+
+# Private function to build a getter of FIELD_GETTERS
+def _make_field_getter(method, args):
+    def getter(self):
+        return getattr(self, method)(*args)
+    return getter
+
+
+# Private function to build a getter of REPORT_GETTERS
+def _make_report_getter(method, args, report_type):
+    def getter(self, reformat=True):
+        raw_data = getattr(self, method)(*args)
+        return self.get_clean_data(raw_data, report_type) if reformat else raw_data
+    return getter
+
+
+def add_getters(cls, make_field_getter=_make_field_getter, make_report_getter=_make_report_getter):
+    """Adds the getters of FIELD_GETTERS and REPORT_GETTERS to a class, built by the given getter factories"""
+    getters = {name: make_field_getter(*spec) for name, spec in FIELD_GETTERS.items()}
+    getters.update({name: make_report_getter(*spec) for name, spec in REPORT_GETTERS.items()})
+    for name, getter in getters.items():
+        getter.__name__ = name
+        getter.__qualname__ = cls.__name__ + "." + name
+        setattr(cls, name, getter)
+    return cls
+
 
 # Class containing methods to create stock data extracts
 class YahooFinancials(YahooFinanceData):
@@ -59,6 +189,10 @@ class YahooFinancials(YahooFinanceData):
     -----------------
     concurrent: bool, default False, optional
         Defines whether the requests are made synchronously or asynchronously.
+    executor: str or concurrent.futures.Executor, default 'thread', optional
+        Executor used for concurrent requests: 'thread', 'process' or an Executor instance supplied by the caller.
+        The executor is created once per instance and reused, call close() or use the instance as a context manager
+        to shut it down. Only relevant if concurrent=True
     country: str, default 'US', optional
         This allows you to alter the region, lang, corsDomain parameter sent with each request based on selected country
     max_workers: int, default 8, optional
@@ -67,9 +201,64 @@ class YahooFinancials(YahooFinanceData):
     timeout: int, default 30, optional
         Defines how long a request will stay open.
     proxies: str or list, default None, optional
-        Defines any proxies to use during this instantiation.
+        Defines any proxies to use during this instantiation. A list is turned into a ProxyPool with the defaults.
+    pool_connections: int, default None, optional
+        Number of hosts whose connections are kept alive by the shared session. Defaults to 10.
+    pool_maxsize: int, default None, optional
+        Connections kept alive per host by the shared session. Defaults to max_workers if concurrent=True, otherwise
+        10. The pool is shared by every instance and only grows.
+    json_decoder: str or callable, default 'auto', optional
+        JSON backend parsing the response bodies: 'auto' uses orjson or ujson if installed and the json module
+        otherwise, 'orjson', 'ujson', 'json', or a function parsing bytes.
+    proxy_pool: ProxyPool, default None, optional
+        A yahoofinancials.proxies.ProxyPool instance picking proxies by health score, with a per proxy rate limit and
+        quarantine of failing proxies, e.g. to share proxy health between several YahooFinancials objects.
     flat_format: bool, default False, optional
         If set to True, returns fundamental data in a flattened format, i.e. without the list of dicts.
+    columnar_prices: bool, default None, optional
+        If set to True, get_historical_price_data() returns the 'prices' of each ticker as a
+        yahoofinancials.columns.PriceColumns object, which holds each field in one typed array instead of a dict per bar.
+        If None, only intraday prices are returned as PriceColumns. Set it to False to always get a dict per bar.
+    format_dates: bool, default True, optional
+        If set to False, epoch timestamps are returned untouched: no 'formatted_date' is added to historical prices and
+        dividends, and the *Time fields of price and summary reports stay epoch ints.
+    rate_limits: dict, default None, optional
+        Maps an endpoint family ('quoteSummary', 'fundamentals', 'chart', 'insights', 'recommendations', 'quote',
+        'default') to a (requests_per_second, burst_capacity) tuple. Unset families keep their defaults.
+    shared_rate_limit: bool, default False, optional
+        If set to True, the rate limit budget is stored in the cache folder and shared by all processes on the host.
+    rate_limiter: RateLimiter, default None, optional
+        A yahoofinancials.ratelimit.RateLimiter instance to share one budget between several YahooFinancials objects.
+    persistent_cache: bool, default False, optional
+        If set to True, parsed responses are also stored on disk in the cache folder and reused by later processes
+        until their time to live expires.
+    cache_ttls: dict, default None, optional
+        Overrides the time to live in seconds of request categories in the in-memory and persistent caches,
+        e.g. {'quoteSummary:price': 5}. Categories are listed in yahoofinancials.utils.DEFAULT_RESPONSE_TTLS.
+    memory_cache: MemoryCache, default None, optional
+        A yahoofinancials.memcache.MemoryCache instance holding the parsed responses, e.g. to share one bounded cache
+        between several YahooFinancials objects. If None, each instance keeps up to 1024 responses.
+    history_cache: bool, default False, optional
+        If set to True, historical price bars are stored on disk per symbol and interval, and later history requests
+        only download the date ranges that are not stored yet.
+    retry_policy: RetryPolicy, default None, optional
+        A yahoofinancials.retry.RetryPolicy instance setting the attempts, backoff and deadline of every request.
+        If None, a request is tried up to 5 times with exponential backoff and gives up after 60 seconds.
+    circuit_breakers: CircuitBreakers, default None, optional
+        A yahoofinancials.breaker.CircuitBreakers instance tracking the failure rate of each host and endpoint family.
+        If None, the process wide breakers are used: a circuit opens once half of the last 20 requests failed,
+        sends requests to the other query host while open and half-opens after 30 seconds.
+    single_flight: SingleFlight, default None, optional
+        A yahoofinancials.singleflight.SingleFlight instance to also coalesce identical requests in flight across
+        several YahooFinancials objects. Each instance coalesces its own concurrent requests by default.
+    batch_quotes: bool, default True, optional
+        If True and tickers is a list, the price and summary field getters (get_current_price(), get_market_cap(), ...)
+        fetch the quotes of many symbols per request from the multi symbol quote endpoint.
+    quote_chunk_size: int, default 200, optional
+        Maximum number of symbols per multi symbol quote request.
+    max_url_length: int, default 16000, optional
+        Maximum length of the url of a merged fundamentals request. get_financial_stmts() with several statement
+        types requests them all at once per ticker, split into several requests only above this length.
     """
 
     # Private method that handles financial statement extraction
@@ -90,52 +279,23 @@ class YahooFinancials(YahooFinanceData):
             data = self._run_financial_stmt(statement_type, report_num, frequency, reformat)
         else:
             data = {}
+            self._prefetch_statements(statement_type, frequency)
             for stmt_type in statement_type:
                 re_data = self._run_financial_stmt(stmt_type, report_num, frequency, reformat)
                 data.update(re_data)
         return data
 
-    # Public Method for the user to get stock price data
-    def get_stock_price_data(self, reformat=True):
-        if reformat:
-            return self.get_clean_data(self.get_stock_tech_data('price'), 'price')
-        else:
-            return self.get_stock_tech_data('price')
-
-    # Public Method for the user to return key-statistics data
-    def get_key_statistics_data(self, reformat=True):
-        if reformat:
-            return self.get_clean_data(self.get_stock_tech_data('defaultKeyStatistics'), 'defaultKeyStatistics')
-        else:
-            return self.get_stock_tech_data('defaultKeyStatistics')
-
-    # Public Method for the user to get company profile data
-    def get_stock_profile_data(self, reformat=True):
-        if reformat:
-            return self.get_clean_data(
-                self.get_stock_data(statement_type='profile', tech_type='assetProfile', report_name='assetProfile'),
-                'earnings')
-        else:
-            return self.get_stock_data(statement_type='profile', tech_type='assetProfile', report_name='assetProfile')
-
-    # Public Method for the user to get stock earnings data
-    def get_stock_earnings_data(self):
-        return self.get_stock_tech_data('earnings')
+    # Public Method for the user to get statement line items with one small timeseries request per ticker
+    def get_line_items(self, fields, frequency='annual', latest=False):
+        data = self.get_line_items_data(fields, frequency, latest)
+        return self._get_latest_line_items(data) if latest else data
 
-    # Public Method for the user to return financial data
-    def get_financial_data(self, reformat=True):
+    # Public Method for the user to get several quoteSummary modules with one request per ticker
+    def get_modules(self, modules, reformat=True):
         if reformat:
-            return self.get_clean_data(self.get_stock_data(statement_type='keystats', tech_type='financialData'),
-                                       'financialData')
+            return self._clean_modules_data(self.get_modules_data(modules))
         else:
-            return self.get_stock_data(statement_type='keystats', tech_type='financialData')
-
-    # Public Method for the user to get stock summary data
-    def get_summary_data(self, reformat=True):
-        if reformat:
-            return self.get_clean_data(self.get_stock_tech_data('summaryDetail'), 'summaryDetail')
-        else:
-            return self.get_stock_tech_data('summaryDetail')
+            return self.get_modules_data(modules)
 
     # Public Method for the user to get the yahoo summary url
     def get_stock_summary_url(self):
@@ -143,82 +303,64 @@ class YahooFinancials(YahooFinanceData):
             return self._BASE_YAHOO_URL + self.ticker
         return {t: self._BASE_YAHOO_URL + t for t in self.ticker}
 
-    # Public Method for the user to get stock quote data
-    def get_stock_quote_type_data(self):
-        return self.get_stock_tech_data('quoteType')
-
-    # Public Method for the user to get stock quote data
-    def get_esg_score_data(self):
-        return self.get_stock_tech_data('esgScores')
-
     def _get_analytic_data(self, tech_type):
         return self.get_stock_data(statement_type='analytic', tech_type=tech_type)
 
     # Public Method for user to get historical price data with
     def get_historical_price_data(self, start_date, end_date, time_interval):
-        interval_code = self.get_time_code(time_interval)
-        start = self.format_date(start_date)
-        end = self.format_date(end_date)
-        hist_obj = {'start': start, 'end': end, 'interval': interval_code}
+        hist_obj = self.get_history_obj(start_date, end_date, time_interval)
         return self.get_stock_data('history', hist_obj=hist_obj)
 
+    # Private method to get the unformatted responses of a to_pandas() or to_arrow() dataset
+    def _get_frame_data(self, dataset, args):
+        if dataset == 'history':
+            start_date, end_date, time_interval = args
+            return self._get_raw_data('history', self.get_history_obj(start_date, end_date, time_interval))
+        elif dataset == 'financial_stmts':
+            frequency, statement_type = args
+            stmt_types = [statement_type] if isinstance(statement_type, str) else statement_type
+            data = {}
+            for stmt_type in stmt_types:
+                for tick, raw_data in self._get_raw_data(stmt_type, {"interval": frequency}).items():
+                    if raw_data:
+                        data.setdefault(tick, {'result': []})['result'].extend(raw_data.get('result') or [])
+            return data
+        raise ValueError("invalid dataset: " + str(dataset) + ", expected 'history' or 'financial_stmts'")
+
+    # Public Method for the user to get historical prices or financial statements as a pandas DataFrame
+    def to_pandas(self, dataset, *args):
+        data = self._get_frame_data(dataset, args)
+        multi_index = not isinstance(self.ticker, str)
+        if dataset == 'history':
+            return frames.prices_to_pandas(data, multi_index)
+        return frames.fundamentals_to_pandas(data, multi_index)
+
+    # Public Method for the user to get historical prices or financial statements as a pyarrow Table
+    def to_arrow(self, dataset, *args):
+        data = self._get_frame_data(dataset, args)
+        with_symbol = not isinstance(self.ticker, str)
+        if dataset == 'history':
+            return frames.prices_to_arrow(data, with_symbol)
+        return frames.fundamentals_to_arrow(data, with_symbol)
+
     # Private Method for Functions needing stock_price_data
     def _stock_price_data(self, data_field):
-        price_data = self.get_stock_price_data()
-        if isinstance(self.ticker, str):
-            if price_data[self.ticker] is None:
-                return None
-            return price_data[self.ticker].get(data_field)
-        else:
-            ret_obj = {}
-            for tick in self.ticker:
-                if price_data[tick] is None:
-                    ret_obj.update({tick: None})
-                else:
-                    ret_obj.update({tick: price_data[tick].get(data_field)})
-            return ret_obj
+        if self._use_quote_data('price', data_field):
+            return self._get_report_field(self.get_quote_data('price'), data_field)
+        return self._get_report_field(self.get_stock_price_data(), data_field)
 
     # Private Method for Functions needing stock_price_data
     def _stock_summary_data(self, data_field):
-        sum_data = self.get_summary_data()
-        if isinstance(self.ticker, str):
-            if sum_data[self.ticker] is None:
-                return None
-            return sum_data[self.ticker].get(data_field, None)
-        else:
-            ret_obj = {}
-            for tick in self.ticker:
-                if sum_data[tick] is None:
-                    ret_obj.update({tick: None})
-                else:
-                    ret_obj.update({tick: sum_data[tick].get(data_field, None)})
-            return ret_obj
+        if self._use_quote_data('summaryDetail', data_field):
+            return self._get_report_field(self.get_quote_data('summaryDetail'), data_field)
+        return self._get_report_field(self.get_summary_data(), data_field)
 
     # Private Method for Functions needing financial statement data
     def _financial_statement_data(self, stmt_type, stmt_code, field_name, freq):
-        re_data = self.get_financial_stmts(freq, stmt_type)[stmt_code]
-        if isinstance(self.ticker, str):
-            try:
-                date_key = re_data[self.ticker][0].keys()[0]
-            except (IndexError, AttributeError, TypeError):
-                date_key = list(re_data[self.ticker][0])[0]
-            data = re_data[self.ticker][0][date_key].get(field_name)
-        else:
-            data = {}
-            for tick in self.ticker:
-                try:
-                    date_key = re_data[tick][0].keys()[0]
-                except:
-                    try:
-                        date_key = list(re_data[tick][0].keys())[0]
-                    except:
-                        date_key = None
-                if date_key is not None:
-                    sub_data = re_data[tick][0][date_key][field_name]
-                    data.update({tick: sub_data})
-                else:
-                    data.update({tick: None})
-        return data
+        if field_name in self._get_line_item_types(freq):
+            return self._get_report_field(self._get_first_line_items(self.get_line_items([field_name], freq)),
+                                          field_name)
+        return self._get_stmt_field(self.get_financial_stmts(freq, stmt_type)[stmt_code], field_name)
 
     # Public method to get daily dividend data
     def get_daily_dividend_data(self, start_date, end_date):
@@ -226,159 +368,22 @@ class YahooFinancials(YahooFinanceData):
         end = self.format_date(end_date)
         return self.get_stock_dividend_data(start, end, 'daily')
 
-    # Public Price Data Methods
-    def get_current_price(self):
-        return self._stock_price_data('regularMarketPrice')
-
-    def get_current_change(self):
-        return self._stock_price_data('regularMarketChange')
-
-    def get_current_percent_change(self):
-        return self._stock_price_data('regularMarketChangePercent')
-
-    def get_current_volume(self):
-        return self._stock_price_data('regularMarketVolume')
-
-    def get_prev_close_price(self):
-        return self._stock_price_data('regularMarketPreviousClose')
-
-    def get_open_price(self):
-        return self._stock_price_data('regularMarketOpen')
-
-    def get_ten_day_avg_daily_volume(self):
-        return self._stock_summary_data('averageDailyVolume10Day')
-
-    def get_stock_exchange(self):
-        return self._stock_price_data('exchangeName')
-
-    def get_market_cap(self):
-        return self._stock_price_data('marketCap')
-
-    def get_daily_low(self):
-        return self._stock_price_data('regularMarketDayLow')
-
-    def get_daily_high(self):
-        return self._stock_price_data('regularMarketDayHigh')
-
-    def get_currency(self):
-        return self._stock_price_data('currency')
-
-    # Public Summary Data Methods
-    def get_yearly_high(self):
-        return self._stock_summary_data('fiftyTwoWeekHigh')
-
-    def get_yearly_low(self):
-        return self._stock_summary_data('fiftyTwoWeekLow')
-
-    def get_dividend_yield(self):
-        return self._stock_summary_data('dividendYield')
-
-    def get_annual_avg_div_yield(self):
-        return self._stock_summary_data('trailingAnnualDividendYield')
-
-    def get_five_yr_avg_div_yield(self):
-        return self._stock_summary_data('fiveYearAvgDividendYield')
-
-    def get_dividend_rate(self):
-        return self._stock_summary_data('dividendRate')
-
-    def get_annual_avg_div_rate(self):
-        return self._stock_summary_data('trailingAnnualDividendRate')
-
-    def get_50day_moving_avg(self):
-        return self._stock_summary_data('fiftyDayAverage')
-
-    def get_200day_moving_avg(self):
-        return self._stock_summary_data('twoHundredDayAverage')
-
-    def get_beta(self):
-        return self._stock_summary_data('beta')
-
-    def get_payout_ratio(self):
-        return self._stock_summary_data('payoutRatio')
-
-    def get_pe_ratio(self):
-        return self._stock_summary_data('trailingPE')
-
-    def get_price_to_sales(self):
-        return self._stock_summary_data('priceToSalesTrailing12Months')
-
-    def get_exdividend_date(self):
-        return self._stock_summary_data('exDividendDate')
-
-    # Financial Statement Data Methods
-    def get_book_value(self):
-        return self._financial_statement_data('balance', 'balanceSheetHistoryQuarterly',
-                                              'totalStockholderEquity', 'quarterly')
-
-    def get_ebit(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'ebit', 'annual')
-
-    def get_net_income(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'netIncome', 'annual')
-
-    def get_interest_expense(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'interestExpense', 'annual')
-
-    def get_operating_income(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'netIncomeContinuousOperations',
-                                              'annual')
-
-    def get_total_operating_expense(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'totalOperatingExpenses', 'annual')
-
-    def get_total_revenue(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'totalRevenue', 'annual')
-
-    def get_cost_of_revenue(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'costOfRevenue', 'annual')
-
-    def get_income_before_tax(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'incomeBeforeTax', 'annual')
-
-    def get_income_tax_expense(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'incomeTaxExpense', 'annual')
-
-    def get_gross_profit(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'grossProfit', 'annual')
-
-    def get_net_income_from_continuing_ops(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory',
-                                              'netIncomeFromContinuingOps', 'annual')
-
-    def get_research_and_development(self):
-        return self._financial_statement_data('income', 'incomeStatementHistory', 'researchDevelopment', 'annual')
-
-    def get_recommendations(self):
-        return self._get_analytic_data("recommendations")
-
-    def get_insights(self):
-        return self._get_analytic_data("insights")
-
     # Calculated Financial Methods
     def get_earnings_per_share(self):
         price_data = self.get_current_price()
         pe_ratio = self.get_pe_ratio()
-        if isinstance(self.ticker, str):
-            return eps(price_data, pe_ratio)
-        else:
-            ret_obj = {}
-            for tick in self.ticker:
-                re_val = eps(price_data[tick], pe_ratio[tick])
-                ret_obj.update({tick: re_val})
-            return ret_obj
+        return self._calc_ticker_values(eps, price_data, pe_ratio)
 
     def get_num_shares_outstanding(self, price_type='current'):
         today_low = self._stock_summary_data('dayHigh')
         today_high = self._stock_summary_data('dayLow')
         cur_market_cap = self._stock_summary_data('marketCap')
         current = self.get_current_price()
-        if isinstance(self.ticker, str):
-            return num_shares_outstanding(cur_market_cap, today_low, today_high, price_type, current)
-        else:
-            ret_obj = {}
-            for tick in self.ticker:
-                re_data = num_shares_outstanding(cur_market_cap[tick], today_low[tick],
-                                                 today_high[tick], price_type, current[tick])
-                ret_obj.update({tick: re_data})
-            return ret_obj
+
+        def calc_num_shares(market_cap, low, high, current_price):
+            return num_shares_outstanding(market_cap, low, high, price_type, current_price)
+
+        return self._calc_ticker_values(calc_num_shares, cur_market_cap, today_low, today_high, current)
+
+
+add_getters(YahooFinancials)